@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+盤面に解答全体を適用する・盤面の線を全部消す（リセット）コストを比較するベンチマーク
+
+使い方:
+    python benchmarks/bench_batch.py [--repeat N] [--seed S]
+
+動作:
+    1. 10x10 の盤面全体を埋める解答 (蛇行する経路を区切ったもの) を生成
+    2. 1本ごとに従来の不動点ループ (bench_connectivity.py と同じ) で接続情報と色を全再計算して適用
+       (差分更新を入れる前の add_path と同じコスト)
+    3. add_path を1本ずつ呼んで解答を適用 (差分更新)
+    4. apply_edges で解答を一括適用
+    5. 解答を引いた盤面の線を remove_path で1本ずつ消す場合と、
+       apply_edges で一括で消す場合 (ゲームのリセット) を比べる
+       （1本ずつ消すと、消すたびに残りの成分をたどり直す）
+    6. 結果が一致することを確認し、1回あたりの時間を表示
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "src"))
+sys.path.insert(0, SCRIPT_DIR)
+
+from board import NumberlinkBoard
+from bench_connectivity import fixpoint_connections
+
+
+def serpentine_solution(rows, cols, rng):
+    """蛇行する1本の経路をランダムな長さに区切って数字配置と解答のエッジを作る"""
+    cells = []
+    for r in range(rows):
+        row = [(r, c) for c in range(cols)]
+        cells.extend(row if r % 2 == 0 else reversed(row))
+
+    number_cells = {}
+    edges = []
+    start = 0
+    number = 1
+    while start < len(cells):
+        end = min(len(cells), start + rng.randint(3, 2 * cols))
+        # 端に1セルだけ残らないようにする
+        if len(cells) - end < 2:
+            end = len(cells)
+        segment = cells[start:end]
+        number_cells[segment[0]] = number
+        number_cells[segment[-1]] = number
+        for a, b in zip(segment, segment[1:]):
+            edges.append((min(a, b), max(a, b)))
+        number += 1
+        start = end
+    return number_cells, edges
+
+
+def apply_with_fixpoint(board, edges):
+    """以前の add_path と同じく、1本追加するたびに全エッジの接続と色を不動点ループで計算し直す"""
+    paths = {}
+    for edge in edges:
+        paths[edge] = 0
+        fixpoint_connections(board.number_cells, paths)
+    return paths
+
+
+def apply_one_by_one(board, edges):
+    for edge in edges:
+        board.add_path(edge)
+    return dict(board.paths.items())
+
+
+def apply_batch(board, edges):
+    board.apply_edges(added=edges)
+    return dict(board.paths.items())
+
+
+def clear_one_by_one(board, edges):
+    for edge in edges:
+        board.remove_path(edge)
+    return dict(board.paths.items())
+
+
+def clear_batch(board, edges):
+    board.apply_edges(removed=edges)
+    return dict(board.paths.items())
+
+
+def bench(label, func, rows, cols, number_cells, edges, repeat, filled=False):
+    """func(board, edges) を repeat 回測り、(最後の盤面, 最後の結果の線と色, 合計時間) を返す
+
+    filled なら解答を引いた盤面から始める（時間には含めない）。
+    """
+    elapsed = 0.0
+    board = result = None
+    for _ in range(repeat):
+        board = NumberlinkBoard(rows, cols, number_cells, 16, 0, 0)
+        if filled:
+            board.apply_edges(added=edges)
+        start = time.perf_counter()
+        result = func(board, edges)
+        elapsed += time.perf_counter() - start
+    print(f"   {label:<12} {elapsed / repeat * 1000:8.3f} ms/回")
+    return board, result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="繰り返し回数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows, cols = 10, 10
+    number_cells, edges = serpentine_solution(rows, cols, rng)
+
+    print("=== 解答の一括適用ベンチマーク ===\n")
+    print(f"{rows}x{cols}: 数字 {len(number_cells) // 2}組, 線 {len(edges)}本")
+    _, fixpoint, fixpoint_time = bench("不動点ループ", apply_with_fixpoint, rows, cols, number_cells, edges, args.repeat)
+    _, one_by_one, one_time = bench("add_path", apply_one_by_one, rows, cols, number_cells, edges, args.repeat)
+    batch_board, expected, batch_time = bench("apply_edges", apply_batch, rows, cols, number_cells, edges, args.repeat)
+
+    if fixpoint != expected or one_by_one != expected or not batch_board.check_win():
+        print("   エラー: 結果が一致しません")
+        sys.exit(1)
+    print(f"   高速化: 不動点ループ比 {fixpoint_time / batch_time:.1f}倍, add_path比 {one_time / batch_time:.1f}倍")
+
+    print("\n線を全部消す (リセット)")
+    cleared_one, cleared_one_result, clear_one_time = bench(
+        "remove_path", clear_one_by_one, rows, cols, number_cells, edges, args.repeat, filled=True)
+    cleared_batch, cleared_batch_result, clear_batch_time = bench(
+        "apply_edges", clear_batch, rows, cols, number_cells, edges, args.repeat, filled=True)
+    if (
+        cleared_one_result or cleared_batch_result
+        or cleared_one.completed_count or cleared_batch.completed_count
+        or cleared_one.adjacency or cleared_batch.adjacency
+    ):
+        print("   エラー: 線が残っています")
+        sys.exit(1)
+    print(f"   高速化: remove_path比 {clear_one_time / clear_batch_time:.1f}倍")
+
+
+if __name__ == "__main__":
+    main()
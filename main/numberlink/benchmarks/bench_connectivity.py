@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+接続情報の更新コストを比較するベンチマーク
+
+使い方:
+    python benchmarks/bench_connectivity.py [--steps N] [--seed S]
+
+動作:
+    1. ランダムな数字配置とエッジの追加/削除列を生成 (10x10, 20x20)
+    2. 従来の不動点ループ (全エッジを毎回走査) で接続情報と色を更新
+    3. ConnectivityTracker による差分更新で同じ操作列を処理
+    4. 両者の結果が一致することを確認し、1操作あたりの時間を表示
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "src"))
+
+from connectivity import ConnectivityTracker
+
+
+def random_number_cells(rows, cols, pairs, rng):
+    """ランダムな位置に数字のペアを配置"""
+    cells = rng.sample([(r, c) for r in range(rows) for c in range(cols)], pairs * 2)
+    return {pos: i // 2 + 1 for i, pos in enumerate(cells)}
+
+
+def random_edge_sequence(rows, cols, steps, rng):
+    """ランダムな隣接エッジの列を生成（既にあれば削除、なければ追加として扱う）"""
+    edges = []
+    for r in range(rows):
+        for c in range(cols):
+            if c + 1 < cols:
+                edges.append(((r, c), (r, c + 1)))
+            if r + 1 < rows:
+                edges.append(((r, c), (r + 1, c)))
+    return [rng.choice(edges) for _ in range(steps)]
+
+
+def fixpoint_connections(number_cells, paths):
+    """従来の NumberlinkBoard.update_connections と同じ不動点ループ"""
+    connected_numbers = {pos: {num} for pos, num in number_cells.items()}
+    changed = True
+    while changed:
+        changed = False
+        for pos1, pos2 in paths:
+            set1 = connected_numbers.get(pos1, set())
+            set2 = connected_numbers.get(pos2, set())
+            if not set1 and not set2:
+                continue
+            elif not set1:
+                connected_numbers[pos1] = set2.copy()
+                changed = True
+            elif not set2:
+                connected_numbers[pos2] = set1.copy()
+                changed = True
+            else:
+                merged = set1.union(set2)
+                if len(merged) != len(set1) or len(merged) != len(set2):
+                    connected_numbers[pos1] = merged
+                    connected_numbers[pos2] = merged
+                    changed = True
+
+    for edge in paths:
+        nums = connected_numbers.get(edge[0], set()) | connected_numbers.get(edge[1], set())
+        paths[edge] = next(iter(nums)) if len(nums) == 1 else 0
+
+
+def run_fixpoint(number_cells, sequence):
+    paths = {}
+    for edge in sequence:
+        if edge in paths:
+            del paths[edge]
+        else:
+            paths[edge] = 0
+        fixpoint_connections(number_cells, paths)
+    return paths
+
+
+def run_tracker(number_cells, sequence):
+    paths = {}
+    adjacency = {}
+    tracker = ConnectivityTracker(number_cells, adjacency)
+
+    def recolor(pos):
+        color = tracker.color_of(pos)
+        for cell in tracker.component(pos):
+            for neighbor in adjacency.get(cell, ()):
+                paths[(min(cell, neighbor), max(cell, neighbor))] = color
+
+    for edge in sequence:
+        pos1, pos2 = edge
+        if edge in paths:
+            del paths[edge]
+            adjacency[pos1].discard(pos2)
+            adjacency[pos2].discard(pos1)
+            tracker.remove_edge(pos1, pos2)
+            recolor(pos1)
+            recolor(pos2)
+        else:
+            paths[edge] = 0
+            adjacency.setdefault(pos1, set()).add(pos2)
+            adjacency.setdefault(pos2, set()).add(pos1)
+            tracker.add_edge(pos1, pos2)
+            recolor(pos1)
+    return paths
+
+
+def bench(label, func, number_cells, sequence):
+    start = time.perf_counter()
+    result = func(number_cells, sequence)
+    elapsed = time.perf_counter() - start
+    per_step = elapsed / len(sequence) * 1e6
+    print(f"   {label:<10} {elapsed * 1000:9.1f} ms  ({per_step:8.1f} us/操作)")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=1000, help="1盤面あたりの操作数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print("=== 接続情報更新ベンチマーク ===\n")
+
+    for rows, cols in [(10, 10), (20, 20)]:
+        number_cells = random_number_cells(rows, cols, max(rows, cols), rng)
+        sequence = random_edge_sequence(rows, cols, args.steps, rng)
+
+        print(f"{rows}x{cols}: {len(sequence)}操作")
+        old_paths, old_time = bench("fixpoint", run_fixpoint, number_cells, sequence)
+        new_paths, new_time = bench("tracker", run_tracker, number_cells, sequence)
+
+        if old_paths != new_paths:
+            print("   エラー: 結果が一致しません")
+            sys.exit(1)
+        print(f"   高速化: {old_time / new_time:.1f}倍\n")
+
+
+if __name__ == "__main__":
+    main()
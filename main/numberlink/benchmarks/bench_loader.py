@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+パズル一覧の読み込み時間とメモリを、全ファイルを読む従来の方式・manifest・corpus.bin で比べるベンチマーク
+
+使い方:
+    python benchmarks/bench_loader.py [--count 10000]
+
+動作:
+    1. 一時フォルダに puzzles/data のパズルを --count 問になるまで複製し、manifest.json と corpus.bin も作る
+    2. 方式ごとに新しいプロセスで一覧を読み込み、時間と読み込み後のメモリ (tracemalloc) を記録
+       - 従来: 全JSONを読み込んで数字の配置まで保持する（以前の puzzle_loader と同じ）
+       - manifest: manifest.json だけ読み、本体は load_puzzle で1問ずつ読む
+       - corpus: corpus.bin を mmap で開く (data/ を含めない配布版と同じ条件)
+    3. manifest・corpus 方式は1問目の load_puzzle とキャッシュからの読み込みの時間も表示
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "src"))
+
+from puzzles import puzzle_loader
+from puzzles.manifest import build_corpus, save_manifest
+
+
+def legacy_load_all(data_dir):
+    """以前の puzzle_loader と同じく全ファイルを読み込んで保持する"""
+    puzzles = []
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(data_dir, filename), "r") as f:
+            puzzle_data = json.load(f)
+        puzzles.append({
+            "id": puzzle_data["id"],
+            "size": puzzle_data["size"],
+            "numbers": puzzle_loader._parse_numbers(puzzle_data["numbers"]),
+        })
+    return [{"id": p["id"], "size": p["size"]} for p in puzzles], puzzles
+
+
+def make_corpus(work_dir, count):
+    """puzzles/data のパズルを count 問になるまで複製し、manifest.json と corpus.bin を作る"""
+    data_dir = os.path.join(work_dir, "data")
+    os.makedirs(data_dir)
+    sources = puzzle_loader.read_manifest(puzzle_loader.MANIFEST_PATH)
+    if sources is None:
+        sys.exit("puzzles/manifest.json がありません (build_manifest.py を実行してください)")
+
+    rows = []
+    serials = {}
+    for i in range(count):
+        source = sources[i % len(sources)]
+        size_key = source["file"].split("_")[0]
+        serials[size_key] = serials.get(size_key, 0) + 1
+        puzzle_id = f"{size_key}_{serials[size_key]:05d}"
+        with open(os.path.join(puzzle_loader.DATA_DIR, source["file"]), "r") as f:
+            puzzle_data = json.load(f)
+        puzzle_data["id"] = puzzle_id
+        filename = f"{puzzle_id}.json"
+        with open(os.path.join(data_dir, filename), "w") as f:
+            json.dump(puzzle_data, f, indent=2)
+        rows.append([puzzle_id, source["rows"], source["cols"], filename, source["difficulty"]])
+
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    save_manifest(rows, manifest_path)
+    build_corpus(data_dir, manifest_path, os.path.join(work_dir, "corpus.bin"))
+    return data_dir, manifest_path
+
+
+def run_child(mode, data_dir, manifest_path):
+    """子プロセス側: 1つの方式で読み込んで結果を JSON で出力する"""
+    work_dir = os.path.dirname(manifest_path)
+    if mode == "corpus":
+        puzzle_loader.DATA_DIR = os.path.join(work_dir, "no-data")
+        puzzle_loader.CORPUS_PATH = os.path.join(work_dir, "corpus.bin")
+    else:
+        puzzle_loader.DATA_DIR = data_dir
+        puzzle_loader.CORPUS_PATH = os.path.join(work_dir, "no-corpus.bin")
+    puzzle_loader.MANIFEST_PATH = manifest_path
+    result = {}
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "legacy":
+        puzzle_list, resident = legacy_load_all(data_dir)
+    else:
+        puzzle_list = puzzle_loader.get_puzzle_list()
+    result["startup"] = time.perf_counter() - start
+    result["memory"] = tracemalloc.get_traced_memory()[0]
+    result["count"] = len(puzzle_list)
+
+    if mode != "legacy":
+        puzzle_id = puzzle_list[len(puzzle_list) // 2]["id"]
+        start = time.perf_counter()
+        puzzle_loader.load_puzzle(puzzle_id)
+        result["first_load"] = time.perf_counter() - start
+        start = time.perf_counter()
+        puzzle_loader.load_puzzle(puzzle_id)
+        result["cached_load"] = time.perf_counter() - start
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000, help="複製して用意するパズル数")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "DATA_DIR", "MANIFEST"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    print("=== パズル読み込みベンチマーク ===\n")
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{args.count}問を用意中...")
+        data_dir, manifest_path = make_corpus(work_dir, args.count)
+
+        results = {}
+        for mode in ("legacy", "manifest", "corpus"):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, data_dir, manifest_path],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"\n方式          問題数    起動時間    常駐メモリ")
+    for mode, label in (("legacy", "従来"), ("manifest", "manifest"), ("corpus", "corpus")):
+        result = results[mode]
+        print(
+            f"{label:<10}{result['count']:>8}"
+            f"{result['startup'] * 1000:>10.1f}ms{result['memory'] / 1024 / 1024:>11.2f}MB"
+        )
+    print()
+    for mode in ("manifest", "corpus"):
+        result = results[mode]
+        print(
+            f"{mode}: load_puzzle 1回目 {result['first_load'] * 1000:.2f}ms, "
+            f"キャッシュ {result['cached_load'] * 1000:.3f}ms, "
+            f"起動時間 {results['legacy']['startup'] / result['startup']:.1f}倍速, "
+            f"メモリ {results['legacy']['memory'] / result['memory']:.1f}分の1"
+        )
+
+
+if __name__ == "__main__":
+    main()
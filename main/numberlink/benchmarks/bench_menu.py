@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+メニュー画面の1フレームの描画時間を、全問題を調べる従来の方式と表示範囲だけ描く方式で比べるベンチマーク
+
+使い方:
+    python benchmarks/bench_menu.py [--counts 231 10000 100000] [--frames 200]
+
+動作:
+    1. 問題数ごとに、収録パズルと同じサイズの比率でグループを作る（ファイルは作らない）
+    2. 一覧の先頭・中央・末尾を選択した状態で、それぞれ --frames 回 (最長1秒) draw() を呼んで平均時間を記録
+       - 従来: 毎フレーム全問題の行・列・表示文字列・クリア状態を求めてから画面外を捨てる
+       - 現在: 事前計算した表示文字列と二分探索で、表示範囲の行だけを描く
+    3. 索引の作成（一覧が届いたときに1回だけ行う）と、絞り込みを切り替えたときの再レイアウトの時間も表示
+
+描画命令そのもの (pyxel.text など) は何もしない関数に置き換え、メニュー側の処理だけを測る。
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import MappingProxyType
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "src"))
+
+import pyxel
+
+from menu import COLOR_CLEARED, COLOR_NORMAL, COLOR_SELECTED, MenuScreen
+from menu_index import MenuIndex
+
+# 収録パズルのサイズごとの問題数 (5x5: 1, 6x6: 12, 8x8: 105, 10x10: 113)
+SIZE_RATIO = ((5, 1), (6, 12), (8, 105), (10, 113))
+
+
+class BenchApp:
+    """メニューが使う NumberlinkApp の属性だけを持つ"""
+
+    WINDOW_WIDTH = 240
+    WINDOW_HEIGHT = 240
+
+    def __init__(self, cleared):
+        self.cleared = cleared
+
+    def is_puzzle_cleared(self, puzzle_id):
+        return puzzle_id in self.cleared
+
+    def get_puzzle_progress(self, puzzle_id):
+        return None
+
+
+def make_groups(count):
+    """count 問を収録パズルと同じ比率でサイズごとのグループに分ける"""
+    total = sum(n for _, n in SIZE_RATIO)
+    groups = []
+    remaining = count
+    for i, (size, n) in enumerate(SIZE_RATIO):
+        group_count = remaining if i == len(SIZE_RATIO) - 1 else max(1, count * n // total)
+        remaining -= group_count
+        size_key = f"{size:02d}x{size:02d}"
+        puzzles = tuple(
+            MappingProxyType({"id": f"{size_key}_{j:03d}", "size": (size, size), "difficulty": j % 5 + 1})
+            for j in range(1, group_count + 1)
+        )
+        groups.append(MappingProxyType({
+            "size_key": size_key,
+            "size_label": f"{size}x{size}",
+            "puzzles": puzzles,
+        }))
+    return tuple(groups)
+
+
+def legacy_draw(menu):
+    """以前の MenuScreen.draw と同じく、全問題を調べてから画面外を捨てる"""
+    clip_top = menu.visible_area_top
+    clip_bottom = menu.visible_area_bottom
+    for group_idx, group in enumerate(menu.puzzle_groups):
+        group_layout = menu.group_layouts[group_idx]
+        label_y = menu.top_margin + group_layout['label_y'] - menu.scroll_offset
+        if clip_top <= label_y < clip_bottom:
+            pyxel.text(10, label_y, group['size_label'], 8)
+        for i, puzzle in enumerate(group['puzzles']):
+            row = i // menu.items_per_row
+            col = i % menu.items_per_row
+            if row < group_layout['num_rows']:
+                y_pos = menu.top_margin + group_layout['rows_y'] + row * menu.row_spacing - menu.scroll_offset
+            else:
+                continue
+            if y_pos < clip_top - menu.row_spacing or y_pos >= clip_bottom:
+                continue
+            x = menu.left_margin + col * menu.item_width
+            puzzle_id = puzzle["id"]
+            parts = puzzle_id.split("_")
+            num_str = parts[1] if len(parts) == 2 else f"{i+1:03d}"
+            is_cleared = menu.app.is_puzzle_cleared(puzzle_id)
+            text = num_str + "*" if is_cleared else num_str
+            is_selected = (group_idx == menu.selected_group_index and i == menu.selected_item_index)
+            if is_selected:
+                color = COLOR_SELECTED
+            elif is_cleared:
+                color = COLOR_CLEARED
+            else:
+                color = COLOR_NORMAL
+            if is_selected:
+                pyxel.rectb(x - 2, y_pos - 2, 24 if is_cleared else 20, 10, COLOR_SELECTED)
+            pyxel.text(x, y_pos, text, color)
+
+
+def select(menu, group_index, item_index):
+    menu.selected_group_index = group_index
+    menu.selected_item_index = item_index
+    menu._adjust_scroll()
+
+
+def time_frames(draw, frames, max_seconds=1.0):
+    """draw() を frames 回（max_seconds を超えたらそこまで）呼んで1回の平均時間を返す"""
+    start = time.perf_counter()
+    for done in range(1, frames + 1):
+        draw()
+        if time.perf_counter() - start > max_seconds:
+            break
+    return (time.perf_counter() - start) / done
+
+
+def bench(count, frames):
+    groups = make_groups(count)
+    cleared = {puzzle["id"] for group in groups for puzzle in group["puzzles"][::3]}
+    menu = MenuScreen(BenchApp(cleared))
+    menu.loading_done = True
+    menu.index = MenuIndex(menu.app.is_puzzle_cleared)
+
+    start = time.perf_counter()
+    menu.index.update_groups(groups)
+    menu._apply_filter()
+    layout = time.perf_counter() - start
+
+    positions = (
+        (0, 0),
+        (len(groups) // 2, len(groups[len(groups) // 2]["puzzles"]) // 2),
+        (len(groups) - 1, len(groups[-1]["puzzles"]) - 1),
+    )
+    legacy = current = 0
+    for group_index, item_index in positions:
+        select(menu, group_index, item_index)
+        legacy += time_frames(lambda: legacy_draw(menu), frames)
+        current += time_frames(menu.draw, frames)
+
+    # 絞り込みの切り替え（1回目は索引から作り、2回目以降は作ったものを使う）
+    filters = {}
+    for name, uncleared_only, band in (("未クリア", True, None), ("難易度", False, 0), ("未クリア+難易度", True, 2)):
+        times = []
+        for _ in range(2):
+            for menu.uncleared_only, menu.band_filter in ((uncleared_only, band), (False, None)):
+                start = time.perf_counter()
+                menu._apply_filter()
+                times.append(time.perf_counter() - start)
+        filters[name] = (times[0], times[2])
+    return layout, legacy / len(positions), current / len(positions), filters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[231, 10000, 100000], help="測る問題数")
+    parser.add_argument("--frames", type=int, default=200, help="選択位置ごとに描画する回数")
+    args = parser.parse_args()
+
+    # 描画命令は何もしない（メニュー側の処理だけを測る）
+    for name in ("text", "rect", "rectb", "cls", "blt"):
+        setattr(pyxel, name, lambda *args: None)
+
+    print("=== メニュー描画ベンチマーク ===\n")
+    print("問題数      従来/フレーム   現在/フレーム    倍速    索引の作成")
+    results = {}
+    for count in args.counts:
+        layout, legacy, current, filters = bench(count, args.frames)
+        results[count] = filters
+        print(
+            f"{count:>8}{legacy * 1000:>14.3f}ms{current * 1000:>14.3f}ms"
+            f"{legacy / current:>8.0f}倍{layout * 1000:>12.2f}ms"
+        )
+
+    print("\n絞り込みの切り替え (1回目 / 2回目以降)")
+    for count, filters in results.items():
+        print(f"{count:>8}  " + "  ".join(
+            f"{name} {first * 1000:.2f}ms / {again * 1000:.3f}ms" for name, (first, again) in filters.items()
+        ))
+
+
+if __name__ == "__main__":
+    main()
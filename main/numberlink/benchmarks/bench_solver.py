@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+ソルバーの解答時間を盤面サイズごとに計測するベンチマーク
+
+使い方:
+    python benchmarks/bench_solver.py [--limit N] [--size 10x10]
+
+動作:
+    1. puzzles/data の全パズルを読み込む
+    2. 各パズルを解き (--limit 2 なら解が1つだけかも確認)、時間と探索ノード数を記録
+    3. 解が見つかったものは数字がすべて正しくつながっているか確認
+    4. サイズごとに解答時間のパーセンタイル (p50/p90/p99/最大) を表示
+"""
+
+import argparse
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "src"))
+
+from puzzles.puzzle_loader import get_puzzle_list, load_puzzle
+from puzzles.solver import solve_with_stats
+
+
+def percentile(values, p):
+    """ソート済みの値から p パーセンタイル (最近傍順位) を返す"""
+    index = max(0, min(len(values) - 1, int(len(values) * p / 100 + 0.5) - 1))
+    return values[index]
+
+
+def is_valid_solution(puzzle, edges):
+    """すべてのセルが埋まり、同じ数字どうしがつながっているか確認する"""
+    rows, cols = puzzle["size"]
+    numbers = puzzle["numbers"]
+    adjacency = {}
+    for pos1, pos2 in edges:
+        adjacency.setdefault(pos1, []).append(pos2)
+        adjacency.setdefault(pos2, []).append(pos1)
+
+    for r in range(rows):
+        for c in range(cols):
+            expected = 1 if (r, c) in numbers else 2
+            if len(adjacency.get((r, c), ())) != expected:
+                return False
+
+    # 数字から線をたどって同じ数字に着くか
+    for start, num in numbers.items():
+        previous, current = None, start
+        while True:
+            following = [pos for pos in adjacency[current] if pos != previous]
+            if not following:
+                break
+            previous, current = current, following[0]
+        if current == start or numbers.get(current) != num:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=1, help="数える解の上限 (2 で唯一解の確認)")
+    parser.add_argument("--size", default=None, help="このサイズ (例: 10x10) のパズルだけ計測")
+    args = parser.parse_args()
+
+    print("=== ソルバーベンチマーク ===\n")
+
+    by_size = {}
+    failures = []
+    for info in get_puzzle_list():
+        rows, cols = info["size"]
+        label = f"{rows}x{cols}"
+        if args.size and label != args.size:
+            continue
+
+        puzzle = load_puzzle(info["id"])
+        start = time.perf_counter()
+        found, edges, nodes = solve_with_stats(puzzle, limit=args.limit)
+        elapsed = time.perf_counter() - start
+
+        by_size.setdefault(label, []).append((elapsed, nodes, info["id"]))
+        if not found:
+            failures.append((info["id"], "解なし"))
+        elif not is_valid_solution(puzzle, edges):
+            failures.append((info["id"], "解が不正"))
+        elif args.limit > 1 and found > 1:
+            failures.append((info["id"], f"解が{found}個以上"))
+
+    print("サイズ    問題数       p50       p90       p99      最大  最も遅い問題")
+    for label in sorted(by_size, key=lambda text: tuple(int(v) for v in text.split("x"))):
+        results = sorted(by_size[label])
+        times = [elapsed * 1000 for elapsed, _, _ in results]
+        slowest = results[-1]
+        print(
+            f"{label:<8}{len(results):>8}"
+            f"{percentile(times, 50):>8.1f}ms{percentile(times, 90):>8.1f}ms"
+            f"{percentile(times, 99):>8.1f}ms{times[-1]:>8.1f}ms"
+            f"  {slowest[2]} ({slowest[1]}ノード)"
+        )
+
+    if failures:
+        print()
+        for puzzle_id, reason in failures:
+            print(f"   {puzzle_id}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 import pyxel
 from utils.colors import get_color_for_number, get_path_color, BLACK, WHITE, GRAY
 from utils.grid import draw_grid, is_adjacent
+from connectivity import ConnectivityTracker
+from edge_bitmap import EdgeBitmap
+
+# 静的レイヤー（グリッドと数字）を描き込んでおく画像バンク
+STATIC_LAYER_BANK = 2
 
 class NumberlinkBoard:
     def __init__(self, grid_rows, grid_cols, number_cells, cell_size, offset_x, offset_y):
@@ -13,12 +18,31 @@ class NumberlinkBoard:
         self.OFFSET_Y = offset_y
         
         # ゲーム状態の初期化
-        self.paths = {}
-        self.connected_numbers = {}
+        # エッジ -> 色 (dict と同じ操作ができる横・縦のビット列表現)
+        self.paths = EdgeBitmap(grid_rows, grid_cols)
+        # セル -> 線でつながった隣接セルの集合（線のあるセルのみ）
+        self.adjacency = {}
+        # 線でつながったセルの成分と、成分に含まれる数字を差分更新で管理
+        self.connectivity = ConnectivityTracker(self.number_cells, self.adjacency)
         
-        # 初期化
+        # 数字 -> その数字のセル位置のリスト
+        self.number_positions = {}
         for pos, num in self.number_cells.items():
-            self.connected_numbers[pos] = {num}
+            self.number_positions.setdefault(num, []).append(pos)
+        
+        # 数字ごとの「両端まで正しく接続されているか」のキャッシュ
+        # 編集されたエッジの成分に含まれる数字だけを再計算する
+        self.completed_numbers = {num: False for num in self.number_positions}
+        # 正しく接続されている数字の数（クリア判定はこの値の比較だけで行う）
+        self.completed_count = 0
+        
+        # 静的レイヤーを画像バンクに描き込んだかどうか（最初の描画時に作成）
+        self.static_layer_ready = False
+        # 前回の描画から見た目が変わったセル（差分描画モード用）
+        self.dirty_cells = set()
+        
+        # 1フレームで線の成分をたどった回数（フレームごとの負荷計測用）
+        self.last_frame_traversals = 0
     
     def add_path(self, edge):
         # エッジを追加し、つながっている数字を更新
@@ -26,79 +50,148 @@ class NumberlinkBoard:
         
         # エッジをパスに追加
         self.paths[edge] = 0  # デフォルトのパスID (色を決める前)
+        self._link(pos1, pos2)
+        self.dirty_cells.update(edge)
         
-        # 接続情報を更新
-        self.update_connections()
+        # 接続情報を更新（併合された成分の線の色だけを塗り直す）
+        self.connectivity.add_edge(pos1, pos2)
+        self.recolor_component(pos1)
+        self.refresh_completion(self.get_connected_numbers(pos1))
     
     def remove_path(self, edge):
         # エッジを削除
-        if edge in self.paths:
-            del self.paths[edge]
-            
-        # 接続情報を更新
+        if edge not in self.paths:
+            return
+        del self.paths[edge]
+        pos1, pos2 = edge
+        self._unlink(pos1, pos2)
+        self.dirty_cells.update(edge)
+        
+        # 接続情報を更新（分割された両側の成分の線の色だけを塗り直す）
+        self.connectivity.remove_edge(pos1, pos2)
+        self.recolor_component(pos1)
+        self.recolor_component(pos2)
+        self.refresh_completion(self.get_connected_numbers(pos1) | self.get_connected_numbers(pos2))
+    
+    def clear_paths(self):
+        """すべての線を消して初期状態に戻す（ゲーム内の呼び出し元はない。外部から盤面を操作する用）"""
+        self.apply_edges(removed=list(self.paths))
+    
+    def apply_edges(self, added=(), removed=()):
+        """複数の線の追加・削除をまとめて適用し、接続情報と色は最後に1回だけ計算する
+        
+        多くの線を一度に変更するときに使う（ゲーム内ではリセットが replace_edges 経由で使う）。
+        remove_path は1本消すたびに残りの成分をたどり直すので、盤面の線を全部消すような
+        大量の削除はこちらの方が速い（10x10 で約7倍。benchmarks/bench_batch.py）。
+        追加だけなら add_path を1本ずつ呼ぶのとほぼ同じ速さ。
+        """
+        for edge in removed:
+            if edge in self.paths:
+                del self.paths[edge]
+        for edge in added:
+            self.paths[edge] = 0
+        
+        # 接続情報と色をまとめて作り直す
         self.update_connections()
     
+    def load_edges(self, edges):
+        """線の配置を edges で置き換える（restore 用。ゲーム内の呼び出し元はない）"""
+        new_edges = set(edges)
+        self.apply_edges(added=new_edges, removed=[edge for edge in self.paths if edge not in new_edges])
+    
+    def snapshot(self):
+        """線の配置を不変な値として返す（ソルバー・やり直し・保存用）"""
+        return self.paths.snapshot()
+    
+    def restore(self, snapshot):
+        """snapshot() で保存した線の配置に戻す
+
+        状態の保存・読み込みはまだゲームにないので、今は外部から使うためだけの API。
+        """
+        self.load_edges(EdgeBitmap.from_snapshot(self.GRID_ROWS, self.GRID_COLS, snapshot))
+    
+    def _link(self, pos1, pos2):
+        """隣接情報にエッジを登録"""
+        self.adjacency.setdefault(pos1, set()).add(pos2)
+        self.adjacency.setdefault(pos2, set()).add(pos1)
+    
+    def _unlink(self, pos1, pos2):
+        """隣接情報からエッジを取り除く（線がなくなったセルは登録から外す）"""
+        for a, b in ((pos1, pos2), (pos2, pos1)):
+            neighbors = self.adjacency.get(a)
+            if neighbors is not None:
+                neighbors.discard(b)
+                if not neighbors:
+                    del self.adjacency[a]
+    
+    def mark_all_dirty(self):
+        """盤面全体を再描画の対象にする"""
+        self.dirty_cells.update((r, c) for r in range(self.GRID_ROWS) for c in range(self.GRID_COLS))
+    
+    def degree(self, pos):
+        """指定された位置から出ている線の本数"""
+        return len(self.adjacency.get(pos, ()))
+    
     def update_connections(self):
-        # すべてのセルの接続情報をリセット (数字セルは除く)
-        self.connected_numbers = {pos: {num} for pos, num in self.number_cells.items()}
-        
-        # エッジに基づいて接続情報を構築
-        changed = True
-        while changed:
-            changed = False
-            
-            for edge in self.paths:
-                pos1, pos2 = edge
-                
-                # 両方のセルが接続情報を持っているか確認
-                set1 = self.connected_numbers.get(pos1, set())
-                set2 = self.connected_numbers.get(pos2, set())
-                
-                # どちらかが空の場合は初期化
-                if not set1 and not set2:
-                    continue
-                elif not set1:
-                    self.connected_numbers[pos1] = set2.copy()
-                    changed = True
-                elif not set2:
-                    self.connected_numbers[pos2] = set1.copy()
-                    changed = True
-                else:
-                    # 両方に接続情報がある場合は結合
-                    merged = set1.union(set2)
-                    if len(merged) != len(set1) or len(merged) != len(set2):
-                        self.connected_numbers[pos1] = merged
-                        self.connected_numbers[pos2] = merged
-                        changed = True
+        # すべてのエッジから隣接情報と接続情報を作り直す
+        self.mark_all_dirty()
+        self.adjacency.clear()
+        for pos1, pos2 in self.paths:
+            self._link(pos1, pos2)
+        self.connectivity.rebuild(self.paths)
         
         # パスの色を決定
         self.update_path_colors()
+        self.refresh_completion(self.number_positions)
     
     def update_path_colors(self):
-        # エッジごとに色を決定
+        # エッジごとに色を決定（両端は同じ成分なので成分の色を使う）
+        # 異なる数字に接続している場合、どの数字にも接続していない場合は黒 (0)
+        # 1つの数字に接続している場合はその数字の色
         for edge in self.paths:
-            pos1, pos2 = edge
-            connected_nums1 = self.connected_numbers.get(pos1, set())
-            connected_nums2 = self.connected_numbers.get(pos2, set())
-            
-            # 両端が接続している数字のセット
-            connected_nums = connected_nums1.union(connected_nums2)
+            self.paths[edge] = self.connectivity.color_of(edge[0])
+    
+    def recolor_component(self, pos):
+        """指定されたセルを含む成分の線の色を塗り直す"""
+        color = self.connectivity.color_of(pos)
+        for cell in self.connectivity.component(pos):
+            # 線の色はセル単位で持っているので、色が変わったセルだけを塗り直して再描画の対象にする
+            if cell in self.adjacency and self.paths.cell_label(cell) != color:
+                self.paths.set_cell_label(cell, color)
+                self.dirty_cells.add(cell)
+    
+    def refresh_completion(self, numbers):
+        """指定された数字の接続完了状態を再計算する"""
+        for num in numbers:
+            positions = self.number_positions[num]
+            # すべての位置が同じ成分にあり、その成分が他の数字を含まなければ完成
+            root = self.connectivity.find(positions[0])
+            completed = (
+                len(positions) >= 2
+                and all(self.connectivity.find(pos) == root for pos in positions[1:])
+                and self.connectivity.color_of(positions[0]) == num
+            )
             
-            # 異なる数字に接続している場合は黒 (0)
-            # 1つの数字に接続している場合はその数字の色
-            # どの数字にも接続していない場合は黒 (0)
-            if len(connected_nums) == 1:
-                num = next(iter(connected_nums))
-                self.paths[edge] = num
-            else:
-                self.paths[edge] = 0
+            # 状態が変わった数字だけカウンタに反映
+            if completed != self.completed_numbers[num]:
+                self.completed_numbers[num] = completed
+                self.completed_count += 1 if completed else -1
+                # 線の太さが変わるので成分全体を再描画の対象にする
+                # （線を消して成分が分かれたときは、どちらの側も描き直す）
+                for pos in positions:
+                    self.dirty_cells.update(self.connectivity.component(pos))
+    
+    def is_number_completed(self, number):
+        """数字のすべての位置が同じ数字の線で接続されているか（キャッシュを参照）"""
+        return self.completed_numbers.get(number, False)
+    
+    def get_connected_numbers(self, pos):
+        """指定された位置と線でつながっている数字の集合を返す"""
+        return self.connectivity.numbers_at(pos)
     
     def has_connected_path(self, pos):
         """指定された位置に接続されたパスがあるかチェック"""
-        for edge in self.paths:
-            if pos == edge[0] or pos == edge[1]:
-                return True
-        return False
+        return pos in self.adjacency
     
     def get_connected_path_color(self, pos):
         """指定された位置の接続状態に基づいて色を返す
@@ -108,7 +201,7 @@ class NumberlinkBoard:
             return 0, False
             
         number = self.number_cells[pos]
-        connected_nums = self.connected_numbers.get(pos, set())
+        connected_nums = self.get_connected_numbers(pos)
         
         # 接続されていない場合
         if len(connected_nums) == 0:
@@ -116,71 +209,24 @@ class NumberlinkBoard:
             
         # 同じ数字のみ接続されている場合（接続はあるが完全ではない）
         if len(connected_nums) == 1 and number in connected_nums:
-            # この数字が両端まで接続されているかチェック
-            same_number_positions = [p for p, n in self.number_cells.items() if n == number]
             # 両端が接続されていれば正しく接続されている
-            if self.are_connected(same_number_positions, number):
+            if self.is_number_completed(number):
                 return number, True
             return number, False
             
         # 異なる数字が接続されている場合（不正な接続）
         return 0, False
     
-    def are_connected(self, positions, number):
-        """同じ数字のすべての位置が接続されているかチェック"""
-        # 位置が2つ未満なら接続できない
-        if len(positions) < 2:
-            return False
-            
-        # 最初の位置から他のすべての位置に到達できるかチェック
-        start = positions[0]
-        for end in positions[1:]:
-            if not self.is_path_between(start, end, number):
-                return False
-        return True
-    
-    def is_path_between(self, start, end, num):
-        """二つのセル間にパスが存在するか幅優先探索で確認する"""
-        # 既に訪れたセル
-        visited = set()
-        # 探索するセルのキュー
-        queue = [start]
-        
-        while queue:
-            current = queue.pop(0)
-            
-            if current == end:
-                return True
-                
-            if current in visited:
-                continue
-                
-            visited.add(current)
-            
-            # 隣接するセルをチェック
-            for edge in self.paths:
-                cell1, cell2 = edge
-                
-                # 現在のセルに接続されているエッジを探す
-                if cell1 == current and self.paths[edge] == num:
-                    if cell2 not in visited:
-                        queue.append(cell2)
-                elif cell2 == current and self.paths[edge] == num:
-                    if cell1 not in visited:
-                        queue.append(cell1)
-        
-        # 終点に到達できなかった
-        return False
-    
     def get_potential_path_color(self, pos):
         """現在のカーソル位置にある可能性のある線の色を返す"""
         # 接続されている線が既にある場合はその色を返す
-        for edge in self.paths:
-            if pos == edge[0] or pos == edge[1]:
-                return get_path_color(self.paths[edge])
+        neighbors = self.adjacency.get(pos)
+        if neighbors:
+            neighbor = next(iter(neighbors))
+            return get_path_color(self.paths[(min(pos, neighbor), max(pos, neighbor))])
         
         # 接続情報から可能性のある色を取得
-        connected_nums = self.connected_numbers.get(pos, set())
+        connected_nums = self.get_connected_numbers(pos)
         if len(connected_nums) == 1:
             num = next(iter(connected_nums))
             return get_path_color(num)
@@ -226,159 +272,169 @@ class NumberlinkBoard:
             return center_x, center_y
     
     def check_win(self):
-        # クリア条件1: すべての数字が同じ数字と正しく接続されている
-        number_connected = {}
-        for num in set(self.number_cells.values()):
-            number_connected[num] = False
-            
-            # 同じ数字のセルを集める
-            num_cells = [pos for pos, n in self.number_cells.items() if n == num]
-            
-            # 接続されているか確認
-            connected = True
-            
-            # すべてのセルが接続されているか確認
-            for pos in num_cells:
-                # セルが連結情報を持っていない場合（線が引かれていない）
-                if pos not in self.connected_numbers:
-                    connected = False
-                    break
-                    
-                connected_nums = self.connected_numbers[pos]
-                
-                # 異なる数字と接続している場合はNG
-                if len(connected_nums) != 1 or num not in connected_nums:
-                    connected = False
-                    break
-            
-            # 最初のセルから他のすべてのセルに到達できるか確認
-            if connected and len(num_cells) >= 2:
-                start_pos = num_cells[0]
-                for end_pos in num_cells[1:]:
-                    if not self.is_path_between(start_pos, end_pos, num):
-                        connected = False
-                        break
-            
-            number_connected[num] = connected
-        
-        # すべての数字が正しく接続されているか確認
-        return all(number_connected.values())
+        # クリア条件: すべての数字が同じ数字と正しく接続されている
+        # (接続状態は線の追加・削除のたびに差分更新されたカウンタで判定)
+        return self.completed_count == len(self.number_positions)
     
     def would_create_crossing(self, pos1, pos2):
         """この2点間に線を引くと交差が発生するかチェック"""
-        # 既に線があるセルの数をカウント
-        cell_line_count = {}
-        
-        # 現在のパスから各セルの線の数をカウント
-        for edge in self.paths:
-            cell1, cell2 = edge
-            cell_line_count[cell1] = cell_line_count.get(cell1, 0) + 1
-            cell_line_count[cell2] = cell_line_count.get(cell2, 0) + 1
-        
         # 新しい線を追加した場合の影響をチェック
         for pos in [pos1, pos2]:
             # 数字セルの場合は1本しか線を引けない
             if pos in self.number_cells:
-                if cell_line_count.get(pos, 0) >= 1:
+                if self.degree(pos) >= 1:
                     return True
             # 通常セルの場合は2本まで線を引ける
             else:
-                if cell_line_count.get(pos, 0) >= 2:
+                if self.degree(pos) >= 2:
                     return True
         
         # 特に問題なし
         return False
     
+    def end_frame(self):
+        """1フレーム分の成分をたどった回数を確定する"""
+        self.last_frame_traversals = self.connectivity.traversals
+        self.connectivity.traversals = 0
+    
     def draw(self):
-        # グリッドを描画
-        draw_grid(self.OFFSET_X, self.OFFSET_Y, self.GRID_ROWS, self.GRID_COLS, self.CELL_SIZE)
+        # グリッドと数字の静的レイヤーを1回の blt で転送
+        if not self.static_layer_ready:
+            self.render_static_layer()
+        pyxel.blt(
+            self.OFFSET_X, self.OFFSET_Y, STATIC_LAYER_BANK, 0, 0,
+            self.GRID_COLS * self.CELL_SIZE + 1, self.GRID_ROWS * self.CELL_SIZE + 1
+        )
         
         # パスを描画
         self.draw_paths()
         
-        # 数字を描画
+        # 線が接続された数字を描画
         self.draw_numbers()
     
+    def render_static_layer(self):
+        """盤面の変化で変わらないグリッドと数字を画像バンクに描き込む"""
+        image = pyxel.images[STATIC_LAYER_BANK]
+        image.cls(WHITE)
+        
+        # グリッドを画像の原点から描画
+        draw_grid(0, 0, self.GRID_ROWS, self.GRID_COLS, self.CELL_SIZE, target=image)
+        
+        # 線が接続されていないときの数字
+        for (r, c), number in self.number_cells.items():
+            x = c * self.CELL_SIZE + self.CELL_SIZE // 2 - 2
+            y = r * self.CELL_SIZE + self.CELL_SIZE // 2 - 2
+            image.text(x, y, str(number), get_color_for_number(number))
+        
+        self.static_layer_ready = True
+    
     def draw_paths(self):
         # すべてのパスを描画
         for edge, num in self.paths.items():
-            pos1, pos2 = edge
-            r1, c1 = pos1
-            r2, c2 = pos2
-            
-            # 線の色
-            color = get_path_color(num)
-            
-            # 両端が同じ数字かつ完全に接続されているかチェック
-            is_fully_connected = False
-            if num != 0:  # 有効な数字の場合
-                # 同じ数字のすべての位置を取得
-                same_number_positions = [p for p, n in self.number_cells.items() if n == num]
-                is_fully_connected = self.are_connected(same_number_positions, num)
-            
-            # 線の太さ - 完全に接続されているなら太く
-            thickness = 3 if is_fully_connected else 1
-            
-            # 始点と終点の座標を計算（数字セルの場合は円の縁から始める）
-            x1, y1 = self.get_path_endpoint(r1, c1, r2, c2)
-            x2, y2 = self.get_path_endpoint(r2, c2, r1, c1)
-            
-            # 線を描画
-            pyxel.line(x1, y1, x2, y2, color)
-            
-            # 太い線を描画する場合
-            if thickness > 1:
-                if r1 == r2:  # 水平線
-                    for i in range(1, thickness):
-                        offset = i // 2 * (1 if i % 2 else -1)
-                        pyxel.line(x1, y1 + offset, x2, y2 + offset, color)
-                else:  # 垂直線
-                    for i in range(1, thickness):
-                        offset = i // 2 * (1 if i % 2 else -1)
-                        pyxel.line(x1 + offset, y1, x2 + offset, y2, color)
+            self.draw_path(edge, num)
+    
+    def draw_path(self, edge, num):
+        """1本のパスを描画"""
+        pos1, pos2 = edge
+        r1, c1 = pos1
+        r2, c2 = pos2
+        
+        # 線の色
+        color = get_path_color(num)
+        
+        # 両端が同じ数字かつ完全に接続されているかチェック
+        is_fully_connected = num != 0 and self.is_number_completed(num)
+        
+        # 線の太さ - 完全に接続されているなら太く
+        thickness = 3 if is_fully_connected else 1
+        
+        # 始点と終点の座標を計算（数字セルの場合は円の縁から始める）
+        x1, y1 = self.get_path_endpoint(r1, c1, r2, c2)
+        x2, y2 = self.get_path_endpoint(r2, c2, r1, c1)
+        
+        # 線を描画
+        pyxel.line(x1, y1, x2, y2, color)
+        
+        # 太い線を描画する場合
+        if thickness > 1:
+            if r1 == r2:  # 水平線
+                for i in range(1, thickness):
+                    offset = i // 2 * (1 if i % 2 else -1)
+                    pyxel.line(x1, y1 + offset, x2, y2 + offset, color)
+            else:  # 垂直線
+                for i in range(1, thickness):
+                    offset = i // 2 * (1 if i % 2 else -1)
+                    pyxel.line(x1 + offset, y1, x2 + offset, y2, color)
     
     def draw_numbers(self):
-        # 数字を描画
+        # 数字を描画（線が接続されていない数字は静的レイヤーに描画済み）
         for pos, number in self.number_cells.items():
-            r, c = pos
-            # 数字の位置（オフセットを考慮）
-            center_x = self.OFFSET_X + c * self.CELL_SIZE + self.CELL_SIZE // 2
-            center_y = self.OFFSET_Y + r * self.CELL_SIZE + self.CELL_SIZE // 2
-            
-            # 数字の標準色
-            base_color = get_color_for_number(number)
-            
-            # 線が接続されているかチェック
-            has_connection = self.has_connected_path(pos)
+            self.draw_number(pos, number)
+    
+    def draw_number(self, pos, number):
+        """線が接続された数字セルの円と数字を描画"""
+        # 線が接続されている場合のみ円と数字を描く
+        if not self.has_connected_path(pos):
+            return
+        
+        r, c = pos
+        # 数字の位置（オフセットを考慮）
+        center_x = self.OFFSET_X + c * self.CELL_SIZE + self.CELL_SIZE // 2
+        center_y = self.OFFSET_Y + r * self.CELL_SIZE + self.CELL_SIZE // 2
+        
+        # 数字の標準色
+        base_color = get_color_for_number(number)
+        
+        # 接続状態に基づいて色を取得
+        circle_color, is_fully_connected = self.get_connected_path_color(pos)
+        circle_color = get_path_color(circle_color)
+        
+        # セルサイズが大きくなったため、半径を調整
+        radius = self.CELL_SIZE // 3
+        
+        # 完全に接続されている場合は太い円を描く
+        if is_fully_connected:
+            # 少し大きな半径で円を描く（数字の見やすさ向上）
+            outer_radius = radius + 1  # 外側の円を少し大きく
+            # 外側の円
+            pyxel.circb(center_x, center_y, outer_radius, circle_color)
+            # 内側の円（少し小さくして太く見せる）
+            pyxel.circb(center_x, center_y, outer_radius - 1, circle_color)
+        elif circle_color == BLACK:
+            # 異なる数字に接続されている場合は黒い円を描く
+            pyxel.circb(center_x, center_y, radius, BLACK)
+        else:
+            # 同じ数字に接続されているが完全ではない場合は通常の円
+            pyxel.circb(center_x, center_y, radius, circle_color)
+        
+        # 数字の背景に小さな円を描く（線が数字に重ならないように）
+        pyxel.circ(center_x, center_y, radius - 1, WHITE)
+        
+        # 数字を描画（中央に配置）
+        x = center_x - 2
+        y = center_y - 2
+        pyxel.text(x, y, str(number), base_color)
+    
+    def draw_cells(self, cells):
+        """指定されたセルの範囲だけを描き直す（差分描画モード用）"""
+        if not self.static_layer_ready:
+            self.render_static_layer()
+        
+        size = self.CELL_SIZE
+        for r, c in cells:
+            x = c * size
+            y = r * size
             
-            # 線が接続されている場合のみ円を描く
-            if has_connection:
-                # 接続状態に基づいて色を取得
-                circle_color, is_fully_connected = self.get_connected_path_color(pos)
-                circle_color = get_path_color(circle_color)
-                
-                # セルサイズが大きくなったため、半径を調整
-                radius = self.CELL_SIZE // 3
-                
-                # 完全に接続されている場合は太い円を描く
-                if is_fully_connected:
-                    # 少し大きな半径で円を描く（数字の見やすさ向上）
-                    outer_radius = radius + 1  # 外側の円を少し大きく
-                    # 外側の円
-                    pyxel.circb(center_x, center_y, outer_radius, circle_color)
-                    # 内側の円（少し小さくして太く見せる）
-                    pyxel.circb(center_x, center_y, outer_radius - 1, circle_color)
-                elif circle_color == BLACK:
-                    # 異なる数字に接続されている場合は黒い円を描く
-                    pyxel.circb(center_x, center_y, radius, BLACK)
-                else:
-                    # 同じ数字に接続されているが完全ではない場合は通常の円
-                    pyxel.circb(center_x, center_y, radius, circle_color)
-                
-                # 数字の背景に小さな円を描く（線が数字に重ならないように）
-                pyxel.circ(center_x, center_y, radius - 1, WHITE)
+            # セルの範囲（右・下の枠線を含む）に描画を制限して静的レイヤーを転送
+            pyxel.clip(self.OFFSET_X + x, self.OFFSET_Y + y, size + 1, size + 1)
+            pyxel.blt(self.OFFSET_X + x, self.OFFSET_Y + y, STATIC_LAYER_BANK, x, y, size + 1, size + 1)
             
-            # 数字を描画（中央に配置）
-            x = center_x - 2
-            y = center_y - 2
-            pyxel.text(x, y, str(number), base_color)
+            # セルから出ている線と、セルの数字を描き直す
+            pos = (r, c)
+            for neighbor in self.adjacency.get(pos, ()):
+                edge = (min(pos, neighbor), max(pos, neighbor))
+                self.draw_path(edge, self.paths[edge])
+            if pos in self.number_cells:
+                self.draw_number(pos, self.number_cells[pos])
+        
+        pyxel.clip()
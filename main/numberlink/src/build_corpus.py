@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+全パズルを1つのバイナリファイル (puzzles/corpus.bin) にまとめるスクリプト
+
+使い方:
+    python build_corpus.py [--verify]
+
+動作:
+    1. puzzles/data/ の全JSONを読み込む (難易度は puzzles/manifest.json から)
+    2. puzzles/corpus.bin に書き出す
+    3. --verify なら corpus.bin を読み直し、全パズルが元のJSONと一致するか確認する
+       一致しないものがあれば終了コード 1 を返す
+
+corpus.bin があればゲームは data/ のJSONの代わりにこちらを読む。
+import_new_puzzles.py はパズルを追加したあとに自動で作り直す。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from puzzles.manifest import build_corpus
+from puzzles.packed_corpus import PackedCorpus
+from puzzles.puzzle_loader import CORPUS_PATH, DATA_DIR, MANIFEST_PATH
+
+
+def verify_corpus(path, puzzles):
+    """corpus.bin を読み直して元のパズルと比べ、一致しないIDのリストを返す"""
+    corpus = PackedCorpus.open(path)
+    mismatched = []
+    if len(corpus) != len(puzzles):
+        mismatched.append(f"パズル数 {len(corpus)} != {len(puzzles)}")
+    for index, expected in enumerate(puzzles[:len(corpus)]):
+        puzzle_id, rows, cols, difficulty = corpus.entry(index)
+        packed = corpus.puzzle(index)
+        if (
+            corpus.index_of(expected["id"]) != index
+            or (puzzle_id, [rows, cols], difficulty) != (expected["id"], expected["size"], expected["difficulty"])
+            or packed != {key: expected[key] for key in ("id", "size", "numbers")}
+        ):
+            mismatched.append(expected["id"])
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verify", action="store_true", help="書き出した corpus.bin を読み直して確認する")
+    args = parser.parse_args()
+
+    print("=== corpus.bin の作成 ===\n")
+    start = time.perf_counter()
+    puzzles = build_corpus(DATA_DIR, MANIFEST_PATH, CORPUS_PATH)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(CORPUS_PATH)
+    print(f"   {len(puzzles)}問 -> {CORPUS_PATH} ({size}バイト, {elapsed:.2f}秒)")
+
+    if args.verify:
+        mismatched = verify_corpus(CORPUS_PATH, puzzles)
+        if mismatched:
+            print(f"\n読み直した結果が一致しません ({len(mismatched)}件):")
+            for item in mismatched:
+                print(f"   {item}")
+            sys.exit(1)
+        print(f"   読み直し確認: {len(puzzles)}問すべて一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+パズル一覧の索引 (puzzles/manifest.json) を作り直すスクリプト
+
+使い方:
+    python build_manifest.py [--recompute]
+
+動作:
+    1. puzzles/data/ の全JSONから id・サイズ・ファイル名を集める
+    2. 新しいパズルだけソルバーで解いて難易度 (1〜5) を決める
+       (--recompute なら全パズルの難易度を計算し直す)
+    3. puzzles/manifest.json に保存する
+
+起動時のメニューはこの索引だけを読み、パズルの本体は遊ぶときに読み込む。
+import_new_puzzles.py はパズルを追加したあとに自動で作り直す。
+"""
+
+import argparse
+import time
+
+from puzzles.manifest import build_manifest
+from puzzles.puzzle_loader import DATA_DIR, MANIFEST_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recompute", action="store_true", help="全パズルの難易度を計算し直す")
+    args = parser.parse_args()
+
+    print("=== manifest.json の作成 ===\n")
+    start = time.perf_counter()
+    count = build_manifest(
+        DATA_DIR, MANIFEST_PATH, recompute=args.recompute,
+        progress=lambda filename, difficulty: print(f"   {filename}: 難易度 {difficulty}"),
+    )
+    elapsed = time.perf_counter() - start
+    print(f"\n=== 完了 ({count}問, {elapsed:.1f}秒) ===")
+    print(f"出力: {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
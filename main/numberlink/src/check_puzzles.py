@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+パズルの解が1つだけかを確認するスクリプト
+
+使い方:
+    python check_puzzles.py [--all] [--dir DIR]
+
+動作:
+    1. puzzles/data/ (または --dir で指定したフォルダ) から全JSONを読み込む
+    2. 各パズルを解き、2つ目の解が見つかった時点で打ち切る
+    3. unique (解が1つ) / multiple (解が複数) / unsolvable (解なし) に分類
+    4. unique 以外のパズルとサマリーを表示 (--all なら全パズルを表示)
+       unique 以外があれば終了コード 1 を返す
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from puzzles.solver import UNIQUE, MULTIPLE, UNSOLVABLE, check_uniqueness
+
+# パス設定
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, "puzzles", "data")
+
+# 読み込めなかったファイルの分類
+ERROR = "error"
+
+
+def classify_file(filepath):
+    """パズルファイルを読み込んで分類する"""
+    try:
+        with open(filepath, "r") as f:
+            puzzle_data = json.load(f)
+        return check_uniqueness(puzzle_data)
+    except (OSError, ValueError, KeyError, TypeError):
+        return ERROR
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="unique のパズルも表示する")
+    parser.add_argument("--dir", default=DATA_DIR, help="確認するパズルのフォルダ")
+    args = parser.parse_args()
+
+    print("=== パズルの唯一解チェック ===\n")
+
+    if not os.path.exists(args.dir):
+        print(f"エラー: {args.dir} が見つかりません")
+        sys.exit(1)
+
+    filenames = sorted(name for name in os.listdir(args.dir) if name.endswith(".json"))
+    counts = Counter()
+    start = time.perf_counter()
+
+    for filename in filenames:
+        result = classify_file(os.path.join(args.dir, filename))
+        counts[result] += 1
+        if args.all or result != UNIQUE:
+            print(f"   {filename}: {result}")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n=== 完了 ({len(filenames)}問, {elapsed:.1f}秒) ===")
+    for result in (UNIQUE, MULTIPLE, UNSOLVABLE, ERROR):
+        print(f"   {result}: {counts[result]}個")
+
+    if counts[UNIQUE] != len(filenames):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+from collections import deque
+
+
+class ConnectivityTracker:
+    """エッジ集合の連結成分と、成分ごとに含まれる数字を差分更新で管理する
+
+    追加は Union-Find（経路圧縮 + サイズによる併合）、
+    削除は切れた成分だけを探索して分割・再ラベルする。
+    隣接情報 (セル -> 線でつながった隣接セルの集合) は呼び出し側が管理し、
+    add_edge / remove_edge の前に更新しておく。
+    """
+
+    def __init__(self, number_cells, adjacency):
+        self.number_cells = number_cells
+        self._adjacency = adjacency
+        # 成分をたどった回数（フレームごとの負荷計測用）
+        self.traversals = 0
+        self.reset()
+
+    def reset(self):
+        """すべてのエッジを取り除いた初期状態に戻す"""
+        # Union-Find の親ポインタ（登録されていないセルは単独の成分）
+        self._parent = {}
+        # 代表セル -> 成分に含まれるセルの集合
+        self._members = {}
+        # 代表セル -> 成分に含まれる数字の集合
+        self._numbers = {}
+
+        # 数字セルは最初から自分の数字だけを持つ成分として登録
+        for pos, num in self.number_cells.items():
+            self._parent[pos] = pos
+            self._members[pos] = {pos}
+            self._numbers[pos] = frozenset((num,))
+
+    def rebuild(self, edges):
+        """エッジ集合から接続情報を作り直す（隣接情報は更新済みであること）"""
+        self.reset()
+        for pos1, pos2 in edges:
+            self.add_edge(pos1, pos2)
+
+    def find(self, pos):
+        """セルが属する成分の代表セルを返す"""
+        parent = self._parent
+        if pos not in parent:
+            return pos
+
+        root = pos
+        while parent[root] != root:
+            root = parent[root]
+
+        # 経路圧縮
+        while parent[pos] != root:
+            parent[pos], pos = root, parent[pos]
+        return root
+
+    def _register(self, pos):
+        """単独のセルを成分として登録し、代表セルを返す"""
+        if pos not in self._parent:
+            self._parent[pos] = pos
+            self._members[pos] = {pos}
+            self._numbers[pos] = frozenset()
+            return pos
+        return self.find(pos)
+
+    def add_edge(self, pos1, pos2):
+        """エッジを追加し、併合後の成分の代表セルを返す"""
+        root1 = self._register(pos1)
+        root2 = self._register(pos2)
+        if root1 == root2:
+            return root1
+
+        # 小さい成分を大きい成分に併合
+        if len(self._members[root1]) < len(self._members[root2]):
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._members[root1] |= self._members.pop(root2)
+        self._numbers[root1] = self._numbers[root1] | self._numbers.pop(root2)
+        return root1
+
+    def remove_edge(self, pos1, pos2):
+        """エッジを削除し、影響を受けた成分の代表セルのリストを返す"""
+        old_root = self.find(pos1)
+        # 別経路でまだつながっている場合は成分は変わらない（pos2 に届いた時点で探索をやめる）
+        side1 = self._collect(pos1, targets=(pos2,))
+        if side1 is None:
+            return [old_root]
+
+        side2 = self._collect(pos2)
+        del self._members[old_root]
+        del self._numbers[old_root]
+
+        roots = []
+        for side in (side1, side2):
+            root = self._relabel(side)
+            if root is not None:
+                roots.append(root)
+        return roots
+
+    def _collect(self, start, targets=()):
+        self.traversals += 1
+        return collect_component(self._adjacency, start, targets)
+
+    def _relabel(self, cells):
+        """分割後の成分を新しい代表セルで登録し直す"""
+        if len(cells) == 1:
+            pos = next(iter(cells))
+            # 線も数字もない単独セルは登録から外す
+            if pos not in self.number_cells:
+                self._parent.pop(pos, None)
+                return None
+
+        root = next(iter(cells))
+        for pos in cells:
+            self._parent[pos] = root
+        self._members[root] = cells
+        self._numbers[root] = frozenset(
+            self.number_cells[pos] for pos in cells if pos in self.number_cells
+        )
+        return root
+
+    def numbers_at(self, pos):
+        """セルの成分に含まれる数字の集合を返す（なければ空集合）"""
+        return self._numbers.get(self.find(pos), frozenset())
+
+    def color_of(self, pos):
+        """成分の線の色となる数字を返す（1つの数字だけに接続していなければ0）"""
+        numbers = self.numbers_at(pos)
+        if len(numbers) == 1:
+            return next(iter(numbers))
+        return 0
+
+    def component(self, pos):
+        """セルと同じ成分に含まれるセルの集合を返す"""
+        return self._members.get(self.find(pos), {pos})
+
+
+def collect_component(adjacency, start, targets=()):
+    """start から隣接情報を幅優先でたどって同じ成分のセルの集合を返す
+
+    targets を渡すと、そのセルすべてに到達した時点で探索をやめて None を返す
+    （つながっているかどうかだけわかればよいとき）。
+    線を消したときの「まだつながっているか」はこれで1回だけたどる。
+    数字の全セルがつながっているかは Union-Find の代表セルを比べれば済むので
+    (NumberlinkBoard.refresh_completion)、探索は使わない。
+    """
+    remaining = set(targets)
+    remaining.discard(start)
+    if targets and not remaining:
+        return None
+    seen = {start}
+    frontier = deque((start,))
+    while frontier:
+        current = frontier.popleft()
+        for neighbor in adjacency.get(current, ()):
+            if neighbor not in seen:
+                if neighbor in remaining:
+                    remaining.discard(neighbor)
+                    if not remaining:
+                        return None
+                seen.add(neighbor)
+                frontier.append(neighbor)
+    return seen
@@ -0,0 +1,154 @@
+from collections.abc import MutableMapping
+
+
+class EdgeBitmap(MutableMapping):
+    """盤面の線を横・縦のビット列とセルごとの色ラベルで保持する
+
+    horizontal のビット r*cols+c は (r, c)-(r, c+1) の線、
+    vertical のビット r*cols+c は (r, c)-(r+1, c) の線を表す。
+    線の色は両端のセルで同じなので、セル単位の配列 labels に持つ。
+    ((r1, c1), (r2, c2)) -> 色 の dict と同じように扱えるが、色はエッジごとではなくセルごとの値:
+    bitmap[edge] = 色 は両端のセルの色を書き換えるので、同じセルから出ている他の線の色も変わる。
+    盤面では線でつながったセルは同じ成分で色も同じなので、これで食い違わない
+    （色は NumberlinkBoard.recolor_component が成分単位で塗る）。
+    """
+
+    def __init__(self, rows, cols, horizontal=0, vertical=0, labels=None):
+        self.rows = rows
+        self.cols = cols
+        self.horizontal = horizontal
+        self.vertical = vertical
+        self.labels = labels if labels is not None else bytearray(rows * cols)
+
+    @classmethod
+    def from_snapshot(cls, rows, cols, snapshot):
+        """snapshot() で保存した状態から復元する（色はすべて0になる）"""
+        horizontal, vertical = snapshot
+        return cls(rows, cols, horizontal, vertical)
+
+    def snapshot(self):
+        """線の配置だけを不変な値として返す（ハッシュ・比較・保存用）"""
+        return (self.horizontal, self.vertical)
+
+    def copy(self):
+        """色を含めた複製を返す（ゲーム内の呼び出し元はない）"""
+        return EdgeBitmap(self.rows, self.cols, self.horizontal, self.vertical, bytearray(self.labels))
+
+    def _locate(self, edge):
+        """エッジに対応するビット位置を返す (縦線かどうか, ビット番号)"""
+        (r1, c1), (r2, c2) = edge
+        # 盤面の外に出る線は、隣のセルのビットや色を書き換えないよう dict と同じく KeyError にする
+        if 0 <= r1 < self.rows and 0 <= c1 < self.cols:
+            if r1 == r2 and c2 == c1 + 1 and c2 < self.cols:
+                return False, r1 * self.cols + c1
+            if c1 == c2 and r2 == r1 + 1 and r2 < self.rows:
+                return True, r1 * self.cols + c1
+        raise KeyError(edge)
+
+    def encode_edge(self, edge):
+        """エッジを1つの整数に変換する（履歴などにコンパクトに保存する用）"""
+        vertical, index = self._locate(edge)
+        return index << 1 | vertical
+
+    def decode_edge(self, code):
+        """encode_edge() の整数をエッジに戻す"""
+        r, c = divmod(code >> 1, self.cols)
+        if code & 1:
+            return ((r, c), (r + 1, c))
+        return ((r, c), (r, c + 1))
+
+    def cell_label(self, pos):
+        """セルから出ている線の色を返す"""
+        r, c = pos
+        return self.labels[r * self.cols + c]
+
+    def set_cell_label(self, pos, color):
+        """セルから出ている線の色をまとめて変更する"""
+        r, c = pos
+        self.labels[r * self.cols + c] = color
+
+    def _has_bit(self, vertical, index):
+        bits = self.vertical if vertical else self.horizontal
+        return (bits >> index) & 1
+
+    def __contains__(self, edge):
+        try:
+            vertical, index = self._locate(edge)
+        except (KeyError, TypeError, ValueError):
+            return False
+        return bool(self._has_bit(vertical, index))
+
+    def __getitem__(self, edge):
+        """線の色（端のセルの色）を返す"""
+        vertical, index = self._locate(edge)
+        if not self._has_bit(vertical, index):
+            raise KeyError(edge)
+        return self.labels[index]
+
+    def __setitem__(self, edge, color):
+        """線を引き、両端のセルの色を color にする（そのセルから出ている他の線の色も変わる）"""
+        vertical, index = self._locate(edge)
+        if vertical:
+            self.vertical |= 1 << index
+            other = index + self.cols
+        else:
+            self.horizontal |= 1 << index
+            other = index + 1
+        self.labels[index] = color
+        self.labels[other] = color
+
+    def __delitem__(self, edge):
+        vertical, index = self._locate(edge)
+        if not self._has_bit(vertical, index):
+            raise KeyError(edge)
+        if vertical:
+            self.vertical &= ~(1 << index)
+            other = index + self.cols
+        else:
+            self.horizontal &= ~(1 << index)
+            other = index + 1
+
+        # 線がなくなったセルの色は消しておく
+        for cell in (index, other):
+            if not self._cell_has_edge(cell):
+                self.labels[cell] = 0
+
+    def _cell_has_edge(self, index):
+        """セル番号 index から線が出ているか"""
+        r, c = divmod(index, self.cols)
+        return bool(
+            (c + 1 < self.cols and (self.horizontal >> index) & 1)
+            or (c > 0 and (self.horizontal >> (index - 1)) & 1)
+            or (r + 1 < self.rows and (self.vertical >> index) & 1)
+            or (r > 0 and (self.vertical >> (index - self.cols)) & 1)
+        )
+
+    def __iter__(self):
+        cols = self.cols
+        for bits, dr, dc in ((self.horizontal, 0, 1), (self.vertical, 1, 0)):
+            while bits:
+                low = bits & -bits
+                r, c = divmod(low.bit_length() - 1, cols)
+                yield ((r, c), (r + dr, c + dc))
+                bits ^= low
+
+    def __len__(self):
+        return self.horizontal.bit_count() + self.vertical.bit_count()
+
+    def __eq__(self, other):
+        if isinstance(other, EdgeBitmap):
+            return (
+                self.snapshot() == other.snapshot()
+                and self.rows == other.rows
+                and self.cols == other.cols
+                and self.labels == other.labels
+            )
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def clear(self):
+        """すべての線を消す"""
+        self.horizontal = 0
+        self.vertical = 0
+        self.labels = bytearray(self.rows * self.cols)
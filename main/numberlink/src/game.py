@@ -4,7 +4,7 @@ from board import NumberlinkBoard
 from game_controller import NumberlinkController
 
 class NumberlinkGame:
-    def __init__(self, app, puzzle_id):
+    def __init__(self, app, puzzle_id, input_log=None):
         self.app = app
         
         # パズルデータのロード
@@ -19,14 +19,14 @@ class NumberlinkGame:
         grid_cols = size[1]
         number_cells = puzzle_data["numbers"]
         
-        # ゲーム設定 - セルサイズは固定
+        # ゲーム設定 - セルサイズは固定（表示できる盤面は puzzle_loader.MAX_ROWS x MAX_COLS まで）
         cell_size = 16
         offset_x = (app.WINDOW_WIDTH - grid_cols * cell_size) // 2
         offset_y = (app.WINDOW_HEIGHT - 40 - grid_rows * cell_size) // 2
         
         # ボードとコントローラーの初期化
         self.board = NumberlinkBoard(grid_rows, grid_cols, number_cells, cell_size, offset_x, offset_y)
-        self.controller = NumberlinkController(self, self.board, puzzle_id)
+        self.controller = NumberlinkController(self, self.board, puzzle_id, input_log)
     
     def initialize_game(self):
         self.controller.initialize_game()
@@ -35,8 +35,23 @@ class NumberlinkGame:
         self.controller.update()
     
     def draw(self):
+        self.board.end_frame()
         self.board.draw()
         self.controller.draw()
+        self.board.dirty_cells.clear()
+    
+    def draw_dirty(self):
+        """差分描画モード: 盤面の変化したセル・カーソル・ステータス欄だけを描き直す"""
+        self.board.end_frame()
+        cells = self.board.dirty_cells | self.controller.get_dirty_cells()
+        if cells:
+            self.board.draw_cells(cells)
+            self.board.dirty_cells.clear()
+        self.controller.draw_dirty(bool(cells))
+    
+    def get_debug_info(self):
+        """デバッグ表示用のフレームごとの処理コスト"""
+        return [f"TRAVERSALS/FRAME: {self.board.last_frame_traversals}"]
     
     def return_to_menu(self):
         self.app.return_to_menu()
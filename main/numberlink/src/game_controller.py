@@ -1,12 +1,31 @@
 import pyxel
 from utils.colors import GRAY, DARK_GRAY, WHITE, BLACK
 from utils.grid import is_adjacent
+from journal import EditJournal, iter_deltas
+
+# 元に戻せるストローク数の上限（超えた分は古いものから捨てる）
+UNDO_HISTORY_LIMIT = 200
 
 class NumberlinkController:
-    def __init__(self, game, board, puzzle_id):
+    def __init__(self, game, board, puzzle_id, input_log=None):
         self.game = game
         self.board = board
         self.puzzle_id = puzzle_id
+        # 入力の記録・再生 (input_log.InputRecorder / InputPlayer)。None なら通常の操作
+        self.input_log = input_log
+        
+        # 差分描画モード用: 前回描画したときのカーソルとステータス欄の状態
+        # （リセット後も画面に残っている古いカーソルを消せるよう初期化では消さない）
+        self.drawn_cursor_state = None
+        self.drawn_status_state = None
+        
+        # 線の編集履歴（リセットも元に戻せるよう初期化では消さない）
+        self.journal = EditJournal(max_strokes=UNDO_HISTORY_LIMIT)
+        
+        # クリア記録用のプレイ時間（フレーム数）と手数（線の編集・元に戻す・やり直すの回数）
+        # リセットしても数え直さない
+        self.play_frames = 0
+        self.moves = 0
         
         # ゲーム状態の初期化
         self.initialize_game()
@@ -27,6 +46,19 @@ class NumberlinkController:
         self.show_clear_message = False
     
     def update(self):
+        if self.input_log is None:
+            self._update_frame()
+            return
+        # このフレームの pyxel.btnp を記録する（再生中は記録した入力を返す）
+        self.input_log.begin_frame()
+        try:
+            self._update_frame()
+        finally:
+            self.input_log.end_frame()
+    
+    def _update_frame(self):
+        self.play_frames += 1
+        
         # 無効な移動アニメーションの処理
         if self.invalid_move:
             self.invalid_move_timer += 1
@@ -55,6 +87,9 @@ class NumberlinkController:
                 # クリアチェックを行う
                 self.check_clear_when_mode_change()
             
+            # モードの切り替えでストロークを区切る
+            self.journal.end_stroke()
+            
             # モード切替
             self.draw_mode = not self.draw_mode
         
@@ -76,34 +111,99 @@ class NumberlinkController:
         # リセット (RキーまたはXボタン)
         if (pyxel.btnp(pyxel.KEY_R) or 
             pyxel.btnp(pyxel.GAMEPAD1_BUTTON_X)):
-            self.initialize_game()
-            self.board.paths = {}
-            self.board.connected_numbers = {pos: {num} for pos, num in self.board.number_cells.items()}
+            self.reset_board()
+        
+        # 元に戻す (ZキーまたはLボタン) / やり直す (YキーまたはRボタン)
+        if (pyxel.btnp(pyxel.KEY_Z) or
+            pyxel.btnp(pyxel.GAMEPAD1_BUTTON_LEFTSHOULDER)):
+            self.undo()
+        elif (pyxel.btnp(pyxel.KEY_Y) or
+              pyxel.btnp(pyxel.GAMEPAD1_BUTTON_RIGHTSHOULDER)):
+            self.redo()
         
         # クリアチェック (Cキー) - 手動チェック用に残しておく
         if pyxel.btnp(pyxel.KEY_C):
-            # クリア状態をチェック
-            self.is_cleared = self.board.check_win()
+            # クリア状態をチェック（クリアしていたら記録）
+            self.check_clear()
             # クリアしていなくても常にメッセージ表示（デバッグ用）
             self.show_clear_message = True
-            # クリアしていたら記録
-            if self.is_cleared:
-                self.game.app.mark_puzzle_cleared(self.puzzle_id)
         
         # メニューに戻る (MキーまたはYボタン)
         if (pyxel.btnp(pyxel.KEY_M) or 
             pyxel.btnp(pyxel.GAMEPAD1_BUTTON_Y)):
             self.game.return_to_menu()
     
+    def reset_board(self):
+        """すべての線を消す（消した線は1つのストロークとして記録）"""
+        self.replace_edges(())
+        self.initialize_game()
+    
+    def replace_edges(self, edges):
+        """線の配置をまとめて置き換える
+        
+        差分は1つのストロークとして記録し、盤面には一括で適用する。
+        今の呼び出し元はリセットだけ（解答の再生・状態の読み込みを作るときもここを通す）。
+        """
+        current = set(self.board.paths)
+        target = set(edges)
+        removed = current - target
+        added = target - current
+        
+        self.journal.end_stroke()
+        for edge in removed:
+            self.journal.record(self.board.paths.encode_edge(edge), False)
+        for edge in added:
+            self.journal.record(self.board.paths.encode_edge(edge), True)
+        self.journal.end_stroke()
+        
+        self.board.apply_edges(added=added, removed=removed)
+        self.check_clear()
+    
+    def undo(self):
+        """直前のストロークを逆順に取り消す"""
+        stroke = self.journal.pop_undo()
+        if stroke is None:
+            return
+        self.moves += 1
+        for code, added in iter_deltas(stroke, reverse=True):
+            edge = self.board.paths.decode_edge(code)
+            if added:
+                self.board.remove_path(edge)
+            else:
+                self.board.add_path(edge)
+        self.check_clear()
+    
+    def redo(self):
+        """取り消したストロークをもう一度適用する"""
+        stroke = self.journal.pop_redo()
+        if stroke is None:
+            return
+        self.moves += 1
+        for code, added in iter_deltas(stroke):
+            edge = self.board.paths.decode_edge(code)
+            if added:
+                self.board.add_path(edge)
+            else:
+                self.board.remove_path(edge)
+        self.check_clear()
+    
     def check_clear_when_mode_change(self):
         """モード切替時のクリアチェック - クリア時のみメッセージ表示"""
+        self.check_clear()
+    
+    def check_clear(self):
+        """クリアチェック - クリア時のみメッセージ表示"""
+        was_cleared = self.is_cleared
         self.is_cleared = self.board.check_win()
         
         # クリアしている場合のみメッセージを表示
         if self.is_cleared:
             self.show_clear_message = True
-            # クリア済みとして記録
-            self.game.app.mark_puzzle_cleared(self.puzzle_id)
+            # クリアした瞬間だけ記録する（クリアのまま何度チェックしても1回）
+            if not was_cleared:
+                self.game.app.mark_puzzle_cleared(
+                    self.puzzle_id, self.play_frames / self.game.app.FPS, self.moves
+                )
     
     def try_move_cursor(self, dx, dy):
         # グリッド内に収まるように座標を制限
@@ -154,16 +254,9 @@ class NumberlinkController:
             return num1 != num2
             
         # 数字セルと線をつなげようとする場合
-        connected_numbers1 = set()
-        connected_numbers2 = set()
-        
-        # pos1に関連する数字を取得
-        if pos1 in self.board.connected_numbers:
-            connected_numbers1 = self.board.connected_numbers[pos1]
-        
-        # pos2に関連する数字を取得
-        if pos2 in self.board.connected_numbers:
-            connected_numbers2 = self.board.connected_numbers[pos2]
+        # 両端の成分に含まれる数字を取得
+        connected_numbers1 = self.board.get_connected_numbers(pos1)
+        connected_numbers2 = self.board.get_connected_numbers(pos2)
         
         # どちらかが空（まだ何にも接続されていない）場合は接続可能
         if not connected_numbers1 or not connected_numbers2:
@@ -186,11 +279,17 @@ class NumberlinkController:
                 edge = (min(old_pos, new_pos), max(old_pos, new_pos))
                 
                 # 既存の線があれば消す
-                if edge in self.board.paths:
+                added = edge not in self.board.paths
+                if not added:
                     self.board.remove_path(edge)
                 else:
                     # 新しい線を引く
                     self.board.add_path(edge)
+                self.journal.record(self.board.paths.encode_edge(edge), added)
+                self.moves += 1
+                
+                # 線を変更するたびにクリアチェック（カウンタの比較だけなので毎回行える）
+                self.check_clear()
             
             # カーソル位置を更新
             self.cursor_pos = [new_row, new_col]
@@ -216,6 +315,56 @@ class NumberlinkController:
         # クリアメッセージ表示（必要な場合）
         if self.show_clear_message and self.is_cleared:
             self.draw_clear_message()
+        
+        # 描画した状態を記録
+        self.drawn_cursor_state = self.get_cursor_state()
+        self.drawn_status_state = self.get_status_state()
+    
+    def get_cursor_state(self):
+        """カーソルの見た目を決める状態"""
+        return (tuple(self.cursor_pos), self.draw_mode, self.invalid_move,
+                self.invalid_move_timer, self.invalid_move_target)
+    
+    def get_status_state(self):
+        """ステータス欄の見た目を決める状態"""
+        return (self.draw_mode, self.show_clear_message and self.is_cleared)
+    
+    def _get_cursor_cells(self, state):
+        """カーソルが描かれるセル（無効移動アニメーション中は移動先も含む）"""
+        pos, _, invalid_move, _, target = state
+        cells = {pos}
+        if invalid_move and target:
+            cells.add(target)
+        return cells
+    
+    def get_dirty_cells(self):
+        """前回の描画からカーソルが変わった場合に描き直すセル"""
+        state = self.get_cursor_state()
+        if state == self.drawn_cursor_state:
+            return set()
+        
+        cells = self._get_cursor_cells(state)
+        if self.drawn_cursor_state is not None:
+            cells |= self._get_cursor_cells(self.drawn_cursor_state)
+        return cells
+    
+    def draw_dirty(self, board_redrawn):
+        """差分描画モード: カーソルとステータス欄を変化があったときだけ描き直す"""
+        # 盤面を描き直した場合はカーソルが消えている可能性があるので描き直す
+        cursor_state = self.get_cursor_state()
+        if board_redrawn or cursor_state != self.drawn_cursor_state:
+            self.draw_cursor()
+            self.drawn_cursor_state = cursor_state
+        
+        status_state = self.get_status_state()
+        if status_state != self.drawn_status_state:
+            # ステータス欄を背景色で消してから描き直す
+            status_y = self.board.OFFSET_Y + self.board.GRID_ROWS * self.board.CELL_SIZE + 10
+            pyxel.rect(0, status_y, self.game.app.WINDOW_WIDTH, 30, WHITE)
+            self.draw_status()
+            if self.show_clear_message and self.is_cleared:
+                self.draw_clear_message()
+            self.drawn_status_state = status_state
     
     def draw_cursor(self):
         row, col = self.cursor_pos
@@ -291,24 +440,26 @@ class NumberlinkController:
     def draw_status(self):
         # モード表示
         mode_text = "DRAW MODE" if self.draw_mode else "MOVE MODE"
-        text_x = self.game.app.WINDOW_WIDTH // 2 - len(mode_text) * 2
         text_y = self.board.OFFSET_Y + self.board.GRID_ROWS * self.board.CELL_SIZE + 10
         
         mode_color = 8 if self.draw_mode else 12
-        pyxel.text(text_x, text_y, mode_text, mode_color)
-        
-        # 操作方法 (キーボードとゲームパッド)
-        ctrl_text = "SPACE/A: Toggle Mode  R/X: Reset  M/Y: Menu"
-        ctrl_x = self.game.app.WINDOW_WIDTH // 2 - len(ctrl_text) * 2
-        ctrl_y = text_y + 10
-        pyxel.text(ctrl_x, ctrl_y, ctrl_text, GRAY)
         
-        # パズル情報表示 (例: "10x10 No.001")
+        # パズル情報表示 (例: "10x10 No.001") はモードと同じ行に並べる
         size_str, num_str = self._get_puzzle_display_info()
-        puzzle_text = f"{size_str} No.{num_str}"
-        puzzle_x = self.game.app.WINDOW_WIDTH // 2 - len(puzzle_text) * 2
-        puzzle_y = text_y + 20
-        pyxel.text(puzzle_x, puzzle_y, puzzle_text, DARK_GRAY)
+        puzzle_text = f"  {size_str} No.{num_str}"
+        text_x = self.game.app.WINDOW_WIDTH // 2 - (len(mode_text) + len(puzzle_text)) * 2
+        pyxel.text(text_x, text_y, mode_text, mode_color)
+        pyxel.text(text_x + len(mode_text) * 4, text_y, puzzle_text, DARK_GRAY)
+        
+        # 操作方法 (キーボード/ゲームパッド)
+        ctrl_lines = (
+            "SPACE/A: Toggle Mode  R/X: Reset  M/Y: Menu",
+            "Z/L: Undo  Y/R: Redo",
+        )
+        for i, ctrl_text in enumerate(ctrl_lines):
+            ctrl_x = self.game.app.WINDOW_WIDTH // 2 - len(ctrl_text) * 2
+            ctrl_y = text_y + 10 + i * 10
+            pyxel.text(ctrl_x, ctrl_y, ctrl_text, GRAY)
     
     def draw_clear_message(self):
         # ステータスエリアの位置を取得（グリッド領域の下）
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+新しいパズルを自動生成して new_pazzles/ に出力するスクリプト
+
+使い方:
+    python generate_puzzles.py --count 10x10=50 [--count 12x14=10 ...]
+                               [--pairs N] [--workers N] [--seed N] [--max-nodes N] [--out DIR]
+
+動作:
+    1. サイズごとに指定した数のパズルを複数プロセスで生成する
+       (盤面を線で分割 → 線の両端に数字を置く → 解が1つだけのものを採用)
+    2. できたものから順に new_pazzles/ (または --out) に JSON で保存
+    3. サイズごとの候補の採用率と、1コアあたりの生成速度 (問/秒) を表示
+
+出力したパズルは import_new_puzzles.py で puzzles/data/ に取り込む。
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from puzzles.generator import DEFAULT_MAX_NODES, GenerationError, default_pairs, generate_puzzle, validate_size
+
+# パス設定
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+NEW_PUZZLES_DIR = os.path.join(SCRIPT_DIR, "new_pazzles")
+
+
+def parse_count(text):
+    """"10x10=50" を ((10, 10), 50) に変換する"""
+    try:
+        size_text, count_text = text.split("=")
+        rows, cols = (int(v) for v in size_text.lower().split("x"))
+        count = int(count_text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"サイズと数の形式が不正です: {text} (例: 10x10=50)")
+    if rows < 2 or cols < 2 or count < 1:
+        raise argparse.ArgumentTypeError(f"サイズと数が小さすぎます: {text}")
+    return (rows, cols), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=parse_count, action="append", required=True,
+                        help="生成するサイズと数 (例: 10x10=50)。複数指定できる")
+    parser.add_argument("--pairs", type=int, default=None, help="数字の組の数 (省略時はサイズから決める)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="生成に使うプロセス数")
+    parser.add_argument("--seed", type=int, default=None, help="乱数の種 (省略時は現在時刻)")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_MAX_NODES,
+                        help="唯一解の確認にかける探索ノード数の上限")
+    parser.add_argument("--out", default=NEW_PUZZLES_DIR, help="出力フォルダ")
+    args = parser.parse_args()
+
+    # 作れない組み合わせはワーカーを起動する前に止める
+    for (rows, cols), _ in args.count:
+        try:
+            validate_size(rows, cols, args.pairs if args.pairs is not None else default_pairs(rows, cols))
+        except GenerationError as e:
+            parser.error(str(e))
+
+    seed = args.seed if args.seed is not None else int(time.time())
+    print("=== パズル生成スクリプト ===\n")
+    print(f"出力先: {args.out}, {args.workers}プロセス, seed={seed}")
+    os.makedirs(args.out, exist_ok=True)
+
+    # 1問ごとに1タスク。種はサイズと番号から決めるので同じ seed なら同じパズルになる
+    tasks = []
+    for (rows, cols), count in args.count:
+        pairs = args.pairs if args.pairs is not None else default_pairs(rows, cols)
+        print(f"   {rows}x{cols}: {count}問 (数字{pairs}組)")
+        for index in range(count):
+            task_seed = f"{seed}-{rows}x{cols}-{index}"
+            tasks.append((rows, cols, pairs, task_seed, index))
+
+    stats = defaultdict(lambda: defaultdict(float))
+    total = len(tasks)
+    failed = 0
+    start = time.perf_counter()
+
+    print("\n生成中...")
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(generate_puzzle, rows, cols, pairs, task_seed, args.max_nodes): (rows, cols, index)
+            for rows, cols, pairs, task_seed, index in tasks
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            rows, cols, index = futures[future]
+            try:
+                puzzle, tried, multiple, gave_up, elapsed = future.result()
+            except GenerationError as e:
+                failed += 1
+                print(f"   [{done}/{total}] {rows}x{cols} #{index}: {e}")
+                continue
+
+            size_key = f"{rows:02d}x{cols:02d}"
+            filename = f"gen_{size_key}_{seed}_{index:04d}.json"
+            with open(os.path.join(args.out, filename), "w") as f:
+                json.dump(puzzle, f, indent=2)
+
+            size_stats = stats[size_key]
+            size_stats["puzzles"] += 1
+            size_stats["tried"] += tried
+            size_stats["multiple"] += multiple
+            size_stats["gave_up"] += gave_up
+            size_stats["seconds"] += elapsed
+            print(f"   [{done}/{total}] {filename} (候補{tried}個, {elapsed:.1f}秒)")
+
+    wall = time.perf_counter() - start
+    print(f"\n=== 完了 ({total - failed}問, 失敗{failed}問, {wall:.1f}秒) ===")
+    print("サイズ    問題数    候補数  採用率  複数解  上限超え  問/秒/コア")
+    for size_key in sorted(stats):
+        s = stats[size_key]
+        print(
+            f"{size_key:<8}{int(s['puzzles']):>8}{int(s['tried']):>10}"
+            f"{s['puzzles'] / s['tried']:>8.0%}{int(s['multiple']):>8}{int(s['gave_up']):>10}"
+            f"{s['puzzles'] / s['seconds']:>12.2f}"
+        )
+    print(f"全体: {(total - failed) / wall / args.workers:.2f} 問/秒/コア")
+    print(f"\n取り込むには: python import_new_puzzles.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,40 @@
 新しいパズルを整理してdataフォルダに追加するスクリプト
 
 使い方:
-    python import_new_puzzles.py
+    python import_new_puzzles.py [--workers N] [--max-nodes N]
 
 動作:
-    1. new_pazzles/ から全JSONを読み込む
-    2. puzzles/data/ の既存パズルの最大番号を確認
-    3. 新パズルにidを付与し、連番を振り直す
-    4. puzzles/data/ に出力
+    1. puzzles/data/ の既存パズルの最大番号を確認
+    2. new_pazzles/ の全JSONを複数プロセスで読み込み・検証する
+       (形式・数字のペア・解けるか・解が1つだけか)
+       解が1つだけかを --max-nodes ノードで確かめられなかったものも不合格にする
+       終わったものから順に結果を表示
+    3. 回転・反転・数字の振り直しで既存のパズル (または先に取り込むパズル) と
+       同じになるものを除く (puzzles/hash_index.json の正規形ハッシュで判定)
+    4. 残ったパズルにidを付与し、連番を振り直して puzzles/data/ に出力
+    5. 通らなかったパズルは quarantine/ に理由と一緒に移す
+    6. パズル一覧の索引 (puzzles/manifest.json) と puzzles/corpus.bin を作り直す
 """
 
+import argparse
 import os
 import json
+import shutil
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from puzzles.canonical import PuzzleHashIndex, canonical_hash
+from puzzles.generator import DEFAULT_MAX_NODES
+from puzzles.manifest import build_corpus, build_manifest
+from puzzles.puzzle_loader import CORPUS_PATH, MANIFEST_PATH, MAX_COLS, MAX_ROWS
+from puzzles.solver import UNIQUE, MULTIPLE, UNDECIDED, check_uniqueness
 
 # パス設定
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 NEW_PUZZLES_DIR = os.path.join(SCRIPT_DIR, "new_pazzles")
 DATA_DIR = os.path.join(SCRIPT_DIR, "puzzles", "data")
+QUARANTINE_DIR = os.path.join(SCRIPT_DIR, "quarantine")
 
 
 def get_size_key(size):
@@ -61,6 +78,145 @@ def load_new_puzzle(filepath):
     return data
 
 
+def check_schema(puzzle_data):
+    """パズルの形式を確認し、問題があれば理由を返す"""
+    if not isinstance(puzzle_data, dict):
+        return "JSONがオブジェクトではありません"
+    if "size" not in puzzle_data or "numbers" not in puzzle_data:
+        return "size または numbers がありません"
+
+    size = puzzle_data["size"]
+    if isinstance(size, int) and not isinstance(size, bool):
+        size = [size, size]
+    if (
+        not isinstance(size, list) or len(size) != 2
+        # bool は int の一種なので別に除く
+        or not all(isinstance(v, int) and not isinstance(v, bool) and v > 0 for v in size)
+    ):
+        return f"size が不正です: {puzzle_data['size']}"
+    if size[0] > MAX_ROWS or size[1] > MAX_COLS:
+        return f"盤面が大きすぎます: {size[0]}x{size[1]} (ゲームで表示できるのは {MAX_ROWS}x{MAX_COLS} まで)"
+
+    numbers = puzzle_data["numbers"]
+    if not isinstance(numbers, dict) or not numbers:
+        return "numbers が空か不正です"
+    for str_pos, num in numbers.items():
+        parts = str_pos.split(",")
+        # isdigit は "²" なども通して int() で失敗するので isdecimal で確かめる
+        if len(parts) != 2 or not all(part.strip().isdecimal() for part in parts):
+            return f"座標が不正です: {str_pos}"
+        r, c = int(parts[0]), int(parts[1])
+        if r >= size[0] or c >= size[1]:
+            return f"座標が盤面の外です: {str_pos}"
+        if not isinstance(num, int) or isinstance(num, bool) or num <= 0:
+            return f"数字が不正です: {str_pos} = {num}"
+    return None
+
+
+def check_endpoint_pairs(numbers):
+    """各数字がちょうど2か所にあるか確認し、問題があれば理由を返す"""
+    counts = defaultdict(int)
+    for num in numbers.values():
+        counts[num] += 1
+    unpaired = sorted(num for num, count in counts.items() if count != 2)
+    if unpaired:
+        return f"2か所にない数字があります: {unpaired}"
+    return None
+
+
+def validate_puzzle(filepath, max_nodes=DEFAULT_MAX_NODES):
+    """パズルファイルを読み込んで検証する（ワーカープロセスで実行）
+
+    解が1つだけかは max_nodes ノードまで探索して確かめる。
+
+    戻り値: (ファイル名, パズルデータ, 不合格の理由。合格なら None)
+    """
+    filename = os.path.basename(filepath)
+    try:
+        puzzle_data = load_new_puzzle(filepath)
+    except (OSError, ValueError) as e:
+        return filename, None, f"読み込みに失敗: {e}"
+
+    reason = check_schema(puzzle_data)
+    if reason is None:
+        reason = check_endpoint_pairs(puzzle_data["numbers"])
+    if reason is None:
+        result = check_uniqueness(puzzle_data, max_nodes)
+        if result == MULTIPLE:
+            reason = "解が複数あります"
+        elif result == UNDECIDED:
+            reason = "解の確認が上限に達しました"
+        elif result != UNIQUE:
+            reason = "解がありません"
+    return filename, puzzle_data, reason
+
+
+def validate_all(filepaths, workers, max_nodes=DEFAULT_MAX_NODES):
+    """全ファイルを複数プロセスで検証し、終わったものから結果を表示する
+
+    戻り値: (合格したパズルのリスト, 不合格の (ファイル名, 理由) のリスト)
+    """
+    passed = []
+    failed = []
+    total = len(filepaths)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(validate_puzzle, filepath, max_nodes) for filepath in filepaths]
+        for done, future in enumerate(as_completed(futures), 1):
+            filename, puzzle_data, reason = future.result()
+            if reason is None:
+                passed.append({"filename": filename, "data": puzzle_data})
+                print(f"   [{done}/{total}] {filename}: OK")
+            else:
+                failed.append((filename, reason))
+                print(f"   [{done}/{total}] {filename}: 不合格 ({reason})")
+
+    # 連番は終わった順ではなく元のファイル名順に振る
+    passed.sort(key=lambda puzzle_info: puzzle_info["filename"])
+    failed.sort()
+    return passed, failed
+
+
+def remove_duplicates(passed, index):
+    """索引にあるパズルや、先に並んでいるパズルと同じものを除く
+
+    戻り値: (残ったパズルのリスト, 除いた (ファイル名, 理由) のリスト)
+    """
+    unique = []
+    duplicates = []
+    seen = {}
+    for puzzle_info in passed:
+        puzzle_hash = canonical_hash(puzzle_info["data"])
+        existing_id = index.find(puzzle_hash)
+        if existing_id is not None:
+            duplicates.append((puzzle_info["filename"], f"既存のパズル {existing_id} と同じです"))
+        elif puzzle_hash in seen:
+            duplicates.append((puzzle_info["filename"], f"{seen[puzzle_hash]} と同じです"))
+        else:
+            seen[puzzle_hash] = puzzle_info["filename"]
+            puzzle_info["hash"] = puzzle_hash
+            unique.append(puzzle_info)
+    return unique, duplicates
+
+
+def quarantine_puzzles(failed):
+    """不合格のパズルを quarantine/ に移し、理由を reasons.json に記録する"""
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    reasons_path = os.path.join(QUARANTINE_DIR, "reasons.json")
+
+    reasons = {}
+    if os.path.exists(reasons_path):
+        with open(reasons_path, "r") as f:
+            reasons = json.load(f)
+
+    for filename, reason in failed:
+        shutil.move(os.path.join(NEW_PUZZLES_DIR, filename), os.path.join(QUARANTINE_DIR, filename))
+        reasons[filename] = reason
+
+    with open(reasons_path, "w") as f:
+        json.dump(reasons, f, indent=2, ensure_ascii=False)
+
+
 def convert_puzzle(puzzle_data, new_id):
     """パズルを新フォーマットに変換"""
     size = puzzle_data["size"]
@@ -81,6 +237,12 @@ def save_puzzle(puzzle_data, filepath):
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="検証に使うプロセス数")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_MAX_NODES,
+                        help="1問の唯一解の確認に使う探索ノード数の上限")
+    args = parser.parse_args()
+
     print("=== パズルインポートスクリプト ===\n")
     
     # 1. 既存パズルの最大番号を取得
@@ -89,36 +251,42 @@ def main():
     for size_key, max_num in sorted(max_numbers.items()):
         print(f"   {size_key}: 最大番号 {max_num:03d}")
     
-    # 2. 新パズルの読み込み
-    print(f"\n2. 新パズルの読み込み ({NEW_PUZZLES_DIR})...")
+    # 2. 新パズルの読み込みと検証
+    print(f"\n2. 新パズルの読み込みと検証 ({NEW_PUZZLES_DIR}, {args.workers}プロセス)...")
     
     if not os.path.exists(NEW_PUZZLES_DIR):
         print(f"   エラー: {NEW_PUZZLES_DIR} が見つかりません")
         return
     
+    filepaths = [
+        os.path.join(NEW_PUZZLES_DIR, filename)
+        for filename in sorted(os.listdir(NEW_PUZZLES_DIR))
+        if filename.endswith(".json")
+    ]
+    start = time.perf_counter()
+    passed, failed = validate_all(filepaths, args.workers, args.max_nodes)
+    elapsed = time.perf_counter() - start
+    if filepaths:
+        print(f"   {len(filepaths)}個を{elapsed:.1f}秒で検証 ({len(filepaths) / elapsed:.1f}個/秒)")
+    
+    # 3. 重複の除去
+    print(f"\n3. 重複の確認...")
+    index = PuzzleHashIndex.load(DATA_DIR)
+    passed, duplicates = remove_duplicates(passed, index)
+    print(f"   既存 {len(index.puzzle_ids)}個と比較: 重複 {len(duplicates)}個")
+    failed = sorted(failed + duplicates)
+    
     # サイズごとにパズルを分類
     new_puzzles_by_size = defaultdict(list)
-    
-    for filename in sorted(os.listdir(NEW_PUZZLES_DIR)):
-        if not filename.endswith(".json"):
-            continue
-        
-        filepath = os.path.join(NEW_PUZZLES_DIR, filename)
-        try:
-            puzzle_data = load_new_puzzle(filepath)
-            size_key = get_size_key(puzzle_data["size"])
-            new_puzzles_by_size[size_key].append({
-                "filename": filename,
-                "data": puzzle_data
-            })
-        except Exception as e:
-            print(f"   警告: {filename} の読み込みに失敗: {e}")
+    for puzzle_info in passed:
+        size_key = get_size_key(puzzle_info["data"]["size"])
+        new_puzzles_by_size[size_key].append(puzzle_info)
     
     for size_key, puzzles in sorted(new_puzzles_by_size.items()):
         print(f"   {size_key}: {len(puzzles)}個")
     
-    # 3. 変換と保存
-    print(f"\n3. 変換と保存 ({DATA_DIR})...")
+    # 4. 変換と保存
+    print(f"\n4. 変換と保存 ({DATA_DIR})...")
     
     os.makedirs(DATA_DIR, exist_ok=True)
     
@@ -136,15 +304,31 @@ def main():
             output_path = os.path.join(DATA_DIR, new_filename)
             
             save_puzzle(converted, output_path)
+            index.add(puzzle_info["hash"], new_id)
             print(f"   {puzzle_info['filename']} -> {new_filename}")
             total_saved += 1
         
         # 更新後の最大番号を記録
         max_numbers[size_key] = current_num
+    index.save()
+    
+    # 5. 不合格のパズルを隔離
+    if failed:
+        print(f"\n5. 不合格のパズルを隔離 ({QUARANTINE_DIR})...")
+        quarantine_puzzles(failed)
+        for filename, reason in failed:
+            print(f"   {filename}: {reason}")
+    
+    # 6. 一覧の索引を更新
+    if total_saved:
+        print(f"\n6. 一覧の索引と corpus.bin を更新...")
+        build_manifest(DATA_DIR, MANIFEST_PATH)
+        build_corpus(DATA_DIR, MANIFEST_PATH, CORPUS_PATH)
     
-    # 4. サマリー
+    # 7. サマリー
     print(f"\n=== 完了 ===")
     print(f"追加されたパズル: {total_saved}個")
+    print(f"隔離されたパズル: {len(failed)}個")
     print(f"\n最終的なパズル数:")
     for size_key, max_num in sorted(max_numbers.items()):
         print(f"   {size_key}: {max_num:03d}個")
@@ -0,0 +1,159 @@
+import json
+import os
+import time
+
+import pyxel
+
+LOG_VERSION = 1
+
+# 記録するキー・ボタン（NumberlinkController.handle_input が pyxel.btnp で読むもの）
+# ログにはキーの値ではなく名前を書く（pyxel のバージョンやヘッドレス版で値が変わっても再生できる）
+CONTROLLER_KEYS = (
+    "KEY_RETURN", "KEY_SPACE", "KEY_UP", "KEY_DOWN", "KEY_LEFT", "KEY_RIGHT",
+    "KEY_R", "KEY_Z", "KEY_Y", "KEY_C", "KEY_M",
+    "GAMEPAD1_BUTTON_A", "GAMEPAD1_BUTTON_B", "GAMEPAD1_BUTTON_X", "GAMEPAD1_BUTTON_Y",
+    "GAMEPAD1_BUTTON_LEFTSHOULDER", "GAMEPAD1_BUTTON_RIGHTSHOULDER",
+    "GAMEPAD1_BUTTON_DPAD_UP", "GAMEPAD1_BUTTON_DPAD_DOWN",
+    "GAMEPAD1_BUTTON_DPAD_LEFT", "GAMEPAD1_BUTTON_DPAD_RIGHT",
+)
+
+
+def _key_names():
+    """キーの値 -> 名前"""
+    return {getattr(pyxel, name): name for name in CONTROLLER_KEYS}
+
+
+def board_result(controller):
+    """再生結果の比較に使う、セッション終了時の状態"""
+    horizontal, vertical = controller.board.snapshot()
+    return {
+        "moves": controller.moves,
+        "cleared": controller.is_cleared,
+        "edges": [horizontal, vertical],
+    }
+
+
+class _BtnpHook:
+    """pyxel.btnp を差し替え、コントローラーの1フレーム (begin_frame〜end_frame) の間だけ横取りする
+
+    フレームの外（アプリ全体の ESC・F1 など）では元の btnp をそのまま呼ぶ。
+    """
+
+    def __init__(self):
+        self.frame = 0
+        self.active = False
+        self._original = None
+
+    def install(self):
+        if self._original is not None:
+            return
+        self._original = pyxel.btnp
+        pyxel.btnp = self._btnp
+
+    def uninstall(self):
+        if self._original is not None:
+            pyxel.btnp = self._original
+            self._original = None
+
+    def begin_frame(self):
+        self.active = True
+
+    def end_frame(self):
+        self.active = False
+        self.frame += 1
+
+    def _btnp(self, key, *args, **kwargs):
+        # hold・repeat は呼び出し側の書き方のまま渡す
+        if not self.active:
+            return self._original(key, *args, **kwargs)
+        return self._frame_btnp(key, *args, **kwargs)
+
+
+class InputRecorder(_BtnpHook):
+    """コントローラーが pyxel.btnp で読んだ入力をフレームごとに記録する
+
+    btnp の結果（長押しの繰り返しを含めて True になったキー）をそのまま残すので、
+    再生するとキーの押し方やフレームレートによらず同じ操作になる。
+    """
+
+    def __init__(self, puzzle_id):
+        super().__init__()
+        self.puzzle_id = puzzle_id
+        self.key_names = _key_names()
+        # フレーム番号 -> そのフレームで btnp が True になったキーの名前
+        self.pressed = {}
+
+    def _frame_btnp(self, key, *args, **kwargs):
+        result = self._original(key, *args, **kwargs)
+        name = self.key_names.get(key)
+        if result and name is not None:
+            keys = self.pressed.setdefault(self.frame, [])
+            if name not in keys:
+                keys.append(name)
+        return result
+
+    def save(self, directory, result):
+        """記録をファイルに書き出してパスを返す（書き込めなければ None）
+
+        1行目に見出し、続けて入力のあったフレームを1行ずつ、最後にフレーム数と終了時の状態を書く。
+        """
+        filename = f"{self.puzzle_id}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        path = os.path.join(directory, filename)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path, "w") as f:
+                f.write(json.dumps({"version": LOG_VERSION, "puzzle_id": self.puzzle_id}) + "\n")
+                for frame in sorted(self.pressed):
+                    f.write(json.dumps({"frame": frame, "keys": self.pressed[frame]}) + "\n")
+                f.write(json.dumps({"end": self.frame, "result": result}) + "\n")
+        except OSError:
+            return None
+        return path
+
+
+class InputLog:
+    """記録ファイルの中身"""
+
+    def __init__(self, puzzle_id, pressed, frames, result):
+        self.puzzle_id = puzzle_id
+        self.pressed = pressed
+        self.frames = frames
+        self.result = result
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        header = lines[0]
+        if header.get("version") != LOG_VERSION:
+            raise ValueError(f"unsupported input log version: {header.get('version')}")
+        pressed = {}
+        frames = None
+        result = None
+        for line in lines[1:]:
+            if "end" in line:
+                frames = line["end"]
+                result = line["result"]
+            else:
+                pressed[line["frame"]] = line["keys"]
+        if frames is None:
+            # 終了行がない（記録中に止まった）ときは最後の入力までを再生する
+            frames = max(pressed, default=-1) + 1
+        return cls(header["puzzle_id"], pressed, frames, result)
+
+
+class InputPlayer(_BtnpHook):
+    """記録した入力をコントローラーに返す（実際のキー入力は見ない）"""
+
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        self.key_names = _key_names()
+
+    @property
+    def finished(self):
+        return self.frame >= self.log.frames
+
+    def _frame_btnp(self, key, *args, **kwargs):
+        name = self.key_names.get(key)
+        return name is not None and name in self.log.pressed.get(self.frame, ())
@@ -0,0 +1,78 @@
+from array import array
+from collections import deque
+
+
+class EditJournal:
+    """線の編集をストローク単位の差分で記録し、元に戻す／やり直すための履歴
+
+    差分は EdgeBitmap.encode_edge() の値 + 1 を、追加なら正・削除なら負の整数で持つ。
+    記録できるストローク数は max_strokes までで、超えた分は古いものから捨てる。
+    ストローク内で同じ線の追加と削除は打ち消し合うので、1つのストロークの差分は
+    盤面の線の数を超えない（使うメモリは max_strokes × 線の数で頭打ちになる）。
+    """
+
+    def __init__(self, max_strokes=200):
+        self.max_strokes = max_strokes
+        self._undo_stack = deque(maxlen=max_strokes)
+        self._redo_stack = []
+        # 記録中のストローク
+        self._current = None
+
+    def record(self, edge_code, added):
+        """1本の線の追加・削除を現在のストロークに記録する"""
+        if self._current is None:
+            self._current = array("i")
+        delta = edge_code + 1 if added else -(edge_code + 1)
+        # 同じ線の逆の編集が記録済みなら、ストローク全体の結果は変わらないので両方消す
+        # （線ごとの差分は互いに独立なので、残りの順番はそのままでよい）
+        try:
+            index = self._current.index(-delta)
+        except ValueError:
+            self._current.append(delta)
+        else:
+            del self._current[index]
+        # 新しい編集をしたらやり直しの履歴は無効になる
+        self._redo_stack.clear()
+
+    def end_stroke(self):
+        """記録中のストロークを確定する（打ち消し合って空になったものは履歴に残さない）"""
+        if self._current:
+            self._undo_stack.append(self._current)
+        self._current = None
+
+    def can_undo(self):
+        return bool(self._current) or bool(self._undo_stack)
+
+    def can_redo(self):
+        return bool(self._redo_stack)
+
+    def pop_undo(self):
+        """元に戻すストロークを取り出す（なければ None）"""
+        self.end_stroke()
+        if not self._undo_stack:
+            return None
+        stroke = self._undo_stack.pop()
+        self._redo_stack.append(stroke)
+        return stroke
+
+    def pop_redo(self):
+        """やり直すストロークを取り出す（なければ None）"""
+        self.end_stroke()
+        if not self._redo_stack:
+            return None
+        stroke = self._redo_stack.pop()
+        self._undo_stack.append(stroke)
+        return stroke
+
+    def clear(self):
+        """履歴をすべて消す"""
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._current = None
+
+
+def iter_deltas(stroke, reverse=False):
+    """ストロークの差分を (エッジ番号, 追加かどうか) として返す"""
+    deltas = reversed(stroke) if reverse else stroke
+    for delta in deltas:
+        yield abs(delta) - 1, delta > 0
@@ -1,4 +1,8 @@
+import os
 import pyxel
+from progress import ProgressStore
+from input_log import InputRecorder, board_result
+from utils.draw_counter import DrawCallCounter
 from menu import MenuScreen
 from game import NumberlinkGame
 
@@ -10,15 +14,27 @@ class NumberlinkApp:
         # UI領域の高さも考慮
         self.WINDOW_WIDTH = 240  # 160px + 左右40px余白
         self.WINDOW_HEIGHT = 240  # 160px + 上下40px余白 + UI領域40px
+        self.FPS = 60
         
         # 音楽再生状態を管理するフラグ
         self.music_enabled = True
         
-        # クリア済みパズルのセット（ゲーム起動中のみ保持）
-        self.cleared_puzzles = set()
+        # デバッグ情報（フレームごとの処理コスト）の表示フラグ
+        self.show_debug = False
+        # デバッグ表示中だけ描画命令の呼び出し回数を数える
+        self.draw_counter = DrawCallCounter()
+        
+        # 差分描画モード（画面の変化した部分だけを描き直す）
+        self.dirty_redraw = True
+        # 次のフレームで画面全体を描き直すかどうか
+        self.full_redraw_pending = True
+        
+        # 入力の記録モード（オンにすると次に始めたパズルの操作をファイルに保存する）
+        self.record_input = False
+        self.recorder = None
         
         # Pyxelの初期化（マウス操作を有効化）
-        pyxel.init(self.WINDOW_WIDTH, self.WINDOW_HEIGHT, title="Numberlink", fps=60)
+        pyxel.init(self.WINDOW_WIDTH, self.WINDOW_HEIGHT, title="Numberlink", fps=self.FPS)
         
         # リソースファイルの読み込み
         pyxel.load("music_numberlink.pyxres")
@@ -26,6 +42,10 @@ class NumberlinkApp:
         # BGM再生開始
         self.play_music()
         
+        # クリアの記録（pyxel.init のあとにフォルダを決める。ファイルに保存し、次回起動時も残る）
+        self.progress = ProgressStore(self.get_progress_dir())
+        self.progress.load()
+        
         # メニュー画面の作成
         self.menu_screen = MenuScreen(self)
         
@@ -51,6 +71,12 @@ class NumberlinkApp:
             self.play_music()
         else:
             self.stop_music()
+        # ボタンの表示を更新するため画面全体を描き直す
+        self.request_full_redraw()
+    
+    def request_full_redraw(self):
+        """次のフレームで画面全体を描き直す"""
+        self.full_redraw_pending = True
     
     def draw_music_button(self):
         """BGMオン/オフボタンを描画する"""
@@ -78,28 +104,83 @@ class NumberlinkApp:
         return (self.btn_x <= pyxel.mouse_x <= self.btn_x + self.btn_width and 
                 self.btn_y <= pyxel.mouse_y <= self.btn_y + self.btn_height)
     
-    def mark_puzzle_cleared(self, puzzle_id):
-        """パズルをクリア済みとしてマーク"""
-        self.cleared_puzzles.add(puzzle_id)
+    def get_progress_dir(self):
+        """クリアの記録を保存するフォルダ（Pyxelのユーザーデータフォルダが使えなければ src/save）"""
+        user_data_dir = getattr(pyxel, "user_data_dir", None)
+        if user_data_dir is not None:
+            try:
+                return user_data_dir("ku-ron", "numberlink")
+            except Exception as e:
+                print(f"user_data_dir is not available: {e}")
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), "save")
+    
+    def mark_puzzle_cleared(self, puzzle_id, time, moves):
+        """パズルをクリア済みとして記録（クリア時間[秒]と手数も残す）"""
+        self.progress.record_clear(puzzle_id, time, moves)
+        # 未クリアのみの絞り込みに反映する
+        self.menu_screen.on_puzzle_cleared(puzzle_id)
     
     def is_puzzle_cleared(self, puzzle_id):
         """パズルがクリア済みかどうか確認"""
-        return puzzle_id in self.cleared_puzzles
+        return self.progress.is_cleared(puzzle_id)
+    
+    def get_puzzle_progress(self, puzzle_id):
+        """パズルの記録 (clears, best_time, best_moves) を返す（未クリアなら None）"""
+        return self.progress.get(puzzle_id)
     
     def start_game(self, puzzle_id):
         """指定されたパズルでゲームを開始する"""
-        self.current_screen = NumberlinkGame(self, puzzle_id)
+        # 再生したときに同じ結果になるよう、記録はパズルの開始から始める
+        if self.record_input:
+            self.recorder = InputRecorder(puzzle_id)
+            self.recorder.install()
+        self.current_screen = NumberlinkGame(self, puzzle_id, self.recorder)
+        self.request_full_redraw()
+    
+    def finish_recording(self):
+        """記録中の入力を保存フォルダの recordings/ に書き出す"""
+        if self.recorder is None:
+            return
+        self.recorder.uninstall()
+        directory = os.path.join(self.get_progress_dir(), "recordings")
+        path = self.recorder.save(directory, board_result(self.current_screen.controller))
+        if path is not None:
+            print(f"input recorded: {path}")
+        self.recorder = None
     
     def return_to_menu(self):
         """メニュー画面に戻る"""
+        self.finish_recording()
         self.current_screen = self.menu_screen
+        self.request_full_redraw()
     
     def update(self):
         """ゲームの更新処理"""
         # ESCキーでゲーム終了
         if pyxel.btnp(pyxel.KEY_ESCAPE):
+            self.finish_recording()
             pyxel.quit()
         
+        # F1キーでデバッグ情報の表示を切り替え
+        if pyxel.btnp(pyxel.KEY_F1):
+            self.show_debug = not self.show_debug
+            if self.show_debug:
+                self.draw_counter.install()
+            else:
+                self.draw_counter.uninstall()
+            self.request_full_redraw()
+        
+        # F2キーで差分描画モードの切り替え（毎フレーム全体を描き直す方式と比較用）
+        if pyxel.btnp(pyxel.KEY_F2):
+            self.dirty_redraw = not self.dirty_redraw
+            self.request_full_redraw()
+        
+        # F3キーで入力の記録モードの切り替え（オフにしたら記録中の操作を保存する）
+        if pyxel.btnp(pyxel.KEY_F3):
+            self.record_input = not self.record_input
+            if not self.record_input:
+                self.finish_recording()
+        
         # Bキーで音楽のオン/オフを切り替え
         if pyxel.btnp(pyxel.KEY_B) or pyxel.btnp(pyxel.GAMEPAD1_BUTTON_X):
             self.toggle_music()
@@ -116,14 +197,41 @@ class NumberlinkApp:
     
     def draw(self):
         """ゲームの描画処理"""
-        # 画面をクリア
-        pyxel.cls(7)  # 背景色（薄い灰色）
-        
-        # 現在の画面の描画処理を呼び出す
-        self.current_screen.draw()
-        
-        # BGMオン/オフボタンの描画
-        self.draw_music_button()
+        # 前のフレームの描画命令の回数を確定
+        if self.show_debug:
+            self.draw_counter.end_frame()
+        
+        # 差分描画に対応した画面では、変化した部分だけを描き直す
+        draw_dirty = getattr(self.current_screen, "draw_dirty", None)
+        if self.dirty_redraw and draw_dirty is not None and not self.full_redraw_pending:
+            draw_dirty()
+        else:
+            # 画面をクリア
+            pyxel.cls(7)  # 背景色（薄い灰色）
+            
+            # 現在の画面の描画処理を呼び出す
+            self.current_screen.draw()
+            
+            # BGMオン/オフボタンの描画
+            self.draw_music_button()
+            self.full_redraw_pending = False
+        
+        # デバッグ情報の描画
+        if self.show_debug:
+            self.draw_debug_info()
+    
+    def draw_debug_info(self):
+        """フレームごとの処理コストを左上に表示する"""
+        lines = [f"DRAW CALLS: {self.draw_counter.last_frame_count}"]
+        if self.record_input:
+            lines.append("REC: " + ("ON" if self.recorder is not None else "NEXT PUZZLE"))
+        get_debug_info = getattr(self.current_screen, "get_debug_info", None)
+        if get_debug_info is not None:
+            lines += get_debug_info()
+        # 差分描画モードでは前のフレームの表示が残るので背景で消してから描く
+        pyxel.rect(0, 0, 100, len(lines) * 6 + 1, 7)
+        for i, line in enumerate(lines):
+            pyxel.text(2, 2 + i * 6, line, 0)
 
 # メインエントリーポイント
 if __name__ == "__main__":
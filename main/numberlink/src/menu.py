@@ -1,25 +1,58 @@
+from bisect import bisect_left, bisect_right
+
 import pyxel
-from puzzles.puzzle_loader import get_puzzle_list
+from menu_index import DIFFICULTY_BANDS, MenuIndex
+from progress import format_time
+from thumbnails import THUMBNAIL_SIZE, ThumbnailAtlas
+from puzzles.puzzle_loader import get_loaded_groups, loading_progress, start_loading, update_loading
 
 # 色定数
 COLOR_CLEARED = 11  # 緑色（クリア済み）
 COLOR_NORMAL = 5    # 紫色（未クリア）
 COLOR_SELECTED = 8  # 赤色（選択中）
 
+# 番号ジャンプに使う数字キー
+DIGIT_KEYS = (
+    pyxel.KEY_0, pyxel.KEY_1, pyxel.KEY_2, pyxel.KEY_3, pyxel.KEY_4,
+    pyxel.KEY_5, pyxel.KEY_6, pyxel.KEY_7, pyxel.KEY_8, pyxel.KEY_9,
+)
+# 数字の入力がこのフレーム数途切れたら、次の数字から新しい番号として入力する
+SEARCH_TIMEOUT = 60
+
 class MenuScreen:
     def __init__(self, app):
         self.app = app
-        self.puzzles = get_puzzle_list()
         
-        # パズルをサイズごとにグループ化
-        self.puzzle_groups = self._group_puzzles_by_size()
+        # パズル一覧は裏で読み込み、読み込めたグループから表示する
+        # （グループはローダーが作ったものを共有する）
+        start_loading()
+        self.source_groups = get_loaded_groups()
+        self.loading_done = False
+        
+        # 絞り込み・番号ジャンプ用の索引（届いたグループの増えた分だけ追加する）
+        self.index = MenuIndex(app.is_puzzle_cleared)
+        self.index.update_groups(self.source_groups)
+        
+        # 絞り込みの条件
+        self.uncleared_only = False  # 未クリアのみ
+        self.size_filter = None      # サイズキー（None はすべて）
+        self.band_filter = None      # DIFFICULTY_BANDS の番号（None はすべて）
+        self.filter_text = ""        # 条件の表示（条件を変えたときに作る）
+        
+        # 番号ジャンプで入力中の番号と、最後に数字を入力したフレーム
+        self.search_text = ""
+        self.search_frame = 0
+        
+        # 表示するグループ（絞り込み後。_apply_filter で作る）
+        self.puzzle_groups = ()
+        self.last_selected_position = None
         
         # グループとグループ内の位置を追跡するための変数
         self.selected_group_index = 0  # 現在選択されているグループのインデックス
         self.selected_item_index = 0   # 現在選択されているグループ内のアイテムのインデックス
         
         # 表示設定
-        self.items_per_row = 10  # 1行あたりの問題数
+        self.items_per_row = 8   # 1行あたりの問題数（右側はサムネイル欄）
         self.item_width = 22     # 各問題表示の幅
         self.item_height = 10    # 各問題表示の高さ
         self.group_spacing = 16  # グループ間の縦方向の間隔
@@ -33,62 +66,105 @@ class MenuScreen:
         self.visible_area_bottom = app.WINDOW_HEIGHT - 40  # 表示領域の下端（説明欄の上）
         self.scroll_margin = 10  # スクロール時の余白
         
-        # 各グループ・行のY座標を事前計算
-        self._calculate_layout()
-    
-    def _get_size_key(self, puzzle):
-        """パズルからサイズキーを取得"""
-        size = puzzle["size"]
-        return f"{size[0]:02d}x{size[1]:02d}"
-    
-    def _get_size_label(self, puzzle):
-        """パズルからサイズラベルを取得（表示用）"""
-        size = puzzle["size"]
-        return f"{size[0]}x{size[1]}"
-    
-    def _group_puzzles_by_size(self):
-        """パズルをサイズごとにグループ化する"""
-        groups = {}
-        for puzzle in self.puzzles:
-            size_key = self._get_size_key(puzzle)
-            if size_key not in groups:
-                groups[size_key] = {
-                    'size_label': self._get_size_label(puzzle),
-                    'puzzles': []
-                }
-            groups[size_key]['puzzles'].append(puzzle)
-        
-        # サイズ順に並べ替えたグループのリストを返す
-        sorted_groups = []
-        for size_key in sorted(groups.keys()):
-            sorted_groups.append(groups[size_key])
-        
-        return sorted_groups
+        # サムネイル欄（選択中の問題と前後の問題の縮小図）
+        self.thumbnails = ThumbnailAtlas()
+        self.preview_x = app.WINDOW_WIDTH - THUMBNAIL_SIZE - 6
+        self.preview_spacing = THUMBNAIL_SIZE + 12  # 縮小図の下に番号を表示する
+        
+        # 表示するグループと、各グループ・行のY座標を事前計算
+        self._apply_filter()
     
     def _calculate_layout(self):
-        """各グループと行のY座標を事前計算"""
+        """各グループと行のY座標を事前計算
+        
+        グループの中身（問題・表示文字列）は索引が条件ごとにキャッシュしているので、
+        ここではグループ数に比例した計算しかしない。
+        """
         self.group_layouts = []
+        self.group_label_ys = []  # 表示範囲のグループを二分探索するためのラベルY座標
         y_pos = 0  # スクロール座標系での位置（0から開始）
         
         for group in self.puzzle_groups:
+            puzzles = group['puzzles']
+            num_rows = (len(puzzles) + self.items_per_row - 1) // self.items_per_row
             group_layout = {
                 'label_y': y_pos,
-                'rows': []
+                'rows_y': y_pos + 8,  # 1行目のY座標（ラベルの高さの下）
+                'num_rows': num_rows,
+                'labels': group['labels'],
             }
-            y_pos += 8  # ラベルの高さ
-            
-            puzzles = group['puzzles']
-            num_rows = (len(puzzles) + self.items_per_row - 1) // self.items_per_row
-            
-            for row in range(num_rows):
-                group_layout['rows'].append(y_pos)
-                y_pos += self.row_spacing
-            
+            y_pos += 8 + num_rows * self.row_spacing
             y_pos += self.group_spacing - self.row_spacing  # グループ間の追加スペース
             self.group_layouts.append(group_layout)
+            self.group_label_ys.append(group_layout['label_y'])
         
         self.total_content_height = y_pos
     
+    def _apply_filter(self):
+        """絞り込みの条件で表示するグループを作り直す（選択中の問題はできるだけそのまま）"""
+        # 条件に合う問題がなかったときは、その前に選んでいた問題を基準にする
+        selected = self._get_selected_position() or self.last_selected_position
+        self.last_selected_position = selected
+        self.puzzle_groups = self.index.filter(self.uncleared_only, self.size_filter, self.band_filter)
+        self._calculate_layout()
+        
+        if selected is not None:
+            self._select_position(*selected)
+        else:
+            self.selected_group_index = 0
+            self.selected_item_index = 0
+        self._adjust_scroll()
+        
+        conditions = []
+        if self.uncleared_only:
+            conditions.append("UNCLEARED")
+        if self.size_filter is not None:
+            conditions.append(self.index.groups[self.size_filter].source['size_label'])
+        if self.band_filter is not None:
+            conditions.append(DIFFICULTY_BANDS[self.band_filter][0])
+        self.filter_text = "FILTER: " + " ".join(conditions) if conditions else ""
+    
+    def _get_selected_position(self):
+        """選択中の問題の (サイズキー, 元のグループ内の位置) を返す（何も表示していなければ None）"""
+        if not self.puzzle_groups:
+            return None
+        group = self.puzzle_groups[self.selected_group_index]
+        return group['size_key'], group['indices'][self.selected_item_index]
+    
+    def _select_position(self, size_key, index):
+        """元のグループ内の位置で問題を選ぶ（表示されていなければその次に表示されている問題）"""
+        if not self.puzzle_groups:
+            self.selected_group_index = 0
+            self.selected_item_index = 0
+            return
+        
+        for group_idx, group in enumerate(self.puzzle_groups):
+            if group['size_key'] >= size_key:
+                break
+        else:
+            # より後ろのサイズがなければ最後のグループの最後の問題
+            self.selected_group_index = len(self.puzzle_groups) - 1
+            self.selected_item_index = len(self.puzzle_groups[-1]['puzzles']) - 1
+            return
+        
+        self.selected_group_index = group_idx
+        if group['size_key'] == size_key:
+            # 表示中の位置の中から二分探索（末尾を超えたら最後の問題）
+            self.selected_item_index = min(bisect_left(group['indices'], index), len(group['indices']) - 1)
+        else:
+            self.selected_item_index = 0
+    
+    def _jump_to_number(self, number):
+        """選択中のサイズで番号が number 以上の最初の問題に移動する"""
+        size_key = self.puzzle_groups[self.selected_group_index]['size_key']
+        self._select_position(size_key, self.index.find_number(size_key, number))
+    
+    def on_puzzle_cleared(self, puzzle_id):
+        """パズルをクリアしたときに呼ばれる（未クリアのみの表示なら作り直す）"""
+        self.index.mark_cleared(puzzle_id)
+        if self.uncleared_only:
+            self._apply_filter()
+    
     def _get_selected_y(self):
         """現在選択中のアイテムのY座標を取得"""
         if self.selected_group_index >= len(self.group_layouts):
@@ -97,8 +173,8 @@ class MenuScreen:
         group_layout = self.group_layouts[self.selected_group_index]
         current_row = self.selected_item_index // self.items_per_row
         
-        if current_row < len(group_layout['rows']):
-            return group_layout['rows'][current_row]
+        if current_row < group_layout['num_rows']:
+            return group_layout['rows_y'] + current_row * self.row_spacing
         return 0
     
     def _get_selected_group_label_y(self):
@@ -200,7 +276,49 @@ class MenuScreen:
             
             self.selected_item_index = new_index
     
+    def _update_loading(self):
+        """読み込みを進め、新しく届いたグループがあればレイアウトを計算し直す"""
+        if self.loading_done:
+            return
+        self.loading_done = update_loading()
+        groups = get_loaded_groups()
+        if groups is not self.source_groups:
+            # グループは後ろに増えるだけなので、増えた分だけ索引に加えて絞り込み直す
+            self.source_groups = groups
+            self.index.update_groups(groups)
+            self._apply_filter()
+    
+    def _handle_filter_input(self):
+        """絞り込みの切り替え（U: 未クリアのみ, S: サイズ, D: 難易度）と番号ジャンプ（数字キー）"""
+        changed = False
+        if pyxel.btnp(pyxel.KEY_U):
+            self.uncleared_only = not self.uncleared_only
+            changed = True
+        if pyxel.btnp(pyxel.KEY_S):
+            # すべて → 各サイズ → すべて の順に切り替える
+            self.size_filter = _next_option(self.index.size_keys, self.size_filter)
+            changed = True
+        if pyxel.btnp(pyxel.KEY_D):
+            self.band_filter = _next_option(range(len(DIFFICULTY_BANDS)), self.band_filter)
+            changed = True
+        if changed:
+            self._apply_filter()
+        
+        if pyxel.btnp(pyxel.KEY_BACKSPACE):
+            self.search_text = ""
+        for digit, key in enumerate(DIGIT_KEYS):
+            if pyxel.btnp(key):
+                # しばらく入力がなければ新しい番号として入力し直す
+                if pyxel.frame_count - self.search_frame > SEARCH_TIMEOUT:
+                    self.search_text = ""
+                self.search_text = (self.search_text + str(digit))[-5:]
+                self.search_frame = pyxel.frame_count
+                if self.puzzle_groups:
+                    self._jump_to_number(int(self.search_text))
+    
     def update(self):
+        self._update_loading()
+        self._handle_filter_input()
         if not self.puzzle_groups:
             return
         
@@ -243,91 +361,167 @@ class MenuScreen:
         title = "NUMBERLINK PUZZLE"
         pyxel.text(self.app.WINDOW_WIDTH // 2 - len(title) * 2, 20, title, 8)
         
+        # 絞り込みの条件と入力中の番号
+        if self.filter_text:
+            pyxel.text(self.app.WINDOW_WIDTH - 10 - len(self.filter_text) * 4, 30, self.filter_text, 8)
+        # （読み込み中は同じ場所に LOADING を表示する）
+        if self.loading_done and self.search_text and pyxel.frame_count - self.search_frame <= SEARCH_TIMEOUT:
+            pyxel.text(10, 30, f"NO.{self.search_text}", COLOR_SELECTED)
+        
         if not self.puzzle_groups:
-            pyxel.text(10, 60, "No puzzles found.", 8)
+            if self.filter_text and self.source_groups:
+                pyxel.text(10, 60, "No puzzles match the filter.", 8)
+                self._draw_instructions()
+            elif self.loading_done:
+                pyxel.text(10, 60, "No puzzles found.", 8)
+            if not self.loading_done:
+                self._draw_loading_indicator()
             return
         
         # クリッピング領域の設定（説明欄より上）
         clip_top = self.visible_area_top
         clip_bottom = self.visible_area_bottom
         
-        # グループごとに問題を表示
-        for group_idx, group in enumerate(self.puzzle_groups):
+        # 表示範囲（スクロール座標系）にかかるグループ・行だけを描画する
+        view_top = self.scroll_offset + clip_top - self.top_margin
+        view_bottom = self.scroll_offset + clip_bottom - self.top_margin
+        first_group = max(0, bisect_right(self.group_label_ys, view_top - self.row_spacing) - 1)
+        
+        for group_idx in range(first_group, len(self.puzzle_groups)):
             group_layout = self.group_layouts[group_idx]
-            
-            # グループラベルのY座標（スクロールを考慮）
-            label_y = self.top_margin + group_layout['label_y'] - self.scroll_offset
+            if group_layout['label_y'] >= view_bottom:
+                break
             
             # 表示領域内ならラベルを描画
+            label_y = self.top_margin + group_layout['label_y'] - self.scroll_offset
             if clip_top <= label_y < clip_bottom:
-                pyxel.text(10, label_y, group['size_label'], 8)
+                pyxel.text(10, label_y, self.puzzle_groups[group_idx]['size_label'], 8)
             
-            # このグループの問題を表示
-            puzzles = group['puzzles']
+            # このグループで表示範囲にかかる行（上端は1行分はみ出しても描く）
+            rows_y = group_layout['rows_y']
+            first_row = max(0, -(-(view_top - self.row_spacing - rows_y) // self.row_spacing))
+            last_row = min(group_layout['num_rows'], -(-(view_bottom - rows_y) // self.row_spacing))
             
-            for i, puzzle in enumerate(puzzles):
-                row = i // self.items_per_row
-                col = i % self.items_per_row
-                
-                # Y座標を計算（スクロールを考慮）
-                if row < len(group_layout['rows']):
-                    y_pos = self.top_margin + group_layout['rows'][row] - self.scroll_offset
-                else:
-                    continue
-                
-                # 表示領域外ならスキップ
-                if y_pos < clip_top - self.row_spacing or y_pos >= clip_bottom:
-                    continue
-                
-                # X座標を計算
-                x = self.left_margin + col * self.item_width
-                
-                # 問題番号の表示 (IDから番号を抽出: "10x10_001" -> "001")
-                puzzle_id = puzzle["id"]
-                parts = puzzle_id.split("_")
-                num_str = parts[1] if len(parts) == 2 else f"{i+1:03d}"
-                
-                # クリア済みかどうか確認
-                is_cleared = self.app.is_puzzle_cleared(puzzle_id)
-                
-                # クリア済みなら * を付ける
-                if is_cleared:
-                    text = num_str + "*"
-                else:
-                    text = num_str
-                
-                # 選択中かどうかでカラーを変更
-                is_selected = (group_idx == self.selected_group_index and i == self.selected_item_index)
-                
-                if is_selected:
-                    color = COLOR_SELECTED  # 選択中は赤
-                elif is_cleared:
-                    color = COLOR_CLEARED   # クリア済みは緑
-                else:
-                    color = COLOR_NORMAL    # 未クリアは紫
-                
-                # 選択中アイテムの背景を描画
-                if is_selected:
-                    # クリア済みなら*の分だけ幅を広げる
-                    box_width = 24 if is_cleared else 20
-                    pyxel.rectb(x - 2, y_pos - 2, box_width, 10, COLOR_SELECTED)
-                
-                pyxel.text(x, y_pos, text, color)
+            puzzles = self.puzzle_groups[group_idx]['puzzles']
+            labels = group_layout['labels']
+            for row in range(first_row, last_row):
+                y_pos = self.top_margin + rows_y + row * self.row_spacing - self.scroll_offset
+                row_start = row * self.items_per_row
+                for i in range(row_start, min(row_start + self.items_per_row, len(puzzles))):
+                    self._draw_item(group_idx, i, puzzles[i]["id"], labels[i], y_pos)
+        
+        # 選択中の問題と前後の問題のサムネイル
+        self._draw_previews()
         
         # 説明欄の背景（スクロール内容が見えないように）
         pyxel.rect(0, self.visible_area_bottom, self.app.WINDOW_WIDTH, 40, 7)
         
         # 操作方法
-        instruction1 = "ARROWS: Select, ENTER/B: Start, ESC: Quit"
-        instruction2 = "B: Toggle BGM ON/OFF"
-        pyxel.text(10, self.app.WINDOW_HEIGHT - 30, instruction1, 5)
-        pyxel.text(10, self.app.WINDOW_HEIGHT - 20, instruction2, 5)
+        self._draw_instructions()
+        
+        # 選択中のパズルの記録（メモリ上の記録を引くだけでファイルは読まない）
+        self._draw_selected_progress()
+        
+        if not self.loading_done:
+            self._draw_loading_indicator()
         
         # スクロールインジケーター（上にスクロールできる場合）
         if self.scroll_offset > 0:
-            pyxel.text(self.app.WINDOW_WIDTH - 15, self.top_margin, "^", 8)
+            pyxel.text(self.preview_x - 10, self.top_margin, "^", 8)
         
         # スクロールインジケーター（下にスクロールできる場合）
         visible_height = self.visible_area_bottom - self.visible_area_top
         if self.scroll_offset + visible_height < self.total_content_height:
-            pyxel.text(self.app.WINDOW_WIDTH - 15, self.visible_area_bottom - 10, "v", 8)
+            pyxel.text(self.preview_x - 10, self.visible_area_bottom - 10, "v", 8)
+    
+    def _draw_instructions(self):
+        """操作方法を説明欄に表示する"""
+        instruction1 = "ARROWS: Select, ENTER/B: Start, ESC: Quit"
+        instruction2 = "B: BGM, U: Uncleared, S: Size, D: Level, 0-9: No."
+        pyxel.text(10, self.app.WINDOW_HEIGHT - 30, instruction1, 5)
+        pyxel.text(10, self.app.WINDOW_HEIGHT - 20, instruction2, 5)
+    
+    def _draw_item(self, group_idx, i, puzzle_id, label, y_pos):
+        """問題番号を1つ描画する"""
+        # X座標を計算
+        x = self.left_margin + (i % self.items_per_row) * self.item_width
+        
+        # クリア済みなら * を付ける
+        is_cleared = self.app.is_puzzle_cleared(puzzle_id)
+        text = label + "*" if is_cleared else label
+        
+        # 選択中かどうかでカラーを変更
+        is_selected = (group_idx == self.selected_group_index and i == self.selected_item_index)
+        
+        if is_selected:
+            color = COLOR_SELECTED  # 選択中は赤
+        elif is_cleared:
+            color = COLOR_CLEARED   # クリア済みは緑
+        else:
+            color = COLOR_NORMAL    # 未クリアは紫
+        
+        # 選択中アイテムの背景を描画
+        if is_selected:
+            # クリア済みなら*の分だけ幅を広げる
+            box_width = 24 if is_cleared else 20
+            pyxel.rectb(x - 2, y_pos - 2, box_width, 10, COLOR_SELECTED)
+        
+        pyxel.text(x, y_pos, text, color)
+    
+    def _draw_previews(self):
+        """選択中の問題を中央に、前後の問題を上下にサムネイルで表示する"""
+        self.thumbnails.begin_frame()
+        group = self.puzzle_groups[self.selected_group_index]
+        puzzles = group['puzzles']
+        # 新しく描ける枚数に上限があるので、選択中の問題を先に描く
+        for offset in (0, -1, 1):
+            i = self.selected_item_index + offset
+            if not 0 <= i < len(puzzles):
+                continue
+            x = self.preview_x
+            y = self.visible_area_top + 4 + (offset + 1) * self.preview_spacing
+            self.thumbnails.draw(x, y, puzzles[i]["id"])
+            label = group['labels'][i]
+            color = COLOR_SELECTED if offset == 0 else COLOR_NORMAL
+            if offset == 0:
+                pyxel.rectb(x - 1, y - 1, THUMBNAIL_SIZE + 2, THUMBNAIL_SIZE + 2, COLOR_SELECTED)
+            pyxel.text(x + (THUMBNAIL_SIZE - len(label) * 4) // 2, y + THUMBNAIL_SIZE + 3, label, color)
+    
+    def get_debug_info(self):
+        """デバッグ表示用のサムネイルの使用状況"""
+        return [
+            f"THUMBNAILS: {len(self.thumbnails)}/{self.thumbnails.capacity}",
+            f"RENDERED: {self.thumbnails.last_frame_renders}",
+        ]
+    
+    def _draw_selected_progress(self):
+        """選択中のパズルのベスト記録を説明欄の下に表示する"""
+        puzzles = self.puzzle_groups[self.selected_group_index]['puzzles']
+        puzzle_id = puzzles[self.selected_item_index]["id"]
+        record = self.app.get_puzzle_progress(puzzle_id)
+        if record is None:
+            text = f"{puzzle_id}: NOT CLEARED"
+            color = COLOR_NORMAL
+        else:
+            text = (
+                f"{puzzle_id}: BEST {format_time(record.best_time)} / "
+                f"{record.best_moves} MOVES ({record.clears}x)"
+            )
+            color = COLOR_CLEARED
+        pyxel.text(10, self.app.WINDOW_HEIGHT - 10, text, color)
+    
+    def _draw_loading_indicator(self):
+        """読み込み中の表示（読み込んだ問題数と回転する記号）"""
+        loaded, _ = loading_progress()
+        spinner = "|/-\\"[pyxel.frame_count // 8 % 4]
+        text = f"LOADING {loaded} {spinner}"
+        pyxel.text(10, 30, text, COLOR_NORMAL)
+
+
+def _next_option(options, current):
+    """絞り込みの選択肢を None（すべて）→ options の順 → None と切り替える"""
+    options = list(options)
+    if current is None:
+        return options[0] if options else None
+    position = options.index(current) + 1
+    return options[position] if position < len(options) else None
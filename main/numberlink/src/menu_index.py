@@ -0,0 +1,173 @@
+from bisect import bisect_left
+from types import MappingProxyType
+
+# 難易度の絞り込み（manifest の難易度 1〜5 をまとめた区分）
+DIFFICULTY_BANDS = (
+    ("EASY", (1, 2)),
+    ("NORMAL", (3,)),
+    ("HARD", (4, 5)),
+)
+
+
+def _bits_from_flags(flags, start):
+    """[bool, ...] を start ビット目から並べたビット列にする（1ビットずつ足すより速い）"""
+    if not any(flags):
+        return 0
+    return int("".join("1" if flag else "0" for flag in reversed(flags)), 2) << start
+
+
+def _bit_indices(bits):
+    """ビット列で立っている位置を小さい順に返す"""
+    return [i for i, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"]
+
+
+class _GroupIndex:
+    """1つのサイズのグループの索引
+
+    問題はグループ内の位置で表し、クリア済み・難易度ごとの集合を整数のビット列で持つ。
+    グループは後ろに増えるだけなので、索引も増えた分だけ追加する。
+    """
+
+    def __init__(self, size_key):
+        self.size_key = size_key
+        self.source = None
+        self.count = 0
+        self.labels = []
+        self.numbers = []
+        self.cleared_bits = 0
+        self.level_bits = {}
+        # クリア状態が変わるたびに増やす（絞り込み結果のキャッシュの判定用）
+        self.cleared_version = 0
+        self._sorted_numbers = None
+        # 絞り込みの条件ごとに、作ったときの状態と結果を持つ
+        self._views = {}
+
+    def extend(self, source, is_cleared):
+        """source の問題のうち、まだ索引にないものを追加する"""
+        self.source = source
+        puzzles = source['puzzles']
+        start = self.count
+        if len(puzzles) == start:
+            return
+        new_puzzles = puzzles[start:]
+        for i, puzzle in enumerate(new_puzzles, start):
+            # 問題番号の表示文字列 (IDから番号を抽出: "10x10_001" -> "001")
+            parts = puzzle["id"].split("_")
+            label = parts[1] if len(parts) == 2 else f"{i+1:03d}"
+            self.labels.append(label)
+            self.numbers.append(int(label) if label.isdigit() else i + 1)
+
+        # ビット列は追加した分をまとめて作ってから足す
+        self.cleared_bits |= _bits_from_flags([is_cleared(puzzle["id"]) for puzzle in new_puzzles], start)
+        levels = [puzzle["difficulty"] for puzzle in new_puzzles]
+        for level in set(levels) - {None}:
+            bits = _bits_from_flags([value == level for value in levels], start)
+            self.level_bits[level] = self.level_bits.get(level, 0) | bits
+        self.count = len(puzzles)
+        self._sorted_numbers = None
+
+    def mark_cleared(self, index):
+        if not self.cleared_bits >> index & 1:
+            self.cleared_bits |= 1 << index
+            self.cleared_version += 1
+
+    def view(self, uncleared_only, band):
+        """絞り込んだグループを返す（その条件で前に作ったときから中身が変わっていなければ同じオブジェクト）"""
+        state = (self.count, self.cleared_version if uncleared_only else 0)
+        cached = self._views.get((uncleared_only, band))
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        if not uncleared_only and band is None:
+            indices = range(self.count)
+            puzzles = self.source['puzzles']
+            labels = self.labels
+        else:
+            bits = (1 << self.count) - 1
+            if uncleared_only:
+                bits &= ~self.cleared_bits
+            if band is not None:
+                band_bits = 0
+                for level in DIFFICULTY_BANDS[band][1]:
+                    band_bits |= self.level_bits.get(level, 0)
+                bits &= band_bits
+            indices = _bit_indices(bits)
+            source_puzzles = self.source['puzzles']
+            puzzles = tuple(source_puzzles[i] for i in indices)
+            labels = [self.labels[i] for i in indices]
+
+        view = None
+        if indices:
+            view = MappingProxyType({
+                "size_key": self.size_key,
+                "size_label": self.source['size_label'],
+                "puzzles": puzzles,
+                "indices": indices,
+                "labels": labels,
+            })
+        self._views[(uncleared_only, band)] = (state, view)
+        return view
+
+    def find_number(self, number):
+        """番号が number 以上の最初の問題の位置を返す（なければ最後の問題）"""
+        if self._sorted_numbers is None:
+            self._sorted_numbers = sorted((n, i) for i, n in enumerate(self.numbers))
+        pos = bisect_left(self._sorted_numbers, (number, -1))
+        if pos == len(self._sorted_numbers):
+            return self.count - 1
+        return self._sorted_numbers[pos][1]
+
+
+class MenuIndex:
+    """メニューの絞り込み（未クリアのみ・サイズ・難易度）と番号ジャンプのための索引
+
+    ローダーのグループが届くたびに update_groups() で増えた問題だけを索引に加え、
+    絞り込みは索引のビット演算で行う（全問題を調べ直さない）。
+    """
+
+    def __init__(self, is_cleared):
+        self.is_cleared = is_cleared
+        self.groups = {}
+        self.size_keys = []
+        self.positions = {}
+
+    def update_groups(self, source_groups):
+        """ローダーのグループ（後ろに増えるだけ）を索引に反映する"""
+        for source in source_groups:
+            size_key = source['size_key']
+            group = self.groups.get(size_key)
+            if group is None:
+                group = self.groups[size_key] = _GroupIndex(size_key)
+                self.size_keys.append(size_key)
+            start = group.count
+            group.extend(source, self.is_cleared)
+            for i in range(start, group.count):
+                self.positions[source['puzzles'][i]["id"]] = (size_key, i)
+        self.size_keys.sort()
+
+    def mark_cleared(self, puzzle_id):
+        """クリアした問題を索引に反映する"""
+        position = self.positions.get(puzzle_id)
+        if position is not None:
+            size_key, index = position
+            self.groups[size_key].mark_cleared(index)
+
+    def filter(self, uncleared_only=False, size_key=None, band=None):
+        """条件に合う問題だけのグループの tuple を返す
+
+        各グループは {"size_key", "size_label", "puzzles", "indices", "labels"}。
+        indices は元のグループ内の位置、labels は問題番号の表示文字列。
+        条件に合う問題がないグループは含めない。
+        """
+        views = []
+        for key in self.size_keys:
+            if size_key is not None and key != size_key:
+                continue
+            view = self.groups[key].view(uncleared_only, band)
+            if view is not None:
+                views.append(view)
+        return tuple(views)
+
+    def find_number(self, size_key, number):
+        """サイズ size_key で番号が number 以上の最初の問題の、元のグループ内の位置を返す"""
+        return self.groups[size_key].find_number(number)
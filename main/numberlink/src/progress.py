@@ -0,0 +1,163 @@
+import json
+import os
+from collections import namedtuple
+
+# パズルごとの記録（クリア回数・最短クリア時間[秒]・最少手数）
+PuzzleProgress = namedtuple("PuzzleProgress", ["clears", "best_time", "best_moves"])
+
+SNAPSHOT_FILENAME = "progress.json"
+LOG_FILENAME = "progress.log"
+SNAPSHOT_VERSION = 1
+
+# ログがこの行数になったらスナップショットにまとめる
+COMPACT_THRESHOLD = 64
+
+
+def format_time(seconds):
+    """クリア時間を "分:秒.1/10秒" の文字列にする"""
+    # 先に 1/10 秒に丸めて "0:60.0" のような表示にならないようにする
+    tenths = round(seconds * 10)
+    minutes, tenths = divmod(tenths, 600)
+    return f"{minutes}:{tenths // 10:02d}.{tenths % 10}"
+
+
+class ProgressStore:
+    """クリアの記録をファイルに残す
+
+    クリアするたびにログ (progress.log) へ1行追記するだけで、全体は書き直さない。
+    ログが COMPACT_THRESHOLD 行たまったらスナップショット (progress.json) にまとめて
+    ログを空にするので、読み込みは履歴の長さによらずクリアしたパズルの数に比例する。
+    ログの各行には通し番号 seq を付け、スナップショットにはまとめた最後の番号を書く。
+    置き換えたあとログを空にする前に止まっても、読み込み時にその番号以下の行は飛ばすので
+    クリア回数が二重に数えられることはない。
+    """
+
+    def __init__(self, directory, compact_threshold=COMPACT_THRESHOLD):
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILENAME)
+        self.log_path = os.path.join(directory, LOG_FILENAME)
+        self.records = {}
+        self.log_length = 0
+        # 最後に記録したクリアの通し番号
+        self.seq = 0
+        # 書き込めない環境ではメモリ上だけで記録する
+        self.writable = True
+
+    def load(self):
+        """スナップショットとログを読み込む（壊れた行は飛ばす）"""
+        self.records = {}
+        self.log_length = 0
+        self.seq = 0
+        needs_compact = False
+        # スナップショットにまとめ済みの通し番号（これ以下のログの行はもう反映されている）
+        covered_seq = 0
+        try:
+            with open(self.snapshot_path, "r") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") == SNAPSHOT_VERSION:
+                records = {
+                    puzzle_id: PuzzleProgress(*values) for puzzle_id, values in snapshot["puzzles"].items()
+                }
+                covered_seq = snapshot.get("seq", 0)
+                self.records = records
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self.seq = covered_seq
+
+        try:
+            with open(self.log_path, "r") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                        # 通し番号のない行（番号を付ける前の形式）はそのまま反映する
+                        seq = event.get("seq", 0)
+                        if seq and seq <= covered_seq:
+                            # スナップショットに置き換えたあと、ログを空にする前に止まった
+                            needs_compact = True
+                            continue
+                        self._apply(event["id"], event["time"], event["moves"])
+                    except (ValueError, KeyError, TypeError):
+                        # 書き込み途中で終了した行など
+                        needs_compact = True
+                        continue
+                    self.seq = max(self.seq, seq)
+                    self.log_length += 1
+        except OSError:
+            pass
+
+        # 壊れた行・反映済みの行のあとに追記しないよう、そのときもまとめ直す
+        if needs_compact or self.log_length >= self.compact_threshold:
+            self.compact()
+
+    def _apply(self, puzzle_id, time, moves):
+        """1回のクリアを記録に反映する"""
+        previous = self.records.get(puzzle_id)
+        if previous is None:
+            self.records[puzzle_id] = PuzzleProgress(1, time, moves)
+            return
+        self.records[puzzle_id] = PuzzleProgress(
+            previous.clears + 1,
+            time if previous.best_time is None else min(previous.best_time, time),
+            moves if previous.best_moves is None else min(previous.best_moves, moves),
+        )
+
+    def is_cleared(self, puzzle_id):
+        return puzzle_id in self.records
+
+    def get(self, puzzle_id):
+        """パズルの記録を返す（まだクリアしていなければ None）"""
+        return self.records.get(puzzle_id)
+
+    def record_clear(self, puzzle_id, time, moves):
+        """クリアを記録し、ログに1行追記する"""
+        time = round(time, 2)
+        self._apply(puzzle_id, time, moves)
+        self.seq += 1
+        line = json.dumps({"seq": self.seq, "id": puzzle_id, "time": time, "moves": moves}) + "\n"
+        if not self._write(self._append_line, line):
+            return
+        self.log_length += 1
+        if self.log_length >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """記録をスナップショットにまとめてログを空にする"""
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "seq": self.seq,
+            "puzzles": {puzzle_id: list(record) for puzzle_id, record in self.records.items()},
+        }
+        if self._write(self._replace_snapshot, snapshot):
+            self.log_length = 0
+
+    def _write(self, writer, data):
+        """書き込みに失敗したら以降はメモリ上だけで記録する"""
+        if not self.writable:
+            return False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            writer(data)
+            return True
+        except OSError as e:
+            print(f"Progress could not be saved: {e}")
+            self.writable = False
+            return False
+
+    def _append_line(self, line):
+        with open(self.log_path, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replace_snapshot(self, snapshot):
+        # 書きかけのスナップショットが残らないよう、別名で書いてから置き換える
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # スナップショットに入ったのでログは空にしてよい
+        with open(self.log_path, "w"):
+            pass
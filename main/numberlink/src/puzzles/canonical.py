@@ -0,0 +1,131 @@
+"""
+パズルの正規形ハッシュと、収録パズルのハッシュ索引
+
+回転・反転した盤面や数字を振り直しただけのパズルは同じパズルとみなす。
+盤面の対称変換（正方形は8通り、非正方形はサイズが変わらない4通り）それぞれで
+数字を行優先で最初に現れた順に 1, 2, ... と振り直し、
+その並びが最小になるものを正規形とする。
+
+索引 (hash_index.json) は 正規形ハッシュ -> パズルID の dict を保存したもので、
+インポート時に新しいパズルが既存のものと同じかを1問あたり O(1) で調べるのに使う。
+"""
+import hashlib
+import json
+import os
+
+# 索引ファイルのパス（data/ に置くと読み込み時にパズルとして扱われるので外に置く）
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "hash_index.json")
+
+
+def _symmetries(rows, cols):
+    """サイズが変わらない盤面の対称変換を返す"""
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (rows - 1 - r, c),
+        lambda r, c: (r, cols - 1 - c),
+        lambda r, c: (rows - 1 - r, cols - 1 - c),
+    ]
+    if rows == cols:
+        transforms += [
+            lambda r, c: (c, r),
+            lambda r, c: (cols - 1 - c, r),
+            lambda r, c: (c, rows - 1 - r),
+            lambda r, c: (cols - 1 - c, rows - 1 - r),
+        ]
+    return transforms
+
+
+def canonical_form(puzzle):
+    """パズルの正規形を返す: ((rows, cols), ((セル番号, 振り直した数字), ...))"""
+    size = puzzle["size"]
+    rows, cols = (size, size) if isinstance(size, int) else size
+
+    cells = []
+    for pos, num in puzzle["numbers"].items():
+        if isinstance(pos, str):
+            r, c = (int(v) for v in pos.split(","))
+        else:
+            r, c = pos
+        cells.append((r, c, num))
+
+    best = None
+    for transform in _symmetries(rows, cols):
+        placed = sorted((transform(r, c), num) for r, c, num in cells)
+        labels = {}
+        form = tuple(
+            (r * cols + c, labels.setdefault(num, len(labels) + 1))
+            for (r, c), num in placed
+        )
+        if best is None or form < best:
+            best = form
+    return (rows, cols), best
+
+
+def canonical_hash(puzzle):
+    """正規形のハッシュ（16進文字列）を返す"""
+    (rows, cols), form = canonical_form(puzzle)
+    text = f"{rows}x{cols}:" + ";".join(f"{index}={num}" for index, num in form)
+    return hashlib.sha256(text.encode("ascii")).hexdigest()
+
+
+class PuzzleHashIndex:
+    """正規形ハッシュ -> パズルID の索引
+
+    ファイルに保存しておき、data/ のパズルと食い違っていれば作り直す。
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.hashes = {}
+        # 索引に含めたパズルID（同じパズルが複数あっても全部記録する）
+        self.puzzle_ids = set()
+
+    @classmethod
+    def load(cls, data_dir, path=INDEX_PATH):
+        """索引を読み込む。data_dir のパズルIDと一致しなければ作り直して保存する"""
+        index = cls(path)
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+            index.hashes = saved["hashes"]
+            index.puzzle_ids = set(saved["puzzle_ids"])
+        except (OSError, ValueError, KeyError, TypeError):
+            index.hashes = {}
+            index.puzzle_ids = set()
+
+        puzzle_ids = {
+            filename[:-len(".json")]
+            for filename in os.listdir(data_dir)
+            if filename.endswith(".json")
+        } if os.path.exists(data_dir) else set()
+        if index.puzzle_ids != puzzle_ids:
+            index.rebuild(data_dir)
+            index.save()
+        return index
+
+    def rebuild(self, data_dir):
+        """data_dir の全パズルを読み込んで索引を作り直す"""
+        self.hashes = {}
+        self.puzzle_ids = set()
+        for filename in sorted(os.listdir(data_dir)):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(data_dir, filename), "r") as f:
+                puzzle_data = json.load(f)
+            self.add(canonical_hash(puzzle_data), filename[:-len(".json")])
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump(
+                {"puzzle_ids": sorted(self.puzzle_ids), "hashes": self.hashes},
+                f, indent=0, sort_keys=True,
+            )
+
+    def find(self, puzzle_hash):
+        """同じパズルのIDを返す（なければ None）"""
+        return self.hashes.get(puzzle_hash)
+
+    def add(self, puzzle_hash, puzzle_id):
+        """パズルを索引に加える（同じパズルがあれば先に登録したIDを残す）"""
+        self.hashes.setdefault(puzzle_hash, puzzle_id)
+        self.puzzle_ids.add(puzzle_id)
@@ -0,0 +1,229 @@
+"""
+ナンバーリンクのパズル生成
+
+1. 盤面の分割: ドミノ（2セルの線）で盤面を敷き詰めてから、
+   線の端どうしをつなぐ・隣の線を途中で切って端につなぐ操作をランダムに繰り返し、
+   盤面全体を指定した本数の線に分ける。
+   線が自分自身と隣り合わない（つないだ所以外で接しない）ものだけを残すので、
+   線の中で道順を変えた別解ができない
+2. 端点の抽出: 各線の両端に同じ数字を置く
+3. 唯一解の確認: ソルバーで解を2つまで数え、1つだけのものを採用する
+
+パズルは puzzles/data と同じ {"size": [rows, cols], "numbers": {"r,c": 数字}} 形式。
+"""
+import random
+import time
+
+from puzzles.puzzle_loader import MAX_COLS, MAX_ROWS
+from puzzles.solver import count_solutions
+
+# 唯一解の確認にかける探索ノード数の上限（超えたら候補を捨てる）
+DEFAULT_MAX_NODES = 2_000_000
+
+# 分割の操作回数の上限（セル数あたり。超えたら最初からやり直す）
+_STEPS_PER_CELL = 50
+
+# 続けて分割に失敗してよい回数と、1問あたりに試す候補数の上限
+# （採用率は 25〜65% 程度なので、上限に届くのは盤面と組の数の組み合わせで作れないとき）
+MAX_PARTITION_ATTEMPTS = 100
+MAX_CANDIDATES = 1000
+
+
+class GenerationError(ValueError):
+    """指定した盤面サイズと数字の組の数ではパズルを作れない"""
+
+
+def default_pairs(rows, cols):
+    """盤面サイズに合った数字の組の数を返す
+
+    12x12 までは収録パズルと同じくらい（1組あたり約11セル）。
+    それより大きい盤面は唯一解の確認が探索ノード数の上限に収まるよう
+    線を短め（1組あたり約7セル）にする。
+    """
+    cells = rows * cols
+    if cells <= 144:
+        return max(2, round(cells / 11))
+    return round(cells / 7)
+
+
+def validate_size(rows, cols, pairs):
+    """盤面サイズと数字の組の数でパズルを作れるか確かめる（作れなければ GenerationError）
+
+    ゲーム画面に表示できない大きさ (MAX_ROWS x MAX_COLS を超える) も作らない。
+    線は3セル以上で自分自身と隣り合わないので、組の数は セル数 // 3 以下。
+    縦横とも2以上の盤面は1本の線では必ず自分と隣り合う (2x2 の4セルを3本のつなぎ目では囲めない) ので2組以上。
+    """
+    if rows < 2 or cols < 2:
+        raise GenerationError(f"盤面が小さすぎます: {rows}x{cols} (縦横とも2以上)")
+    if rows > MAX_ROWS or cols > MAX_COLS:
+        raise GenerationError(f"盤面が大きすぎます: {rows}x{cols} (ゲームで表示できるのは {MAX_ROWS}x{MAX_COLS} まで)")
+    max_pairs = rows * cols // 3
+    if max_pairs < 2:
+        raise GenerationError(f"{rows}x{cols} の盤面ではパズルを作れません (6セル以上必要)")
+    if not 2 <= pairs <= max_pairs:
+        raise GenerationError(f"{rows}x{cols} の数字の組の数は 2〜{max_pairs} にしてください (指定: {pairs})")
+
+
+def _neighbors(rows, cols, pos):
+    r, c = pos
+    result = []
+    if r > 0:
+        result.append((r - 1, c))
+    if r + 1 < rows:
+        result.append((r + 1, c))
+    if c > 0:
+        result.append((r, c - 1))
+    if c + 1 < cols:
+        result.append((r, c + 1))
+    return result
+
+
+def _domino_tiling(rows, cols, rng):
+    """盤面をドミノで敷き詰め、セル -> 相方のセル の dict を返す
+
+    横向きに並べてから 2x2 の向きをランダムに入れ替えて混ぜる。
+    セル数が奇数なら1セルだけ相方がない。
+    """
+    mate = {}
+    for r in range(rows):
+        for c in range(0, cols - 1, 2):
+            mate[(r, c)] = (r, c + 1)
+            mate[(r, c + 1)] = (r, c)
+    if cols % 2:
+        for r in range(0, rows - 1, 2):
+            mate[(r, cols - 1)] = (r + 1, cols - 1)
+            mate[(r + 1, cols - 1)] = (r, cols - 1)
+
+    if rows < 2 or cols < 2:
+        return mate
+    for _ in range(rows * cols * 8):
+        r = rng.randrange(rows - 1)
+        c = rng.randrange(cols - 1)
+        a, b, d, e = (r, c), (r, c + 1), (r + 1, c), (r + 1, c + 1)
+        if mate.get(a) == b and mate.get(d) == e:
+            mate[a], mate[d], mate[b], mate[e] = d, a, e, b
+        elif mate.get(a) == d and mate.get(b) == e:
+            mate[a], mate[b], mate[d], mate[e] = b, a, e, d
+    return mate
+
+
+def random_partition(rows, cols, pairs, rng):
+    """盤面全体を pairs 本以下の線に分け、線（セルのリスト）のリストを返す
+
+    どの線も3セル以上で、自分自身とは隣り合わない。
+    決まった回数で分けきれなければ None を返す。
+    """
+    mate = _domino_tiling(rows, cols, rng)
+    owner = {}
+    paths = {}
+    for r in range(rows):
+        for c in range(cols):
+            pos = (r, c)
+            if pos in owner:
+                continue
+            cells = [pos, mate[pos]] if pos in mate else [pos]
+            paths[len(paths)] = cells
+            for cell in cells:
+                owner[cell] = len(paths) - 1
+
+    for _ in range(rows * cols * _STEPS_PER_CELL):
+        short = [path_id for path_id, cells in paths.items() if len(cells) < 3]
+        if len(paths) <= pairs and not short:
+            return list(paths.values())
+
+        # 短い線を優先して、線の端を隣の線につなぐ
+        if short and rng.random() < 0.5:
+            path_id = rng.choice(short)
+        else:
+            path_id = rng.choice(list(paths))
+        path = paths[path_id]
+        end = rng.choice((path[0], path[-1]))
+        target = rng.choice(_neighbors(rows, cols, end))
+        other_id = owner[target]
+        if other_id == path_id:
+            continue
+
+        # 相手の線を target で切り、target から始まる側をつなぐ
+        other = paths[other_id]
+        if target == other[0]:
+            piece, rest = other, []
+        elif target == other[-1]:
+            piece, rest = other[::-1], []
+        else:
+            index = other.index(target)
+            if rng.random() < 0.5:
+                piece, rest = other[index:], other[:index]
+            else:
+                piece, rest = other[index::-1], other[index + 1:]
+
+        # つないだ所以外で接するなら自分自身と隣り合うのでやめる
+        piece_cells = set(piece)
+        if any(
+            neighbor in piece_cells and (cell, neighbor) != (end, target)
+            for cell in path
+            for neighbor in _neighbors(rows, cols, cell)
+        ):
+            continue
+
+        if end == path[0]:
+            path.reverse()
+        path.extend(piece)
+        for cell in piece:
+            owner[cell] = path_id
+        if rest:
+            paths[other_id] = rest
+        else:
+            del paths[other_id]
+    return None
+
+
+def extract_numbers(paths):
+    """各線の両端に数字を置き、{"r,c": 数字} を返す"""
+    numbers = {}
+    # 数字は左上に近い端から順に振る
+    for num, path in enumerate(sorted(paths, key=lambda cells: min(cells[0], cells[-1])), 1):
+        for r, c in (path[0], path[-1]):
+            numbers[f"{r},{c}"] = num
+    return numbers
+
+
+def generate_puzzle(rows, cols, pairs=None, seed=None, max_nodes=DEFAULT_MAX_NODES,
+                    max_candidates=MAX_CANDIDATES, max_partition_attempts=MAX_PARTITION_ATTEMPTS):
+    """解が1つだけのパズルができるまで候補を作る（ワーカープロセスで実行）
+
+    分割に max_partition_attempts 回続けて失敗するか、候補を max_candidates 個試しても
+    できなければ GenerationError を送出する。
+    戻り値: (パズル, 試した候補数, 複数解で捨てた数, 上限超えで捨てた数, かかった秒数)
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    if pairs is None:
+        pairs = default_pairs(rows, cols)
+    validate_size(rows, cols, pairs)
+
+    tried = multiple = gave_up = 0
+    failed_partitions = 0
+    while tried < max_candidates:
+        paths = random_partition(rows, cols, pairs, rng)
+        if paths is None:
+            failed_partitions += 1
+            if failed_partitions >= max_partition_attempts:
+                raise GenerationError(
+                    f"{rows}x{cols} の盤面を数字{pairs}組の線に分けられませんでした"
+                    f" ({max_partition_attempts}回続けて失敗)"
+                )
+            continue
+        failed_partitions = 0
+        tried += 1
+        puzzle = {"size": [rows, cols], "numbers": extract_numbers(paths)}
+        found = count_solutions(puzzle, limit=2, max_nodes=max_nodes)
+        if found == 1:
+            return puzzle, tried, multiple, gave_up, time.perf_counter() - start
+        if found is None:
+            gave_up += 1
+        else:
+            multiple += 1
+    raise GenerationError(
+        f"{rows}x{cols} (数字{pairs}組) で解が1つだけのパズルができませんでした"
+        f" (候補{tried}個: 複数解{multiple}, 上限超え{gave_up})"
+    )
@@ -0,0 +1,93 @@
+"""
+パズル一覧の索引 (manifest.json) と、全パズルをまとめた corpus.bin の生成
+
+メニューの表示に必要な情報だけを1ファイルにまとめ、
+起動時に全パズルのJSONを読まなくて済むようにする。
+
+manifest.json の形式:
+    {
+      "fields": ["id", "rows", "cols", "file", "difficulty"],
+      "puzzles": [["05x05_001", 5, 5, "05x05_001.json", 2], ...]
+    }
+
+difficulty はソルバーの探索ノード数の桁数から決める 1〜5 の目安。
+"""
+import json
+import os
+
+from puzzles.packed_corpus import write_corpus
+from puzzles.puzzle_loader import MANIFEST_FIELDS, parse_puzzle_data, read_manifest
+from puzzles.solver import solve_with_stats
+
+# 難易度の段階数
+MAX_DIFFICULTY = 5
+
+
+def puzzle_difficulty(puzzle):
+    """ソルバーの探索ノード数から難易度 (1〜5) を返す
+
+    ノード数 100 未満が 1、以降10倍ごとに1段階上がる。
+    """
+    nodes = solve_with_stats(puzzle)[2]
+    level = len(str(nodes)) - 1
+    return max(1, min(MAX_DIFFICULTY, level))
+
+
+def build_manifest(data_dir, manifest_path, recompute=False, progress=None):
+    """data_dir の全パズルから manifest.json を作り直し、パズル数を返す
+
+    パズルファイルは取り込み後に書き換えないので、前回の manifest にある
+    ファイルの難易度はそのまま使う（recompute=True なら全部計算し直す）。
+    """
+    previous = {}
+    if not recompute:
+        for entry in read_manifest(manifest_path) or []:
+            previous[entry["file"]] = entry["difficulty"]
+
+    rows_out = []
+    filenames = sorted(name for name in os.listdir(data_dir) if name.endswith(".json"))
+    for filename in filenames:
+        with open(os.path.join(data_dir, filename), "r") as f:
+            puzzle_data = json.load(f)
+        size = puzzle_data["size"]
+        if isinstance(size, int):
+            size = [size, size]
+
+        difficulty = previous.get(filename)
+        if difficulty is None:
+            difficulty = puzzle_difficulty(puzzle_data)
+            if progress:
+                progress(filename, difficulty)
+        rows_out.append([puzzle_data["id"], size[0], size[1], filename, difficulty])
+
+    save_manifest(rows_out, manifest_path)
+    return len(rows_out)
+
+
+def save_manifest(rows, manifest_path):
+    """[id, rows, cols, file, difficulty] のリストを manifest.json に保存する"""
+    # 1パズル1行にして差分を見やすくする
+    lines = [json.dumps(row, ensure_ascii=False) for row in rows]
+    with open(manifest_path, "w") as f:
+        f.write('{\n"fields": ' + json.dumps(MANIFEST_FIELDS) + ',\n"puzzles": [\n')
+        f.write(",\n".join(lines))
+        f.write("\n]\n}\n")
+
+
+def build_corpus(data_dir, manifest_path, corpus_path):
+    """data_dir の全パズルを corpus.bin に書き出し、書き出したパズルのリストを返す
+
+    難易度は manifest.json のものを使う（ないものは不明として 0 で保存）。
+    """
+    difficulties = {entry["file"]: entry["difficulty"] for entry in read_manifest(manifest_path) or []}
+    puzzles = []
+    for filename in sorted(name for name in os.listdir(data_dir) if name.endswith(".json")):
+        with open(os.path.join(data_dir, filename), "r") as f:
+            puzzle = parse_puzzle_data(json.load(f))
+        if puzzle is None:
+            continue
+        puzzle["difficulty"] = difficulties.get(filename)
+        puzzles.append(puzzle)
+
+    write_corpus(corpus_path, puzzles)
+    return puzzles
@@ -0,0 +1,186 @@
+"""
+全パズルを1ファイルにまとめたバイナリ形式 (corpus.bin) の読み書き
+
+パズルごとの小さなJSONを大量に読む代わりに、1つのファイルから
+番号やIDで直接パズルを取り出せるようにする。
+
+ファイルの構成 (数値はすべてリトルエンディアン):
+    ヘッダ (16バイト)
+        magic       4s   b"NLPK"
+        version     H    形式のバージョン
+        entry_size  H    索引1件のバイト数
+        count       I    パズル数
+        reserved    I
+    索引 (entry_size バイト x count)
+        id          16s  パズルID (ASCII, 末尾は \\0 埋め)
+        rows        B
+        cols        B
+        difficulty  B    0 は不明
+        (1バイト空き)
+        offset      I    本体の開始位置（ファイル先頭から）
+    本体 (パズルごと、次のパズルの offset まで)
+        varint      数字セルの数 n
+        n 回        varint セル番号 (r*cols+c) の前のセルとの差, varint 数字
+
+varint は7ビットずつ下位から並べ、続きがあれば最上位ビットを立てる形式。
+"""
+import mmap
+import struct
+import sys
+
+MAGIC = b"NLPK"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHII")
+_ENTRY = struct.Struct("<16sBBBxI")
+_ID_BYTES = 16
+
+
+class CorpusFormatError(ValueError):
+    """corpus.bin の形式が正しくない"""
+
+
+def _encode_varint(value, out):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(buffer, pos):
+    """pos から varint を1つ読み、(値, 次の位置) を返す"""
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_numbers(cols, numbers):
+    """{(r, c): 数字} を本体のバイト列にする"""
+    cells = sorted((r * cols + c, num) for (r, c), num in numbers.items())
+    out = bytearray()
+    _encode_varint(len(cells), out)
+    previous = 0
+    for index, num in cells:
+        _encode_varint(index - previous, out)
+        _encode_varint(num, out)
+        previous = index
+    return bytes(out)
+
+
+def write_corpus(path, puzzles):
+    """パズルのリストを corpus.bin に書き出す
+
+    puzzles の各要素は {"id", "size": [rows, cols], "numbers": {(r, c): 数字}, "difficulty"}。
+    """
+    bodies = []
+    for puzzle in puzzles:
+        puzzle_id = puzzle["id"].encode("ascii")
+        if len(puzzle_id) > _ID_BYTES:
+            raise CorpusFormatError(f"パズルIDが長すぎます: {puzzle['id']}")
+        bodies.append(encode_numbers(puzzle["size"][1], puzzle["numbers"]))
+
+    offset = _HEADER.size + _ENTRY.size * len(puzzles)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _ENTRY.size, len(puzzles), 0))
+        for puzzle, body in zip(puzzles, bodies):
+            rows, cols = puzzle["size"]
+            f.write(_ENTRY.pack(
+                puzzle["id"].encode("ascii"), rows, cols, puzzle.get("difficulty") or 0, offset,
+            ))
+            offset += len(body)
+        for body in bodies:
+            f.write(body)
+
+
+class PackedCorpus:
+    """corpus.bin を読み、番号やIDでパズルを取り出す
+
+    ファイルは mmap で開き、必要なパズルの本体だけを読む。
+    mmap が使えない環境 (ブラウザ版) ではファイル全体を bytes として読み込む。
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        if len(buffer) < _HEADER.size:
+            raise CorpusFormatError("ヘッダが足りません")
+        magic, version, entry_size, count, _ = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION or entry_size != _ENTRY.size:
+            raise CorpusFormatError("corpus.bin の形式が違います")
+        if len(buffer) < _HEADER.size + entry_size * count:
+            raise CorpusFormatError("索引が途中で切れています")
+        self.count = count
+        # 本体は offset の順に並ぶので、最後のパズルの本体がファイルの終わりでちょうど終わるかだけ確かめる
+        if count and self._body_end(count - 1) != len(buffer):
+            raise CorpusFormatError("本体の長さが索引と合いません（途中で切れています）")
+        self._ids = None
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            if sys.platform == "emscripten":
+                return cls(f.read())
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # 空のファイルは mmap できない
+                raise CorpusFormatError("ファイルが空です") from None
+            return cls(buffer)
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return _ENTRY.unpack_from(self.buffer, _HEADER.size + _ENTRY.size * index)
+
+    def _body_end(self, index):
+        """index 番目のパズルの本体の次の位置（切れていれば -1）"""
+        try:
+            count, pos = _decode_varint(self.buffer, self._entry(index)[4])
+            for _ in range(count * 2):
+                _, pos = _decode_varint(self.buffer, pos)
+        except IndexError:
+            return -1
+        return pos
+
+    def entry(self, index):
+        """index 番目のパズルの (id, rows, cols, difficulty) を返す（difficulty 不明は None）"""
+        raw_id, rows, cols, difficulty, _ = self._entry(index)
+        return raw_id.rstrip(b"\0").decode("ascii"), rows, cols, difficulty or None
+
+    def index_of(self, puzzle_id):
+        """IDからパズルの番号を返す（なければ None）"""
+        if self._ids is None:
+            self._ids = {self.entry(i)[0]: i for i in range(self.count)}
+        return self._ids.get(puzzle_id)
+
+    def puzzle(self, index):
+        """index 番目のパズルを puzzle_loader と同じ {"id", "size", "numbers"} 形式で返す
+
+        本体が途中で切れていたら CorpusFormatError を送出する。
+        """
+        raw_id, rows, cols, _, offset = self._entry(index)
+        buffer = self.buffer
+        numbers = {}
+        cell = 0
+        try:
+            count, pos = _decode_varint(buffer, offset)
+            for _ in range(count):
+                delta, pos = _decode_varint(buffer, pos)
+                num, pos = _decode_varint(buffer, pos)
+                cell += delta
+                numbers[divmod(cell, cols)] = num
+        except IndexError:
+            raise CorpusFormatError(f"{index} 番目のパズルの本体が途中で切れています") from None
+        return {
+            "id": raw_id.rstrip(b"\0").decode("ascii"),
+            "size": [rows, cols],
+            "numbers": numbers,
+        }
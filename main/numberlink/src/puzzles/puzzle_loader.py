@@ -1,8 +1,32 @@
 import os
 import json
+import sys
+import threading
+import time
+from functools import lru_cache
+from types import MappingProxyType
+
+from puzzles.packed_corpus import CorpusFormatError, PackedCorpus
 
 # パズルデータのディレクトリ
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+# パズル一覧の索引 (build_manifest.py で生成)
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "manifest.json")
+MANIFEST_FIELDS = ["id", "rows", "cols", "file", "difficulty"]
+# 全パズルをまとめたファイル (build_corpus.py で生成)。あればこちらを優先する
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus.bin")
+
+# ゲーム画面に表示できる盤面の大きさ
+# （240x240 の画面に 16px のセルで描き、下の 40px はステータス欄。盤面の外枠の分だけ幅に余白が要る）
+MAX_ROWS = 12
+MAX_COLS = 14
+
+# 本体を読み込んだパズルを何問まで保持するか
+_PUZZLE_CACHE_SIZE = 8
+# 一覧を何問ずつ公開するか（メニューはこの単位で表示が増える）
+_CHUNK_SIZE = 256
+# ブラウザ版 (スレッドなし) で1フレームに一覧の読み込みに使う時間
+_FRAME_BUDGET = 0.004
 
 
 def _parse_numbers(numbers_dict):
@@ -16,65 +40,317 @@ def _parse_numbers(numbers_dict):
     return result
 
 
-def _load_all_puzzles():
-    """全パズルをロードしてキャッシュ"""
-    puzzles = []
-    
+def _normalize_size(size):
+    """サイズの正規化 (int -> [int, int])"""
+    if isinstance(size, int):
+        return [size, size]
+    return size
+
+
+def read_manifest(manifest_path):
+    """manifest.json の各パズルを dict のリストで返す（読めなければ None）"""
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        fields = manifest["fields"]
+        return [dict(zip(fields, row)) for row in manifest["puzzles"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _list_data_files():
     if not os.path.exists(DATA_DIR):
-        return puzzles
-    
-    for filename in sorted(os.listdir(DATA_DIR)):
-        if not filename.endswith(".json"):
+        return []
+    return sorted(filename for filename in os.listdir(DATA_DIR) if filename.endswith(".json"))
+
+
+def _data_changed_since(path, filenames):
+    """data/ のファイルのどれかが path より後に書き換えられていれば True"""
+    built = os.path.getmtime(path)
+    return any(os.path.getmtime(os.path.join(DATA_DIR, filename)) > built for filename in filenames)
+
+
+def _open_corpus(filenames):
+    """corpus.bin を開く。ないか、data/ のファイルと食い違うときは None
+
+    data/ のファイルの組が違うか、corpus.bin を作ったあとに書き換えたファイルがあれば古いとみなす。
+    """
+    if not os.path.exists(CORPUS_PATH):
+        return None
+    try:
+        corpus = PackedCorpus.open(CORPUS_PATH)
+        # data/ を含めない配布版では corpus.bin だけを使う
+        outdated = filenames and (
+            sorted(f"{corpus.entry(i)[0]}.json" for i in range(len(corpus))) != filenames
+            or _data_changed_since(CORPUS_PATH, filenames)
+        )
+    except (OSError, ValueError) as e:
+        # CorpusFormatError も ValueError
+        print(f"Error loading corpus.bin: {e}")
+        return None
+
+    if outdated:
+        print("corpus.bin is outdated; using puzzle files (run build_corpus.py)")
+        return None
+    return corpus
+
+
+def _iter_corpus_entries(corpus):
+    for index in range(len(corpus)):
+        puzzle_id, rows, cols, difficulty = corpus.entry(index)
+        yield {
+            "id": puzzle_id,
+            "rows": rows,
+            "cols": cols,
+            "file": None,
+            "difficulty": difficulty,
+            "index": index,
+        }
+
+
+def _iter_scanned_entries(filenames):
+    """manifest が使えないときに全ファイルを1つずつ読んで一覧を作る"""
+    for filename in filenames:
+        puzzle = _read_puzzle_file(filename)
+        if puzzle is None:
             continue
-        
-        filepath = os.path.join(DATA_DIR, filename)
+        size = puzzle["size"]
+        yield {
+            "id": puzzle["id"],
+            "rows": size[0],
+            "cols": size[1],
+            "file": filename,
+            "difficulty": None,
+            "index": None,
+        }
+
+
+def _iter_index_entries():
+    """一覧の項目をファイル名順（サイズ順・番号順）に1つずつ返す
+
+    corpus.bin → manifest.json → 全ファイルの順に使えるものから一覧を作る。
+    パズルの追加後に作り直していない（data/ と食い違う）ものは使わない。
+    """
+    global _CORPUS
+    filenames = _list_data_files()
+    _CORPUS = _open_corpus(filenames)
+    if _CORPUS is not None:
+        yield from _iter_corpus_entries(_CORPUS)
+        return
+
+    entries = read_manifest(MANIFEST_PATH)
+    if entries is None or sorted(entry["file"] for entry in entries) != filenames:
+        print("manifest.json is missing or outdated; scanning puzzle files (run build_manifest.py)")
+        yield from _iter_scanned_entries(filenames)
+        return
+
+    # ファイル名ソートで自動的にサイズ順・番号順に並ぶ
+    entries.sort(key=lambda entry: entry["file"])
+    for entry in entries:
+        entry["index"] = None
+        yield entry
+
+
+def parse_puzzle_data(puzzle_data):
+    """JSONのパズルを {"id", "size": [rows, cols], "numbers": {(r, c): 数字}} に変換する"""
+    # 必要なフィールドの確認
+    if "id" not in puzzle_data or "size" not in puzzle_data or "numbers" not in puzzle_data:
+        return None
+
+    return {
+        "id": puzzle_data["id"],
+        "size": _normalize_size(puzzle_data["size"]),
+        "numbers": _parse_numbers(puzzle_data["numbers"])
+    }
+
+
+def _read_puzzle_file(filename):
+    """パズルファイルを1つ読み込む（読めなければ None）"""
+    filepath = os.path.join(DATA_DIR, filename)
+    try:
+        with open(filepath, "r") as f:
+            return parse_puzzle_data(json.load(f))
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return None
+
+
+# 本体は遊ぶときに1問ずつ読み込み、最近のものだけ残す
+@lru_cache(maxsize=_PUZZLE_CACHE_SIZE)
+def _load_body(filename, corpus_index):
+    if corpus_index is not None:
         try:
-            with open(filepath, "r") as f:
-                puzzle_data = json.load(f)
-            
-            # 必要なフィールドの確認
-            if "id" not in puzzle_data or "size" not in puzzle_data or "numbers" not in puzzle_data:
-                continue
-            
-            # サイズの正規化 (int -> [int, int])
-            size = puzzle_data["size"]
-            if isinstance(size, int):
-                size = [size, size]
-            
-            puzzles.append({
-                "id": puzzle_data["id"],
-                "size": size,
-                "numbers": _parse_numbers(puzzle_data["numbers"])
+            return _CORPUS.puzzle(corpus_index)
+        except CorpusFormatError as e:
+            print(f"Error loading corpus.bin: {e}")
+            return None
+    return _read_puzzle_file(filename)
+
+
+# 初回アクセス時にキャッシュ
+_CORPUS = None
+
+
+def _size_key(rows, cols):
+    return f"{rows:02d}x{cols:02d}"
+
+
+class _IndexBuilder:
+    """一覧・id の索引・サイズごとのグループを少しずつ作る
+
+    step() を呼ぶたびに一覧を _CHUNK_SIZE 問ずつ読み、その時点までの
+    グループを読み取り専用のスナップショット (groups) として公開する。
+    一覧はサイズ順に届くので、グループは後ろに追加されるだけで並びは変わらない。
+    """
+
+    def __init__(self):
+        self.entries = _iter_index_entries()
+        self.entries_by_id = {}
+        self.records = []
+        self.records_by_id = {}
+        self.groups = ()
+        self.done = False
+        self._group_puzzles = {}
+        self._lock = threading.Lock()
+
+    def step(self, deadline=None):
+        """一覧を1チャンク (deadline を指定したらその時刻まで) 読む。まだ続きがあれば True を返す"""
+        with self._lock:
+            if self.done:
+                return False
+            changed = set()
+            finished = False
+            for _ in range(_CHUNK_SIZE):
+                entry = next(self.entries, None)
+                if entry is None:
+                    finished = True
+                    break
+                self._add(entry, changed)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+            if changed:
+                self._publish(changed)
+            # 最後のグループを公開してから終わったことにする
+            self.done = finished
+            return not finished
+
+    def _add(self, entry, changed):
+        # 呼び出し側で書き換えられないよう、一覧の項目は読み取り専用の dict にする
+        record = MappingProxyType({
+            "id": entry["id"],
+            "size": (entry["rows"], entry["cols"]),
+            "difficulty": entry["difficulty"],
+        })
+        self.entries_by_id[entry["id"]] = entry
+        self.records.append(record)
+        self.records_by_id[entry["id"]] = record
+
+        size_key = _size_key(entry["rows"], entry["cols"])
+        self._group_puzzles.setdefault(size_key, []).append(record)
+        changed.add(size_key)
+
+    def _publish(self, changed):
+        """変わったグループだけ作り直し、グループの tuple を差し替える"""
+        groups = {group["size_key"]: group for group in self.groups}
+        for size_key in changed:
+            puzzles = tuple(self._group_puzzles[size_key])
+            rows, cols = puzzles[0]["size"]
+            groups[size_key] = MappingProxyType({
+                "size_key": size_key,
+                "size_label": f"{rows}x{cols}",
+                "puzzles": puzzles,
             })
-        except Exception as e:
-            print(f"Error loading {filename}: {e}")
-            continue
-    
-    return puzzles
+        self.groups = tuple(groups[size_key] for size_key in sorted(groups))
+
+    def run(self):
+        while self.step():
+            pass
 
 
-# モジュール読み込み時にキャッシュ
-_PUZZLE_CACHE = None
+_BUILDER = None
+_THREAD = None
+_RECORDS = None
 
 
-def _get_puzzles():
-    """キャッシュされたパズルリストを取得"""
-    global _PUZZLE_CACHE
-    if _PUZZLE_CACHE is None:
-        _PUZZLE_CACHE = _load_all_puzzles()
-    return _PUZZLE_CACHE
+def start_loading():
+    """一覧の読み込みを始める（何度呼んでもよい）
+
+    スレッドが使える環境では別スレッドで最後まで読む。
+    ブラウザ版 (emscripten) では update_loading() で1フレームずつ進める。
+    """
+    global _BUILDER, _THREAD
+    if _BUILDER is not None:
+        return
+    _BUILDER = _IndexBuilder()
+    if sys.platform != "emscripten":
+        _THREAD = threading.Thread(target=_BUILDER.run, daemon=True)
+        _THREAD.start()
+
+
+def update_loading(max_seconds=_FRAME_BUDGET):
+    """スレッドなしの環境で、max_seconds まで一覧の読み込みを進める
+
+    読み込みが終わっていれば True を返す。
+    """
+    start_loading()
+    if _THREAD is None:
+        deadline = time.perf_counter() + max_seconds
+        while _BUILDER.step(deadline) and time.perf_counter() < deadline:
+            pass
+    return _BUILDER.done
+
+
+def loading_progress():
+    """(読み込んだパズル数, 読み込みが終わったか) を返す"""
+    start_loading()
+    return len(_BUILDER.records), _BUILDER.done
+
+
+def get_loaded_groups():
+    """読み込み中でも待たずに、その時点までのサイズごとのグループを返す"""
+    start_loading()
+    return _BUILDER.groups
+
+
+def _ensure_index():
+    """一覧を最後まで読み込む（読み込み中なら終わるまで待つ）"""
+    global _RECORDS
+    if _RECORDS is not None:
+        return
+    start_loading()
+    if _THREAD is not None:
+        _THREAD.join()
+    else:
+        _BUILDER.run()
+    _RECORDS = tuple(_BUILDER.records)
 
 
 def get_puzzle_list():
-    """利用可能なパズルのリストを返す"""
-    puzzles = _get_puzzles()
-    return [{"id": p["id"], "size": p["size"]} for p in puzzles]
+    """利用可能なパズルの一覧 ({"id", "size", "difficulty"} の tuple) を返す"""
+    _ensure_index()
+    return _RECORDS
+
+
+def get_puzzle_record(puzzle_id):
+    """指定されたIDの一覧の項目を返す（なければ None）"""
+    _ensure_index()
+    return _BUILDER.records_by_id.get(puzzle_id)
+
+
+def get_puzzle_groups():
+    """サイズごとのグループ ({"size_key", "size_label", "puzzles"} の tuple) を返す"""
+    _ensure_index()
+    return _BUILDER.groups
 
 
 def load_puzzle(puzzle_id):
     """指定されたIDのパズルデータを読み込む"""
-    puzzles = _get_puzzles()
-    for puzzle in puzzles:
-        if puzzle["id"] == puzzle_id:
-            return puzzle
-    return None
+    # 読み込み済みのパズルなら一覧の残りを待たない
+    start_loading()
+    entry = _BUILDER.entries_by_id.get(puzzle_id)
+    if entry is None:
+        _ensure_index()
+        entry = _BUILDER.entries_by_id.get(puzzle_id)
+        if entry is None:
+            return None
+    return _load_body(entry["file"], entry["index"])
@@ -0,0 +1,536 @@
+"""
+ナンバーリンクのソルバー
+
+1. 制約伝播: セルの線の本数（数字は1本、空白は2本）・線の色・閉路の禁止から
+   確定する線をあらかじめ決めておく
+2. 探索: 盤面を行優先で1セルずつ走査し、走査済みの領域と未走査の領域の境界
+   （フロンティア）を横切る線の種類だけを状態として持つ。
+   境界の状態は列ごとの値を整数1つに詰めたビット列で表し、
+   調べた状態の解の数は置換表に記録して再探索しない
+3. 盤面の向き: 走査する向きによって状態数が大きく変わるので、
+   回転・反転した8通りの盤面を少しずつ交互に探索し、最初に終わった結果を使う。
+   数字が走査の早い位置にある向きほど状態数が少なくなりやすいので、その向きを重点的に探索する
+
+境界の値:
+    0       線なし
+    1..K    色（数字）が確定している線
+    K+1     どの数字にもつながっていない線の左側の端 "("
+    K+2     どの数字にもつながっていない線の右側の端 ")"
+
+走査済みの領域の線は交差しないので、数字につながっていない線の両端は
+境界に沿って括弧のように入れ子に並ぶ。
+
+解はすべてのセルを線で埋めるもの（収録しているパズルの形式）を探す。
+"""
+import sys
+
+# 1列分の値に使うビット数
+_LABEL_BITS = 8
+_LABEL_MASK = (1 << _LABEL_BITS) - 1
+
+# 線の状態 (右・下の線を セル番号 * 2 + 縦線かどうか で管理する)
+_OFF = 0
+_ON = 1
+_UNKNOWN = 2
+
+# check_uniqueness() の判定結果
+UNIQUE = "unique"
+MULTIPLE = "multiple"
+UNSOLVABLE = "unsolvable"
+UNDECIDED = "undecided"
+
+# 盤面の向きごとの最初の探索ノード数の上限（足りなければ倍にして続きから探索する）
+_INITIAL_BUDGET = 1000
+# 数字が最も早く現れる向きに割り当てる探索ノード数の倍率
+_PRIMARY_WEIGHT = 16
+
+
+def _parse_numbers(numbers):
+    """{"r,c": n} 形式と {(r, c): n} 形式のどちらも受け付ける"""
+    result = {}
+    for pos, num in numbers.items():
+        if isinstance(pos, str):
+            r, c = pos.split(",")
+            pos = (int(r), int(c))
+        result[pos] = num
+    return result
+
+
+def _normalize_size(size):
+    if isinstance(size, int):
+        return size, size
+    return size[0], size[1]
+
+
+class _Contradiction(Exception):
+    """制約伝播中に解がないことが分かった"""
+
+
+class _BudgetExceeded(Exception):
+    """探索ノード数の上限に達した"""
+
+
+class _Search:
+    """1つの向きの盤面に対する探索の状態"""
+
+    def __init__(self, rows, cols, number_cells, limit):
+        self.rows = rows
+        self.cols = cols
+        self.limit = limit
+        self.size = rows * cols
+        self.nodes = 0
+        self.budget = None
+        self.result = None
+
+        # 数字を 1..K の色に振り直す
+        colors = {}
+        for pos in sorted(number_cells):
+            num = number_cells[pos]
+            if num not in colors:
+                colors[num] = len(colors) + 1
+        self.num_colors = len(colors)
+        self.open_label = self.num_colors + 1
+        self.close_label = self.num_colors + 2
+
+        # セル番号 -> 色 (数字セルでなければ 0)
+        self.cell_color = [0] * (rows * cols)
+        for (r, c), num in number_cells.items():
+            self.cell_color[r * cols + c] = colors[num]
+
+        # 各色の端点がちょうど2つでなければ解けない
+        endpoint_count = {}
+        for color in self.cell_color:
+            if color:
+                endpoint_count[color] = endpoint_count.get(color, 0) + 1
+        self.valid = all(count == 2 for count in endpoint_count.values())
+        if self.valid:
+            self.valid = self._propagate()
+
+        # 置換表: (セル番号, 境界の状態, 左からの線) -> 見つかった解の数 (limit で打ち切り)
+        self.table = {}
+        # 解の復元用: (セル番号, 境界の状態, 左からの線) -> 解につながる次の状態と選択
+        self.choice = {}
+
+    # ---- 制約伝播 ----
+
+    def _cell_edges(self, index):
+        """セルにつながりうる線の番号を返す"""
+        cols = self.cols
+        r, c = divmod(index, cols)
+        edges = []
+        if c + 1 < cols:
+            edges.append(index * 2)
+        if c > 0:
+            edges.append((index - 1) * 2)
+        if r + 1 < self.rows:
+            edges.append(index * 2 + 1)
+        if r > 0:
+            edges.append((index - cols) * 2 + 1)
+        return edges
+
+    def _edge_cells(self, edge):
+        index = edge >> 1
+        return index, index + (self.cols if edge & 1 else 1)
+
+    def _propagate(self):
+        """確定する線を求め、セルごとに必ず出す線と出せない線を記録する
+
+        解がないことが分かった場合は False を返す。
+        """
+        size = self.rows * self.cols
+        state = bytearray([_OFF]) * (size * 2)
+        incident = [self._cell_edges(index) for index in range(size)]
+        for edges in incident:
+            for edge in edges:
+                state[edge] = _UNKNOWN
+        self.edge_state = state
+        self.known_color = list(self.cell_color)
+
+        try:
+            changed = True
+            while changed:
+                changed = self._apply_degree_rule(incident)
+                changed |= self._apply_fragment_rule()
+        except _Contradiction:
+            return False
+
+        # 右=1, 下=2 のビットで表す
+        self.required = []
+        self.forbidden = []
+        for index in range(size):
+            required = forbidden = 0
+            for bit, edge in ((1, index * 2), (2, index * 2 + 1)):
+                if state[edge] == _ON:
+                    required |= bit
+                elif state[edge] == _OFF:
+                    forbidden |= bit
+            self.required.append(required)
+            self.forbidden.append(forbidden)
+        return True
+
+    def _apply_degree_rule(self, incident):
+        """数字セルは線1本、空白セルは線2本になるように未確定の線を決める"""
+        state = self.edge_state
+        changed = False
+        for index, edges in enumerate(incident):
+            need = 1 if self.cell_color[index] else 2
+            on = 0
+            unknown = []
+            for edge in edges:
+                if state[edge] == _ON:
+                    on += 1
+                elif state[edge] == _UNKNOWN:
+                    unknown.append(edge)
+            if on > need or on + len(unknown) < need:
+                raise _Contradiction
+            if not unknown:
+                continue
+            if on == need:
+                value = _OFF
+            elif on + len(unknown) == need:
+                value = _ON
+            else:
+                continue
+            for edge in unknown:
+                state[edge] = value
+            changed = True
+        return changed
+
+    def _apply_fragment_rule(self):
+        """確定した線のつながりから、閉路になる線と違う色をつなぐ線を除く"""
+        state = self.edge_state
+        size = self.rows * self.cols
+        parent = list(range(size))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for edge in range(size * 2):
+            if state[edge] == _ON:
+                a, b = self._edge_cells(edge)
+                root_a, root_b = find(a), find(b)
+                if root_a == root_b:
+                    raise _Contradiction
+                parent[root_a] = root_b
+
+        # 線のかたまりごとの色
+        fragment_color = {}
+        for index, color in enumerate(self.cell_color):
+            if color:
+                root = find(index)
+                if fragment_color.get(root, color) != color:
+                    raise _Contradiction
+                fragment_color[root] = color
+        for index in range(size):
+            self.known_color[index] = fragment_color.get(find(index), 0)
+
+        changed = False
+        for edge in range(size * 2):
+            if state[edge] != _UNKNOWN:
+                continue
+            a, b = self._edge_cells(edge)
+            root_a, root_b = find(a), find(b)
+            color_a = fragment_color.get(root_a, 0)
+            color_b = fragment_color.get(root_b, 0)
+            if root_a == root_b or (color_a and color_b and color_a != color_b):
+                state[edge] = _OFF
+                changed = True
+        return changed
+
+    # ---- 探索 ----
+
+    def run(self, budget=None):
+        """解の数を limit まで数える
+
+        budget を指定すると探索ノード数がそれを超えた時点で中断して None を返す。
+        置換表は残るので、もう一度呼ぶと続きから探索する。
+        """
+        if self.result is not None:
+            return self.result
+        if not self.valid:
+            self.result = 0
+            return 0
+
+        self.budget = budget if budget is not None else float("inf")
+        # 再帰が深くなる大きな盤面でも探索できるよう上限を一時的に引き上げる
+        needed = self.size + 100
+        old_limit = sys.getrecursionlimit()
+        if old_limit < needed:
+            sys.setrecursionlimit(needed)
+        try:
+            self.result = self._count(0, 0, 0)
+        except _BudgetExceeded:
+            return None
+        finally:
+            sys.setrecursionlimit(old_limit)
+        return self.result
+
+    def _count(self, index, profile, left):
+        """index 番目のセル以降を埋める方法の数を limit まで数える"""
+        if index == self.size:
+            return 0 if profile or left else 1
+
+        key = (index, profile, left)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        self.nodes += 1
+        if self.nodes > self.budget:
+            raise _BudgetExceeded
+
+        total = 0
+        limit = self.limit
+        for next_profile, next_left, choice in self._transitions(index, profile, left):
+            found = self._count(index + 1, next_profile, next_left)
+            if found:
+                if not total:
+                    self.choice[key] = (next_profile, next_left, choice)
+                total += found
+                if total >= limit:
+                    total = limit
+                    break
+
+        self.table[key] = total
+        return total
+
+    def _transitions(self, index, profile, left):
+        """セルから線を出す方向 (右=1, 下=2) ごとに次の境界の状態を返す"""
+        num_colors = self.num_colors
+        c = index % self.cols
+        shift = c * _LABEL_BITS
+        up = (profile >> shift) & _LABEL_MASK
+        base = profile & ~(_LABEL_MASK << shift)
+        color = self.cell_color[index]
+
+        # 制約伝播で色が分かっているセルに違う色の線は入れない
+        known = self.known_color[index]
+        if known and (
+            (up and up <= num_colors and up != known)
+            or (left and left <= num_colors and left != known)
+        ):
+            return ()
+
+        if up and left:
+            # 2本の線がこのセルでつながる（数字セルには2本入れない）
+            if color:
+                return ()
+            results = self._join(base, c, left, up)
+        elif up or left:
+            label = up or left
+            if color:
+                # 数字セル: 入ってきた線で終わる
+                if label == color:
+                    results = [(base, 0, 0)]
+                elif label > num_colors:
+                    # 数字につながっていない線の反対側の端をこの色にする
+                    partner = self._partner(base, c, label, from_left=not up)
+                    results = [(self._set(base, partner, color), 0, 0)]
+                else:
+                    return ()
+            else:
+                # 空白セル: 右か下に線を伸ばす
+                results = [(base, label, 1), (base | label << shift, 0, 2)]
+        elif color:
+            results = [(base, color, 1), (base | color << shift, 0, 2)]
+        else:
+            # 新しい線の両端を下 "(" と右 ")" に出す
+            results = [(base | self.open_label << shift, self.close_label, 3)]
+
+        required = self.required[index]
+        forbidden = self.forbidden[index]
+        return [
+            result for result in results
+            if not result[2] & forbidden and result[2] & required == required
+        ]
+
+    def _join(self, base, c, left, up):
+        """左と上から入ってきた線をつなぐ"""
+        num_colors = self.num_colors
+        if left <= num_colors and up <= num_colors:
+            # 同じ色どうしならつながって完成
+            return [(base, 0, 0)] if left == up else []
+        if up <= num_colors:
+            partner = self._partner(base, c, left, from_left=True)
+            return [(self._set(base, partner, up), 0, 0)]
+        if left <= num_colors:
+            partner = self._partner(base, c, up, from_left=False)
+            return [(self._set(base, partner, left), 0, 0)]
+
+        open_label = self.open_label
+        if left == open_label and up != open_label:
+            # 同じ線の両端なので閉路になる
+            return []
+        if left == open_label:
+            # "( (" -> 内側の ")" が外側の ")" と対になるので "(" に変える
+            partner = self._partner(base, c, up, from_left=False)
+            return [(self._set(base, partner, open_label), 0, 0)]
+        if up != open_label:
+            # ") )" -> 内側の "(" が外側の "(" と対になるので ")" に変える
+            partner = self._partner(base, c, left, from_left=True)
+            return [(self._set(base, partner, self.close_label), 0, 0)]
+        # ") (" -> 外側どうしがそのまま対になる
+        return [(base, 0, 0)]
+
+    def _partner(self, profile, c, label, from_left):
+        """境界上の括弧 label と対になる端の列番号を返す
+
+        from_left が True なら列 c の左から入ってきた線、False なら列 c の上から入ってきた線。
+        profile の列 c は空にしておくこと。
+        """
+        open_label = self.open_label
+        close_label = self.close_label
+        depth = 1
+        if label == open_label:
+            # 右側を探す（左からの線は列 c の上の線より左にある）
+            start = c if from_left else c + 1
+            for i in range(start, self.cols):
+                value = (profile >> (i * _LABEL_BITS)) & _LABEL_MASK
+                if value == open_label:
+                    depth += 1
+                elif value == close_label:
+                    depth -= 1
+                    if depth == 0:
+                        return i
+        else:
+            for i in range(c - 1, -1, -1):
+                value = (profile >> (i * _LABEL_BITS)) & _LABEL_MASK
+                if value == close_label:
+                    depth += 1
+                elif value == open_label:
+                    depth -= 1
+                    if depth == 0:
+                        return i
+        raise AssertionError("unmatched path end")
+
+    @staticmethod
+    def _set(profile, column, value):
+        shift = column * _LABEL_BITS
+        return profile & ~(_LABEL_MASK << shift) | value << shift
+
+    def solution_edges(self):
+        """run() の後に呼び、見つかった解の1つをエッジの集合として返す"""
+        edges = set()
+        index, profile, left = 0, 0, 0
+        cols = self.cols
+        while index < self.rows * cols:
+            profile, left, choice = self.choice[(index, profile, left)]
+            r, c = divmod(index, cols)
+            if choice & 1:
+                edges.add(((r, c), (r, c + 1)))
+            if choice & 2:
+                edges.add(((r, c), (r + 1, c)))
+            index += 1
+        return edges
+
+
+def _orientations(rows, cols):
+    """盤面の回転・反転 8 通りについて (変換後のサイズ, 座標の変換) を返す"""
+    result = []
+    for transpose in (False, True):
+        size = (cols, rows) if transpose else (rows, cols)
+        for flip_r in (False, True):
+            for flip_c in (False, True):
+                def transform(pos, transpose=transpose, flip_r=flip_r, flip_c=flip_c, size=size):
+                    r, c = pos
+                    if transpose:
+                        r, c = c, r
+                    if flip_r:
+                        r = size[0] - 1 - r
+                    if flip_c:
+                        c = size[1] - 1 - c
+                    return (r, c)
+
+                def inverse(pos, transpose=transpose, flip_r=flip_r, flip_c=flip_c, size=size):
+                    r, c = pos
+                    if flip_r:
+                        r = size[0] - 1 - r
+                    if flip_c:
+                        c = size[1] - 1 - c
+                    if transpose:
+                        r, c = c, r
+                    return (r, c)
+
+                result.append((size, transform, inverse))
+    return result
+
+
+def _search(puzzle, limit, max_nodes=None):
+    """8通りの向きを交互に探索し、(解の数, 解のエッジ, 探索ノード数) を返す
+
+    max_nodes を指定すると、全部の向きの探索ノード数の合計がそれを超えた時点で
+    あきらめて解の数を None にする。
+    """
+    rows, cols = _normalize_size(puzzle["size"])
+    number_cells = _parse_numbers(puzzle["numbers"])
+
+    # 数字セルの走査順の合計が小さい（数字が早く現れる）向きから並べる
+    orientations = []
+    for size, transform, inverse in _orientations(rows, cols):
+        cells = {transform(pos): num for pos, num in number_cells.items()}
+        order = sum(r * size[1] + c for r, c in cells)
+        orientations.append((order, size, cells, inverse))
+    orientations.sort(key=lambda item: item[0])
+    weights = [_PRIMARY_WEIGHT] + [1] * (len(orientations) - 1)
+
+    # 探索は必要になった向きから作る
+    searches = [None] * len(orientations)
+    budget = _INITIAL_BUDGET
+    while True:
+        for i, (_, size, cells, inverse) in enumerate(orientations):
+            if searches[i] is None:
+                searches[i] = _Search(size[0], size[1], cells, limit)
+            search = searches[i]
+            found = search.run(budget * weights[i])
+            nodes = sum(other.nodes for other in searches if other is not None)
+            if found is None:
+                if max_nodes is not None and nodes > max_nodes:
+                    return None, None, nodes
+                continue
+
+            if not found:
+                return 0, None, nodes
+            edges = set()
+            for pos1, pos2 in search.solution_edges():
+                pos1, pos2 = sorted((inverse(pos1), inverse(pos2)))
+                edges.add((pos1, pos2))
+            return found, edges, nodes
+        budget *= 2
+
+
+def solve(puzzle):
+    """パズルを解き、解のエッジの集合を返す（解がなければ None）
+
+    puzzle はパズルファイルと同じ {"size": [rows, cols], "numbers": {...}} 形式。
+    エッジは NumberlinkBoard.paths と同じ ((r1, c1), (r2, c2)) 形式。
+    """
+    return _search(puzzle, limit=1)[1]
+
+
+def count_solutions(puzzle, limit=2, max_nodes=None):
+    """解の数を limit 個まで数える（max_nodes ノードで終わらなければ None）"""
+    return _search(puzzle, limit, max_nodes)[0]
+
+
+def check_uniqueness(puzzle, max_nodes=None):
+    """解が1つだけか判定し、UNIQUE / MULTIPLE / UNSOLVABLE のいずれかを返す
+
+    2つ目の解が見つかった時点で探索を打ち切る。
+    max_nodes ノードで判定できなければ UNDECIDED を返す。
+    """
+    found = count_solutions(puzzle, limit=2, max_nodes=max_nodes)
+    if found is None:
+        return UNDECIDED
+    if found == 0:
+        return UNSOLVABLE
+    if found == 1:
+        return UNIQUE
+    return MULTIPLE
+
+
+def solve_with_stats(puzzle, limit=1, max_nodes=None):
+    """解の数 (limit まで)・解のエッジ・探索したノード数を返す"""
+    return _search(puzzle, limit, max_nodes)
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+import pyxel
+from puzzles.puzzle_loader import load_puzzle
+from utils.colors import GRAY, WHITE, get_color_for_number
+
+# サムネイルを描き込む画像バンク（盤面の静的レイヤーはバンク2）
+THUMBNAIL_BANK = 1
+# サムネイル1枚の大きさ（画像バンク 256x256 に 8x8 = 64枚並ぶ）
+THUMBNAIL_SIZE = 32
+# 1フレームに新しく描くサムネイルの上限（スクロール中も処理が重くならないように）
+MAX_RENDERS_PER_FRAME = 2
+
+
+class ThumbnailAtlas:
+    """パズルの縮小図を画像バンクにまとめて描き、最近使ったものだけを残す
+
+    画像バンクを THUMBNAIL_SIZE 四方の枠に区切り、必要になったパズルだけを描く。
+    枠が足りなくなったら最も長く使っていないものを上書きするので、
+    パズルがいくつあっても使うメモリは画像バンク1枚分で変わらない。
+    """
+
+    def __init__(self, bank=THUMBNAIL_BANK, size=THUMBNAIL_SIZE, max_renders=MAX_RENDERS_PER_FRAME):
+        self.bank = bank
+        self.size = size
+        self.max_renders = max_renders
+        self.columns = 256 // size
+        self.capacity = self.columns * self.columns
+        # パズルID -> 枠の番号（先頭ほど長く使っていない）
+        self.slots = OrderedDict()
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        self.renders_left = max_renders
+        self.last_frame_renders = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def begin_frame(self):
+        """フレームの最初に呼び、このフレームで描ける枚数を戻す"""
+        self.last_frame_renders = self.max_renders - self.renders_left
+        self.renders_left = self.max_renders
+
+    def _slot_position(self, slot):
+        return slot % self.columns * self.size, slot // self.columns * self.size
+
+    def get(self, puzzle_id):
+        """サムネイルの画像バンク上の位置 (u, v) を返す
+
+        まだ描いておらず、このフレームで描ける枚数を使い切っていたら None。
+        """
+        slot = self.slots.get(puzzle_id)
+        if slot is not None:
+            self.slots.move_to_end(puzzle_id)
+            return self._slot_position(slot)
+        if self.renders_left <= 0:
+            return None
+
+        puzzle = load_puzzle(puzzle_id)
+        if puzzle is None:
+            return None
+        self.renders_left -= 1
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            _, slot = self.slots.popitem(last=False)
+        self.slots[puzzle_id] = slot
+        u, v = self._slot_position(slot)
+        self._render(u, v, puzzle)
+        return u, v
+
+    def _render(self, u, v, puzzle):
+        """数字セルを色付きの四角で描いた縮小図を (u, v) の枠に描く"""
+        image = pyxel.images[self.bank]
+        rows, cols = puzzle["size"]
+        cell = max(1, (self.size - 2) // max(rows, cols))
+        width = cols * cell + 2
+        height = rows * cell + 2
+        # 盤面を枠の中央に置く
+        x0 = u + (self.size - width) // 2
+        y0 = v + (self.size - height) // 2
+
+        image.rect(u, v, self.size, self.size, WHITE)
+        image.rectb(x0, y0, width, height, GRAY)
+        for (r, c), number in puzzle["numbers"].items():
+            image.rect(x0 + 1 + c * cell, y0 + 1 + r * cell, cell, cell, get_color_for_number(number))
+
+    def draw(self, x, y, puzzle_id):
+        """サムネイルを (x, y) に描く（まだ描けていなければ枠だけ）"""
+        position = self.get(puzzle_id)
+        if position is None:
+            pyxel.rectb(x, y, self.size, self.size, GRAY)
+            return
+        pyxel.blt(x, y, self.bank, position[0], position[1], self.size, self.size)
@@ -0,0 +1,43 @@
+import pyxel
+
+# 呼び出し回数を数える pyxel の描画命令
+DRAW_PRIMITIVES = (
+    "cls", "pset", "line", "rect", "rectb", "circ", "circb",
+    "tri", "trib", "text", "blt", "bltm",
+)
+
+
+class DrawCallCounter:
+    """pyxel の描画命令を差し替えて、フレームごとの呼び出し回数を数える"""
+
+    def __init__(self):
+        self.count = 0
+        self.last_frame_count = 0
+        self._originals = {}
+
+    def install(self):
+        """描画命令を回数を数えるラッパーに差し替える"""
+        if self._originals:
+            return
+        for name in DRAW_PRIMITIVES:
+            original = getattr(pyxel, name)
+            self._originals[name] = original
+            setattr(pyxel, name, self._wrap(original))
+        self.count = 0
+
+    def uninstall(self):
+        """描画命令を元に戻す"""
+        for name, original in self._originals.items():
+            setattr(pyxel, name, original)
+        self._originals = {}
+
+    def _wrap(self, func):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return func(*args, **kwargs)
+        return counted
+
+    def end_frame(self):
+        """1フレーム分の回数を確定してカウンタをリセットする"""
+        self.last_frame_count = self.count
+        self.count = 0
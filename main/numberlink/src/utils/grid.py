@@ -1,13 +1,13 @@
 import pyxel
 from utils.colors import GRAY
 
-def draw_grid(offset_x, offset_y, grid_rows, grid_cols, cell_size):
-    """グリッドを描画する共通関数"""
+def draw_grid(offset_x, offset_y, grid_rows, grid_cols, cell_size, target=pyxel):
+    """グリッドを描画する共通関数（target に画像バンクを渡すとそこに描画）"""
     # 縦線を描画
     for i in range(grid_cols + 1):
         # 周囲の縁（最初と最後の線）は実線
         if i == 0 or i == grid_cols:
-            pyxel.line(
+            target.line(
                 offset_x + i * cell_size, 
                 offset_y, 
                 offset_x + i * cell_size, 
@@ -16,13 +16,13 @@ def draw_grid(offset_x, offset_y, grid_rows, grid_cols, cell_size):
         else:
             # 内側のグリッド線は点線に
             for j in range(0, grid_rows * cell_size, 4):
-                pyxel.pset(offset_x + i * cell_size, offset_y + j, GRAY)
+                target.pset(offset_x + i * cell_size, offset_y + j, GRAY)
     
     # 横線を描画
     for i in range(grid_rows + 1):
         # 周囲の縁（最初と最後の線）は実線
         if i == 0 or i == grid_rows:
-            pyxel.line(
+            target.line(
                 offset_x, 
                 offset_y + i * cell_size, 
                 offset_x + grid_cols * cell_size, 
@@ -31,7 +31,7 @@ def draw_grid(offset_x, offset_y, grid_rows, grid_cols, cell_size):
         else:
             # 内側のグリッド線は点線に
             for j in range(0, grid_cols * cell_size, 4):
-                pyxel.pset(offset_x + j, offset_y + i * cell_size, GRAY)
+                target.pset(offset_x + j, offset_y + i * cell_size, GRAY)
 
 def is_adjacent(pos1, pos2):
     """2つの位置が隣接しているかをチェック（上下左右）"""
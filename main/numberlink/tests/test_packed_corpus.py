@@ -0,0 +1,110 @@
+"""
+corpus.bin の読み書きのテスト
+
+使い方:
+    python -m pytest main/numberlink/tests
+    (python -m unittest discover main/numberlink/tests でもよい)
+
+build_corpus.py --verify と同じ読み直し確認に加え、壊れた corpus.bin
+（空・途中で切れている・ヘッダが違う）を開けないこと、そのときゲームが
+manifest.json か data/ の読み込みに切り替えることを確かめる。
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(TESTS_DIR), "src")
+sys.path.insert(0, SRC_DIR)
+
+from build_corpus import verify_corpus
+from puzzles import puzzle_loader
+from puzzles.manifest import build_corpus
+from puzzles.packed_corpus import CorpusFormatError, PackedCorpus, write_corpus
+
+PUZZLES = [
+    {"id": "03x04_001", "size": [3, 4], "numbers": {(0, 0): 1, (2, 3): 1, (0, 3): 2, (2, 0): 2}, "difficulty": 1},
+    {"id": "05x05_001", "size": [5, 5], "numbers": {(0, 0): 1, (4, 4): 1, (1, 2): 200, (3, 2): 200}, "difficulty": None},
+]
+
+
+class PackedCorpusTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "corpus.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def _write_bytes(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def _packed_bytes(self):
+        write_corpus(self.path, PUZZLES)
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_round_trip(self):
+        write_corpus(self.path, PUZZLES)
+        self.assertEqual(verify_corpus(self.path, PUZZLES), [])
+        corpus = PackedCorpus.open(self.path)
+        self.assertEqual(corpus.entry(1), ("05x05_001", 5, 5, None))
+        self.assertEqual(corpus.index_of("05x05_001"), 1)
+        self.assertIsNone(corpus.index_of("missing"))
+
+    def test_round_trip_puzzle_data(self):
+        """収録パズルをすべて書き出して読み直す（build_corpus.py --verify と同じ確認）"""
+        puzzles = build_corpus(puzzle_loader.DATA_DIR, puzzle_loader.MANIFEST_PATH, self.path)
+        self.assertTrue(puzzles)
+        self.assertEqual(verify_corpus(self.path, puzzles), [])
+
+    def test_empty_file(self):
+        self._write_bytes(b"")
+        with self.assertRaises(CorpusFormatError):
+            PackedCorpus.open(self.path)
+
+    def test_truncated_file(self):
+        data = self._packed_bytes()
+        # ヘッダ・索引・最後のパズルの本体のそれぞれの途中で切る
+        for length in (10, 30, len(data) - 1):
+            with self.subTest(length=length):
+                self._write_bytes(data[:length])
+                with self.assertRaises(CorpusFormatError):
+                    PackedCorpus.open(self.path)
+
+    def test_bad_header(self):
+        data = self._packed_bytes()
+        for broken in (b"XXXX" + data[4:], data[:4] + b"\x63\x00" + data[6:]):
+            with self.subTest(header=broken[:6]):
+                self._write_bytes(broken)
+                with self.assertRaises(CorpusFormatError):
+                    PackedCorpus.open(self.path)
+
+    def test_loader_falls_back(self):
+        """壊れた corpus.bin は使わず、data/ のファイルから一覧を作る"""
+        filenames = puzzle_loader._list_data_files()
+        for data in (b"", self._packed_bytes()[:-1], b"XXXX" + bytes(12)):
+            with self.subTest(data=data[:4]):
+                self._write_bytes(data)
+                with mock.patch.object(puzzle_loader, "CORPUS_PATH", self.path):
+                    self.assertIsNone(puzzle_loader._open_corpus(filenames))
+
+    def test_loader_ignores_older_corpus(self):
+        """corpus.bin を作ったあとに書き換えた JSON があれば corpus.bin を使わない"""
+        filenames = puzzle_loader._list_data_files()
+        build_corpus(puzzle_loader.DATA_DIR, puzzle_loader.MANIFEST_PATH, self.path)
+        newest = max(os.path.getmtime(os.path.join(puzzle_loader.DATA_DIR, name)) for name in filenames)
+        with mock.patch.object(puzzle_loader, "CORPUS_PATH", self.path):
+            os.utime(self.path, (newest + 1, newest + 1))
+            self.assertIsNotNone(puzzle_loader._open_corpus(filenames))
+            os.utime(self.path, (newest - 1, newest - 1))
+            self.assertIsNone(puzzle_loader._open_corpus(filenames))
+
+
+if __name__ == "__main__":
+    unittest.main()
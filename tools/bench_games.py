@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+ナンバーリンクと扇型攻撃ゲームを、ウィンドウを開かずに決まった入力で動かしてフレームごとの処理時間を測るベンチマーク
+
+使い方:
+    python tools/bench_games.py [--game numberlink|fan_attack] [--scenario 名前 ...] [--list]
+
+動作:
+    1. シナリオごとに新しいプロセスを起動し、pyxel を tools/headless_pyxel.py に差し替える
+       （2つのゲームはどちらも game.py・main.py を持つので、同じプロセスでは import できない）
+    2. シナリオの入力を1フレームずつ再生しながらゲームを起動し、update() と draw() の時間、
+       画面への描画命令の回数を記録する（乱数は固定するので毎回同じ展開になる）
+    3. シナリオごとに平均・95パーセンタイル・最大を表示する
+
+描画命令は何も描かずに回数だけ数えるので、時間はゲーム側の Python の処理だけを表す。
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+GAME_DIRS = {
+    "numberlink": os.path.join(ROOT_DIR, "main", "numberlink", "src"),
+    "fan_attack": os.path.join(ROOT_DIR, "main", "fan_attack", "src"),
+}
+
+sys.path.insert(0, TOOLS_DIR)
+
+import headless_pyxel as hp
+
+
+# --- ナンバーリンクのシナリオ ---
+
+def _open_10x10_puzzle():
+    """メニューでサイズの絞り込みを 10x10 にして最初の問題を始める"""
+    frames = hp.idle(10)
+    for _ in range(4):
+        frames += hp.tap(hp.KEY_S)
+    return frames + hp.tap(hp.KEY_RETURN) + hp.idle(2)
+
+
+def numberlink_menu_idle():
+    """メニューを表示したまま何もしない"""
+    return hp.idle(240)
+
+
+def numberlink_menu_scroll():
+    """メニューで下キー・上キーを押し続けて一覧の端から端までスクロールする"""
+    return hp.idle(10) + hp.hold(300, hp.KEY_DOWN) + hp.hold(300, hp.KEY_UP)
+
+
+def numberlink_menu_filter():
+    """絞り込みの切り替えと番号ジャンプを繰り返す"""
+    frames = hp.idle(10)
+    for keys in ([hp.KEY_U], [hp.KEY_S], [hp.KEY_S], [hp.KEY_D], [hp.KEY_D], [hp.KEY_1, hp.KEY_2],
+                 [hp.KEY_S], [hp.KEY_S], [hp.KEY_D], [hp.KEY_U]) * 10:
+        for key in keys:
+            frames += hp.tap(key)
+        frames += hp.idle(8)
+    return frames
+
+
+def numberlink_game_idle():
+    """10x10 の問題を始めて何もしない（差分描画で描き直すものがない状態）"""
+    return _open_10x10_puzzle() + hp.idle(240)
+
+
+def numberlink_game_draw():
+    """10x10 の問題で盤面をジグザグに線を引き、元に戻す・やり直す・リセットする"""
+    frames = _open_10x10_puzzle() + hp.tap(hp.KEY_SPACE)
+    for row in range(10):
+        direction = hp.KEY_RIGHT if row % 2 == 0 else hp.KEY_LEFT
+        for _ in range(9):
+            # 無効な移動のアニメーション (4フレーム) の間は入力を受け付けないので少し待つ
+            frames += hp.tap(direction) + hp.idle(4)
+        frames += hp.tap(hp.KEY_DOWN) + hp.idle(4)
+    frames += hp.tap(hp.KEY_SPACE)
+    for key in (hp.KEY_Z, hp.KEY_Y):
+        for _ in range(20):
+            frames += hp.tap(key)
+    return frames + hp.tap(hp.KEY_R) + hp.idle(10)
+
+
+# --- 扇型攻撃ゲームのシナリオ ---
+
+def _circle_mouse(frames, radius, click_every, start=0):
+    """プレイヤーの周りでマウスを回し、click_every フレームごとにクリックする"""
+    result = []
+    for i in range(start, start + frames):
+        angle = i * 0.05
+        mouse = (int(100 + math.cos(angle) * radius), int(100 + math.sin(angle) * radius))
+        keys = frozenset([hp.MOUSE_BUTTON_LEFT]) if i % click_every == 0 else frozenset()
+        result.append(hp.InputFrame(keys, mouse))
+    return result
+
+
+def fan_attack_idle():
+    """攻撃せずに敵が集まってゲームオーバーになるまで待つ"""
+    return hp.idle(900, mouse=(150, 100))
+
+
+def fan_attack_combat():
+    """Wide Fan でマウスを回しながら攻撃し続ける"""
+    return _circle_mouse(1200, 60, click_every=8)
+
+
+def fan_attack_combat_long():
+    """Long Beam に切り替えて攻撃し続ける"""
+    return hp.tap(hp.KEY_SPACE, mouse=(160, 100)) + _circle_mouse(1200, 60, click_every=8, start=2)
+
+
+SCENARIOS = {
+    "numberlink": {
+        "menu_idle": numberlink_menu_idle,
+        "menu_scroll": numberlink_menu_scroll,
+        "menu_filter": numberlink_menu_filter,
+        "game_idle": numberlink_game_idle,
+        "game_draw": numberlink_game_draw,
+    },
+    "fan_attack": {
+        "idle": fan_attack_idle,
+        "combat": fan_attack_combat,
+        "combat_long": fan_attack_combat_long,
+    },
+}
+
+
+def start_game(game):
+    """ゲームを起動する（pyxel.run の中で入力を最後まで再生して戻る）"""
+    if game == "numberlink":
+        # 一覧は別スレッドで読み込まれる。ヘッドレスではフレームの間に待ち時間がなく
+        # 読み込みが追いつかないので、先に最後まで読み込んでおく
+        from puzzles.puzzle_loader import get_puzzle_list
+        get_puzzle_list()
+        from main import NumberlinkApp
+        NumberlinkApp()
+    else:
+        from game import Game
+        Game()
+
+
+def _summary(values):
+    ordered = sorted(values)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def run_child(game, scenario):
+    """子プロセス側: 1つのシナリオを動かして結果を JSON で出力する"""
+    game_dir = GAME_DIRS[game]
+    # ゲームはソースフォルダから起動する前提（リソースファイルの相対パスなど）
+    os.chdir(game_dir)
+    sys.path.insert(0, game_dir)
+    hp.install()
+    random.seed(0)
+    hp.set_script(SCENARIOS[game][scenario]())
+    start_game(game)
+
+    stats = hp.stats
+    print(json.dumps({
+        "frames": len(stats.update_times),
+        "update": _summary(stats.update_times),
+        "draw": _summary(stats.draw_times),
+        "draw_calls": _summary(stats.draw_calls),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--game", choices=sorted(SCENARIOS), help="測るゲーム（省略時は両方）")
+    parser.add_argument("--scenario", nargs="+", help="測るシナリオ（省略時はすべて）")
+    parser.add_argument("--list", action="store_true", help="シナリオの一覧を表示する")
+    parser.add_argument("--child", nargs=2, metavar=("GAME", "SCENARIO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    games = [args.game] if args.game else list(SCENARIOS)
+    if args.list:
+        for game in games:
+            for name, scenario in SCENARIOS[game].items():
+                print(f"{game:<12}{name:<14}{scenario.__doc__}")
+        return
+
+    print("=== ゲームのフレーム処理時間ベンチマーク (ヘッドレス) ===\n")
+    print(f"{'ゲーム':<10}{'シナリオ':<12}{'フレーム':>6}"
+          f"{'update 平均/p95/最大 (ms)':>28}{'draw 平均/p95/最大 (ms)':>28}{'描画命令 平均/最大':>16}")
+    for game in games:
+        for name in args.scenario or SCENARIOS[game]:
+            if name not in SCENARIOS[game]:
+                continue
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", game, name],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            update, draw, calls = result["update"], result["draw"], result["draw_calls"]
+            print(
+                f"{game:<13}{name:<14}{result['frames']:>8}"
+                f"{update['mean'] * 1000:>14.3f}/{update['p95'] * 1000:.3f}/{update['max'] * 1000:.2f}"
+                f"{draw['mean'] * 1000:>14.3f}/{draw['p95'] * 1000:.3f}/{draw['max'] * 1000:.2f}"
+                f"{calls['mean']:>12.1f}/{calls['max']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
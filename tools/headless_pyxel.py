@@ -0,0 +1,263 @@
+"""
+ウィンドウを開かずにゲームを動かすための pyxel の代わりのモジュール
+
+ゲームが使う pyxel の機能 (描画命令・btn/btnp・マウス位置・init/run など) だけを持ち、
+描画命令は何も描かずに呼び出し回数だけを数える。入力はあらかじめ用意した
+フレームごとの入力 (InputFrame のリスト) を順に再生する。
+
+使い方:
+    import headless_pyxel
+    headless_pyxel.install()          # 以降の import pyxel はこのモジュールになる
+    headless_pyxel.set_script(headless_pyxel.idle(60) + headless_pyxel.hold(30, headless_pyxel.KEY_DOWN))
+    Game()                            # Game.__init__ の pyxel.run が入力を最後まで再生して戻る
+    print(headless_pyxel.stats.update_times)
+
+pyxel.run はフレームごとに update() と draw() の時間、描画命令の回数を stats に記録する。
+入力を最後まで再生するか pyxel.quit() が呼ばれたら戻る。
+pyxel.run を使わずに自分でフレームを回すときは、フレームの最後に end_frame() を呼ぶ。
+"""
+import string
+import sys
+import tempfile
+import time
+from collections import Counter, namedtuple
+
+# 1フレーム分の入力: 押されているキー・ボタンの集合とマウス位置 (None なら前のフレームのまま)
+InputFrame = namedtuple("InputFrame", ["keys", "mouse"], defaults=(frozenset(), None))
+
+# ゲームで使うキー・ボタンの名前（値はこのモジュールの中で区別できればよい）
+_KEY_NAMES = (
+    [f"KEY_{c}" for c in string.ascii_uppercase + string.digits]
+    + [f"KEY_F{i}" for i in range(1, 13)]
+    + [
+        "KEY_UP", "KEY_DOWN", "KEY_LEFT", "KEY_RIGHT", "KEY_SPACE", "KEY_RETURN",
+        "KEY_ESCAPE", "KEY_BACKSPACE", "KEY_TAB", "KEY_SHIFT", "KEY_CTRL", "KEY_ALT",
+        "MOUSE_BUTTON_LEFT", "MOUSE_BUTTON_MIDDLE", "MOUSE_BUTTON_RIGHT",
+    ]
+    + [
+        f"GAMEPAD1_BUTTON_{name}" for name in (
+            "A", "B", "X", "Y", "BACK", "GUIDE", "START", "LEFTSTICK", "RIGHTSTICK",
+            "LEFTSHOULDER", "RIGHTSHOULDER", "DPAD_UP", "DPAD_DOWN", "DPAD_LEFT", "DPAD_RIGHT",
+        )
+    ]
+)
+for _value, _name in enumerate(_KEY_NAMES, 1):
+    globals()[_name] = _value
+
+# 数える描画命令 (utils/draw_counter.py の DRAW_PRIMITIVES と同じ)
+DRAW_PRIMITIVES = (
+    "cls", "pset", "line", "rect", "rectb", "circ", "circb",
+    "tri", "trib", "text", "blt", "bltm",
+)
+
+width = 0
+height = 0
+frame_count = 0
+mouse_x = 0
+mouse_y = 0
+
+
+class FrameStats:
+    """pyxel.run が記録するフレームごとの計測結果"""
+
+    def __init__(self):
+        self.update_times = []
+        self.draw_times = []
+        # 画面への描画命令の回数（画像バンクへの描き込みは image_calls に数える）
+        self.draw_calls = []
+        self.image_calls = []
+        self.calls_by_name = Counter()
+
+
+stats = FrameStats()
+_script = []
+_keys_down = {}  # キー -> 押されたフレーム
+_keys_released = set()
+_quit_requested = False
+_user_data_dir = None
+_draw_calls = 0
+_image_calls = 0
+
+
+def install():
+    """sys.modules の pyxel をこのモジュールに差し替える（ゲームを import する前に呼ぶ）"""
+    sys.modules["pyxel"] = sys.modules[__name__]
+
+
+def set_script(frames):
+    """再生する入力（InputFrame のリスト）を設定し、計測結果を空にする"""
+    global _script, stats
+    _script = list(frames)
+    stats = FrameStats()
+
+
+def idle(frames, mouse=None):
+    """何も押さないフレームを frames 個作る"""
+    return [InputFrame(frozenset(), mouse)] * frames
+
+
+def hold(frames, *keys, mouse=None):
+    """keys を押し続けるフレームを frames 個作る（btnp の長押しの繰り返しも起きる）"""
+    return [InputFrame(frozenset(keys), mouse)] * frames
+
+
+def tap(*keys, mouse=None):
+    """keys を1フレームだけ押して離す（2フレーム）"""
+    return [InputFrame(frozenset(keys), mouse), InputFrame(frozenset(), mouse)]
+
+
+# --- システム ---
+
+def init(w, h, title=None, fps=30, **kwargs):
+    global width, height, frame_count, _quit_requested
+    width = w
+    height = h
+    frame_count = 0
+    _quit_requested = False
+    _keys_down.clear()
+    screen.__init__(w, h)
+    for image in images:
+        image.__init__(256, 256)
+
+
+def run(update, draw):
+    """入力を1フレームずつ再生しながら update と draw を呼び、時間と描画命令の回数を記録する"""
+    global frame_count, _quit_requested, _draw_calls, _image_calls
+    for frame in _script:
+        _apply_input(frame)
+        _draw_calls = _image_calls = 0
+
+        start = time.perf_counter()
+        update()
+        updated = time.perf_counter()
+        if _quit_requested:
+            break
+        draw()
+        drawn = time.perf_counter()
+
+        stats.update_times.append(updated - start)
+        stats.draw_times.append(drawn - updated)
+        stats.draw_calls.append(_draw_calls)
+        stats.image_calls.append(_image_calls)
+        frame_count += 1
+
+
+def end_frame():
+    """run() を使わずにフレームを進めるときに呼ぶ: このフレームの画面・画像バンクへの描画命令の回数を返して数え直す"""
+    global frame_count, _draw_calls, _image_calls
+    counts = (_draw_calls, _image_calls)
+    _draw_calls = _image_calls = 0
+    frame_count += 1
+    return counts
+
+
+def quit():
+    global _quit_requested
+    _quit_requested = True
+
+
+def load(filename, **kwargs):
+    pass
+
+
+def user_data_dir(vendor_name, app_name):
+    """保存先は実行ごとの一時フォルダ（本物のユーザーデータを書き換えない）"""
+    global _user_data_dir
+    if _user_data_dir is None:
+        _user_data_dir = tempfile.mkdtemp(prefix=f"headless_{app_name}_")
+    return _user_data_dir
+
+
+# --- 入力 ---
+
+def _apply_input(frame):
+    global mouse_x, mouse_y
+    if frame.mouse is not None:
+        mouse_x, mouse_y = frame.mouse
+    _keys_released.clear()
+    for key in list(_keys_down):
+        if key not in frame.keys:
+            del _keys_down[key]
+            _keys_released.add(key)
+    for key in frame.keys:
+        _keys_down.setdefault(key, frame_count)
+
+
+def btn(key):
+    return key in _keys_down
+
+
+def btnp(key, hold=None, repeat=None):
+    """押された瞬間（hold・repeat を指定したら長押し中の繰り返しも）に True"""
+    pressed_frame = _keys_down.get(key)
+    if pressed_frame is None:
+        return False
+    elapsed = frame_count - pressed_frame
+    if elapsed == 0:
+        return True
+    if hold and repeat and elapsed >= hold:
+        return (elapsed - hold) % repeat == 0
+    return False
+
+
+def btnr(key):
+    return key in _keys_released
+
+
+# --- 描画 ---
+
+def _count(name):
+    global _draw_calls
+    stats.calls_by_name[name] += 1
+    _draw_calls += 1
+
+
+def _make_primitive(name):
+    def primitive(*args, **kwargs):
+        _count(name)
+    primitive.__name__ = name
+    return primitive
+
+
+for _name in DRAW_PRIMITIVES:
+    globals()[_name] = _make_primitive(_name)
+
+
+def clip(*args):
+    pass
+
+
+class Image:
+    """画像バンク。描き込みは何もせず回数だけ数える"""
+
+    def __init__(self, w, h):
+        self.width = w
+        self.height = h
+
+    def __getattr__(self, name):
+        if name not in DRAW_PRIMITIVES:
+            raise AttributeError(name)
+
+        def primitive(*args, **kwargs):
+            global _image_calls
+            stats.calls_by_name[f"image.{name}"] += 1
+            _image_calls += 1
+        return primitive
+
+
+screen = Image(0, 0)
+images = [Image(256, 256) for _ in range(3)]
+
+
+# --- サウンド（何もしない） ---
+
+def play(*args, **kwargs):
+    pass
+
+
+def playm(*args, **kwargs):
+    pass
+
+
+def stop(*args, **kwargs):
+    pass
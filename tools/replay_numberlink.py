@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+ナンバーリンクで記録した操作 (F3 の記録モードで保存した .jsonl) をウィンドウを開かずに再生し、
+フレームごとの処理時間の最悪値を測る
+
+使い方:
+    python tools/replay_numberlink.py 記録ファイル [記録ファイル ...] [--repeat 5] [--worst 5] [--max-frame-ms 2.0]
+
+動作:
+    1. pyxel を tools/headless_pyxel.py に差し替え、記録したパズルのゲーム画面だけを作る（メニューは通らない）
+    2. NumberlinkController.handle_input の pyxel.btnp に記録した入力を返しながら、
+       update() と差分描画 (draw_dirty) を1フレームずつ呼んで時間を記録する
+       （最初のフレームとメニューに戻る操作のあとは画面全体を描く）
+    3. --repeat 回再生してフレームごとに最も速かった時間を取る（たまたま遅れたフレームを除く）
+    4. 平均・99パーセンタイル・最大と、最も遅かったフレームの入力を表示する
+    5. 終了時の盤面・手数・クリア状態が記録と一致するか確かめる
+
+一致しない記録がある、または最も遅いフレームが --max-frame-ms を超えたら終了コード 1 を返す。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+NUMBERLINK_DIR = os.path.join(os.path.dirname(TOOLS_DIR), "main", "numberlink", "src")
+
+sys.path.insert(0, TOOLS_DIR)
+
+import headless_pyxel as hp
+
+
+class ReplayApp:
+    """ゲーム画面が使う NumberlinkApp の属性だけを持つ"""
+
+    WINDOW_WIDTH = 240
+    WINDOW_HEIGHT = 240
+    FPS = 60
+
+    def __init__(self):
+        self.returned_to_menu = False
+        self.full_redraw_pending = True
+
+    def mark_puzzle_cleared(self, puzzle_id, time, moves):
+        pass
+
+    def return_to_menu(self):
+        self.returned_to_menu = True
+
+    def request_full_redraw(self):
+        self.full_redraw_pending = True
+
+
+def replay(log):
+    """記録を1回再生し、フレームごとの (update の時間, draw の時間, 描画命令の回数) と終了時の状態を返す"""
+    from game import NumberlinkGame
+    from input_log import InputPlayer, board_result
+
+    app = ReplayApp()
+    player = InputPlayer(log)
+    player.install()
+    try:
+        game = NumberlinkGame(app, log.puzzle_id, player)
+        frames = []
+        while not player.finished and not app.returned_to_menu:
+            start = time.perf_counter()
+            game.update()
+            updated = time.perf_counter()
+            if app.full_redraw_pending:
+                hp.cls(7)
+                game.draw()
+                app.full_redraw_pending = False
+            else:
+                game.draw_dirty()
+            drawn = time.perf_counter()
+            draw_calls, _ = hp.end_frame()
+            frames.append((updated - start, drawn - updated, draw_calls))
+    finally:
+        player.uninstall()
+    return frames, board_result(game.controller)
+
+
+def _percentile(ordered, ratio):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def report(path, log, runs, worst_count):
+    """再生結果を表示し、(最も遅いフレームの時間, 記録と一致したか) を返す"""
+    # フレームごとに、何回か再生したうちの最も速い時間を使う
+    best = [
+        min(frame_times, key=lambda t: t[0] + t[1]) for frame_times in zip(*(frames for frames, _ in runs))
+    ]
+    totals = sorted(update + draw for update, draw, _ in best)
+
+    print(f"{os.path.basename(path)}  ({log.puzzle_id}, {len(best)} フレーム, {len(runs)} 回再生)")
+    if not best:
+        print("  再生するフレームがありません")
+        return 0.0, True
+    print(
+        f"  1フレーム (update+draw): 平均 {sum(totals) / len(totals) * 1000:.3f}ms"
+        f"  p99 {_percentile(totals, 0.99) * 1000:.3f}ms  最大 {totals[-1] * 1000:.3f}ms"
+    )
+
+    print(f"  遅いフレーム上位 {worst_count}:")
+    slowest = sorted(range(len(best)), key=lambda i: best[i][0] + best[i][1], reverse=True)
+    for i in slowest[:worst_count]:
+        update, draw, draw_calls = best[i]
+        keys = ",".join(log.pressed.get(i, ())) or "-"
+        print(
+            f"    frame {i:>6}  update {update * 1000:.3f}ms  draw {draw * 1000:.3f}ms"
+            f"  描画命令 {draw_calls:>4}  入力 {keys}"
+        )
+
+    # 何度再生しても同じ結果になり、記録したときの結果とも一致するか
+    results = [result for _, result in runs]
+    matched = all(result == results[0] for result in results)
+    if log.result is not None:
+        matched = matched and results[0] == log.result
+    print(f"  終了時の状態: {'一致' if matched else '不一致'} (手数 {results[0]['moves']}, クリア {results[0]['cleared']})")
+    return totals[-1], matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="+", help="記録ファイル (.jsonl)")
+    parser.add_argument("--repeat", type=int, default=5, help="1つの記録を再生する回数")
+    parser.add_argument("--worst", type=int, default=5, help="表示する遅いフレームの数")
+    parser.add_argument("--max-frame-ms", type=float, help="最も遅いフレームの許容時間 (ms)")
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(path) for path in args.logs]
+    # ゲームはソースフォルダから起動する前提（パズルデータの相対パスなど）
+    os.chdir(NUMBERLINK_DIR)
+    sys.path.insert(0, NUMBERLINK_DIR)
+    hp.install()
+    hp.init(ReplayApp.WINDOW_WIDTH, ReplayApp.WINDOW_HEIGHT)
+    from input_log import InputLog
+
+    failed = False
+    for path in paths:
+        log = InputLog.load(path)
+        runs = [replay(log) for _ in range(max(1, args.repeat))]
+        worst, matched = report(path, log, runs, args.worst)
+        if not matched:
+            failed = True
+        if args.max_frame_ms is not None and worst * 1000 > args.max_frame_ms:
+            print(f"  最も遅いフレームが {args.max_frame_ms}ms を超えました")
+            failed = True
+        print()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()